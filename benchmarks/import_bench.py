@@ -0,0 +1,82 @@
+# Throughput benchmark for the streaming bulk land import (POST /land/submit/bulk).
+#
+# Streams `--rows` generated rows (CSV or NDJSON) through the app in 64 KiB chunks
+# against the in-memory fake backend (fake_db.py) with injected per-batch latency.
+# Peak RSS includes the fake lands table itself.
+#
+#   python benchmarks/import_bench.py --rows 100000 --format csv --batch-size 500
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+import database
+import fake_db
+import main
+
+CHUNK = 64 * 1024
+OWNER_ID = str(uuid.uuid4())
+
+
+def generate(rows: int, fmt: str):
+    fields = ["title", "location", "land_type", "ownership_info", "area_sqft", "total_price",
+              "potential_capacity_kw", "owner_id"]
+    if fmt == "csv":
+        yield (",".join(fields) + "\n").encode()
+    buf = []
+    size = 0
+    for i in range(rows):
+        values = [f"Rooftop {i}", f"City {i % 500}", "Rooftop", "Sole Owner", 800 + i % 400, 40000 + i, 5 + i % 20, OWNER_ID]
+        line = (",".join(map(str, values)) if fmt == "csv" else json.dumps(dict(zip(fields, values)))) + "\n"
+        buf.append(line)
+        size += len(line)
+        if size >= CHUNK:
+            yield "".join(buf).encode()
+            buf, size = [], 0
+    if buf:
+        yield "".join(buf).encode()
+
+
+async def run(rows: int, fmt: str, batch_size: int, latency: float):
+    db = fake_db.FakeClient(latency_ms=latency * 1000)
+    database._client = db
+
+    async def body():
+        for chunk in generate(rows, fmt):
+            yield chunk
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    content_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        start = time.perf_counter()
+        res = await client.post("/land/submit/bulk", params={"batch_size": batch_size},
+                                content=body(), headers={"content-type": content_type})
+        elapsed = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    report = res.json()
+    print(f"rows:        {rows} ({fmt}, batch {batch_size}, {latency * 1000:.1f} ms/batch)")
+    print(f"elapsed:     {elapsed:.2f}s  ->  {rows / elapsed:,.0f} rows/s")
+    print(f"inserted:    {report['inserted']} in {db.round_trips} batches, failed {report['failed']}")
+    print(f"peak RSS:    {rss_before / 1024:.0f} MiB -> {rss_after / 1024:.0f} MiB")
+    return report["inserted"] == rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.01, help="simulated DB latency per batch (s)")
+    args = parser.parse_args()
+    ok = asyncio.run(run(args.rows, args.format, args.batch_size, args.latency))
+    sys.exit(0 if ok else 1)
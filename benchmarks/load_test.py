@@ -0,0 +1,316 @@
+# Load test for every router endpoint against the in-memory fake backend (fake_db.py).
+#
+# Seeds users, lands and investments, then drives each endpoint with `--requests`
+# requests at `--concurrency` in flight, reporting throughput and p50/p95/p99 latency.
+# Results are compared with benchmarks/baselines.json; the run fails (exit 1) when an
+# endpoint's p95 or throughput regresses by more than `--tolerance`.
+#
+#   python benchmarks/load_test.py --requests 300 --concurrency 50 --latency-ms 2
+#   python benchmarks/load_test.py --only invest/ --update-baselines
+#
+# Baselines are machine dependent: refresh them on the machine that runs the check.
+# The SSE stream (/invest/notifications/stream) never completes and is not driven here.
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+import config
+import database
+import fake_db
+import main
+from services import sessions
+from services.generation import generation_store
+
+BASELINES = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+
+class Scenario:
+    def __init__(self, name: str, method: str, build: Callable[[int], dict], requests: Optional[int] = None):
+        self.name = name  # "METHOD /route/template"
+        self.method = method
+        self.build = build  # request index -> httpx.request kwargs (url, params, json, headers, content)
+        self.requests = requests  # per-scenario cap for expensive endpoints
+
+
+class Fixture:
+    # Seed data sized so every mutating request gets its own row
+
+    def __init__(self, n: int, owners: int = 50, investors: int = 200, catalog: int = 2000):
+        self.admin = self._user("admin", 0)
+        self.owners = [self._user("land_owner", i) for i in range(owners)]
+        self.investors = [self._user("investor", i, balance=10**9) for i in range(investors)]
+        self.lands = {"available": [], "pending_approval": [], "active": [], "reserved": []}
+        self.investments = {"pending_approval": [], "payment_pending": [], "active": []}
+
+        for i in range(catalog):
+            self._land("available" if i % 2 else "active", i)
+        # One row per /invest/request, and per approve + per reject
+        for i in range(n):
+            self._land("available", i)
+        for i in range(2 * n):
+            self._land("pending_approval", i)
+        # Reservations waiting for approval, approved ones waiting for payment, ...
+        for status, pool in (("pending_approval", n), ("payment_pending", n), ("active", catalog // 4)):
+            for i in range(pool):
+                land = self._land("reserved" if status != "active" else "active", i)
+                investor = self.investors[i % len(self.investors)]
+                self.investments[status].append({
+                    "id": str(uuid.uuid4()), "land_id": land["id"], "investor_id": investor["id"],
+                    "amount": land["total_price"], "status": status,
+                    "transaction_date": _ts(i),
+                })
+
+    def _user(self, role: str, i: int, balance: float = 0) -> dict:
+        return {"id": str(uuid.uuid4()), "email": f"{role}{i}@bench.local", "full_name": f"{role} {i}",
+                "role": role, "password": "bench-password", "balance": balance, "created_at": _ts(i)}
+
+    def _land(self, status: str, i: int) -> dict:
+        owner = self.owners[i % len(self.owners)]
+        land = {
+            "id": str(uuid.uuid4()), "owner_id": owner["id"], "title": f"{status} site {i}",
+            "location": ["Chennai", "Bangalore", "Coimbatore", "Madurai", "Hyderabad"][i % 5],
+            "land_type": ["Rooftop", "Open Land", "Farm"][i % 3], "ownership_info": "Sole Owner",
+            "area_sqft": 800.0 + i % 4000, "total_price": 40000.0 + (i % 500) * 100,
+            "potential_capacity_kw": 5.0 + i % 200, "owner_fixed_payout": 1000.0,
+            "owner_revenue_share_percent": 5.0, "description": "South facing, no shading",
+            "latitude": 8.0 + (i % 700) / 100, "longitude": 74.0 + (i // 700 % 900) / 100,
+            "status": status, "created_at": _ts(i),
+        }
+        self.lands[status].append(land)
+        return land
+
+    def tables(self) -> Dict[str, List[dict]]:
+        return {
+            "users": [self.admin] + self.owners + self.investors,
+            "lands": [l for pool in self.lands.values() for l in pool],
+            "investments": [inv for pool in self.investments.values() for inv in pool],
+        }
+
+
+def _ts(i: int) -> str:
+    return (datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=i)).isoformat()
+
+
+def as_user(user: dict) -> dict:
+    # Signed access token, as a logged-in client would send it
+    return {"Authorization": f"Bearer {sessions.issue(user['id'], user['role'])}"}
+
+
+def scenarios(fx: Fixture) -> List[Scenario]:
+    admin = as_user(fx.admin)
+    owner = lambda i: fx.owners[i % len(fx.owners)]
+    investor = lambda i: fx.investors[i % len(fx.investors)]
+    active = fx.lands["active"]
+    available = fx.lands["available"]
+    pending = fx.lands["pending_approval"]
+    run_id = uuid.uuid4().hex[:8]
+
+    def land_body(i):
+        return {"title": f"Bench {i}", "location": "Chennai", "land_type": "Rooftop", "ownership_info": "Sole Owner",
+                "area_sqft": 1000, "total_price": 50000, "potential_capacity_kw": 10, "owner_id": owner(i)["id"]}
+
+    def bulk_csv(i):
+        header = "title,location,land_type,ownership_info,area_sqft,total_price,owner_id\n"
+        rows = "".join(f"Bulk {i}-{r},Madurai,Farm,Leased,{900 + r},{45000 + r},{owner(i)['id']}\n" for r in range(50))
+        return (header + rows).encode()
+
+    def readings(i):
+        start = datetime(2024, 6, 1, tzinfo=timezone.utc) + timedelta(minutes=15 * 96 * (i % 28))
+        site = active[i % len(active)]["id"]
+        return {"readings": [{"site_id": site, "timestamp": (start + timedelta(minutes=15 * k)).isoformat(),
+                              "kwh": 1.5} for k in range(96)]}
+
+    # The last n available lands are reserved one per /invest/request
+    available_pool = available[-(len(pending) // 2):]
+    return [
+        Scenario("GET /", "GET", lambda i: {"url": "/"}),
+        Scenario("POST /auth/register", "POST", lambda i: {"url": "/auth/register", "json": {
+            "email": f"new{run_id}-{i}@bench.local", "full_name": "New User", "role": "investor",
+            "password": "bench-password"}}),
+        Scenario("POST /auth/login", "POST", lambda i: {"url": "/auth/login", "json": {
+            "email": investor(i)["email"], "password": "bench-password"}}),
+        Scenario("GET /auth/me", "GET", lambda i: {"url": "/auth/me", "headers": as_user(investor(i))}),
+        Scenario("POST /auth/logout", "POST", lambda i: {"url": "/auth/logout"}),
+        Scenario("GET /map/solar-sites", "GET", lambda i: {"url": "/map/solar-sites"}),
+        Scenario("GET /map/solar-sites?bbox", "GET", lambda i: {"url": "/map/solar-sites",
+                                                               "params": {"bbox": f"{74 + i % 5},8,{76 + i % 5},12"}}),
+        Scenario("GET /map/solar-sites/tiles/{z}/{x}/{y}", "GET", lambda i: {"url": f"/map/solar-sites/tiles/{4 + i % 4}/11/7"}),
+        Scenario("GET /stats/platform", "GET", lambda i: {"url": "/stats/platform"}),
+        Scenario("GET /lands/available", "GET", lambda i: {"url": "/lands/available", "params": {"limit": 50 + i % 3}}),
+        Scenario("POST /land/submit", "POST", lambda i: {"url": "/land/submit", "json": land_body(i)}),
+        Scenario("POST /land/submit/bulk", "POST", lambda i: {"url": "/land/submit/bulk", "content": bulk_csv(i),
+                                                              "headers": {"content-type": "text/csv"}}, requests=50),
+        Scenario("GET /land/my-lands", "GET", lambda i: {"url": "/land/my-lands", "headers": as_user(owner(i))}),
+        Scenario("GET /land/my-earnings", "GET", lambda i: {"url": "/land/my-earnings", "headers": as_user(owner(i))}),
+        Scenario("GET /land/map", "GET", lambda i: {"url": "/land/map", "headers": as_user(owner(i)),
+                                                   "params": {"bbox": "70,5,90,20"}}),
+        Scenario("GET /land/map/tiles/{z}/{x}/{y}", "GET", lambda i: {"url": "/land/map/tiles/5/22/14",
+                                                                     "headers": as_user(owner(i))}),
+        Scenario("GET /invest/wallet", "GET", lambda i: {"url": "/invest/wallet", "headers": as_user(investor(i))}),
+        Scenario("GET /invest/wallet/transactions", "GET", lambda i: {"url": "/invest/wallet/transactions",
+                                                                     "headers": as_user(investor(i))}),
+        Scenario("POST /invest/wallet/add", "POST", lambda i: {"url": "/invest/wallet/add", "json": {"amount": 100},
+                                                              "headers": as_user(investor(i))}),
+        Scenario("POST /invest/wallet/withdraw", "POST", lambda i: {"url": "/invest/wallet/withdraw",
+                                                                   "json": {"amount": 10}, "headers": as_user(investor(i))}),
+        Scenario("GET /invest/available-lands", "GET", lambda i: {"url": "/invest/available-lands"}),
+        Scenario("GET /invest/available-lands?q", "GET", lambda i: {"url": "/invest/available-lands", "params": {
+            "location": ["chenai", "bangalor", "coimbatore", "madurai"][i % 4], "min_capacity": i % 50}}),
+        Scenario("GET /invest/available-lands/autocomplete", "GET", lambda i: {
+            "url": "/invest/available-lands/autocomplete", "params": {"prefix": ["ch", "ba", "co", "ma"][i % 4]}}),
+        Scenario("GET /invest/land/{land_id}", "GET", lambda i: {"url": f"/invest/land/{available[i % len(available)]['id']}"}),
+        Scenario("GET /invest/projections?land_ids", "GET", lambda i: {"url": "/invest/projections", "params": {
+            "land_ids": ",".join(l["id"] for l in available[i % len(available):][:5])}}),
+        Scenario("GET /invest/projections", "GET", lambda i: {"url": "/invest/projections"}, requests=50),
+        Scenario("POST /invest/request", "POST", lambda i: {"url": "/invest/request", "json": {
+            "land_id": available_pool[i]["id"], "investor_id": investor(i)["id"], "amount": 50000}}),
+        Scenario("GET /invest/my-requests", "GET", lambda i: {"url": "/invest/my-requests", "headers": as_user(investor(i))}),
+        Scenario("GET /invest/my-investments", "GET", lambda i: {"url": "/invest/my-investments",
+                                                                "headers": as_user(investor(i))}),
+        Scenario("GET /invest/portfolio", "GET", lambda i: {"url": "/invest/portfolio", "headers": as_user(investor(i))}),
+        Scenario("GET /invest/notifications", "GET", lambda i: {"url": "/invest/notifications",
+                                                               "headers": as_user(investor(i))}),
+        Scenario("POST /invest/pay-now/{investment_id}", "POST", lambda i: {
+            "url": f"/invest/pay-now/{fx.investments['payment_pending'][i]['id']}",
+            "headers": as_user({"id": fx.investments["payment_pending"][i]["investor_id"], "role": "investor"})}),
+        Scenario("POST /payment/mark-paid", "POST", lambda i: {"url": "/payment/mark-paid", "params": {
+            "investment_id": fx.investments["active"][i % len(fx.investments["active"])]["id"]}}),
+        Scenario("GET /admin/stats", "GET", lambda i: {"url": "/admin/stats", "headers": admin}),
+        Scenario("GET /admin/lands/pending", "GET", lambda i: {"url": "/admin/lands/pending", "headers": admin}),
+        Scenario("POST /admin/lands/{land_id}/approve", "POST", lambda i: {
+            "url": f"/admin/lands/{pending[i]['id']}/approve", "headers": admin}),
+        Scenario("POST /admin/lands/{land_id}/reject", "POST", lambda i: {
+            "url": f"/admin/lands/{pending[len(pending) // 2 + i]['id']}/reject", "headers": admin}),
+        Scenario("POST /admin/lands/bulk", "POST", lambda i: {"url": "/admin/lands/bulk", "headers": admin, "json": {
+            "action": "approve", "ids": [l["id"] for l in active[i * 10 % len(active):][:10]]}}),
+        Scenario("GET /admin/investments/pending", "GET", lambda i: {"url": "/admin/investments/pending", "headers": admin}),
+        Scenario("POST /admin/investments/{inv_id}/approve", "POST", lambda i: {
+            "url": f"/admin/investments/{fx.investments['pending_approval'][i]['id']}/approve", "headers": admin}),
+        Scenario("POST /admin/investments/bulk", "POST", lambda i: {"url": "/admin/investments/bulk", "headers": admin,
+                                                                   "json": {"action": "approve", "ids": [str(uuid.uuid4())]}}),
+        Scenario("POST /admin/payouts/run", "POST", lambda i: {"url": "/admin/payouts/run", "headers": admin,
+                                                              "params": {"period": "2024-05"}}, requests=10),
+        Scenario("POST /generation/readings", "POST", lambda i: {"url": "/generation/readings", "json": readings(i)}),
+        Scenario("GET /generation/sites/{site_id}", "GET", lambda i: {
+            "url": f"/generation/sites/{active[i % len(active)]['id']}", "params": {"month": "2024-06"}}),
+        Scenario("GET /generation/platform", "GET", lambda i: {"url": "/generation/platform"}),
+        Scenario("GET /metrics", "GET", lambda i: {"url": "/metrics"}, requests=20),
+    ]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def drive(client: httpx.AsyncClient, scenario: Scenario, n: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    errors: Dict[int, int] = {}
+    next_index = iter(range(n))
+
+    async def worker():
+        for i in next_index:
+            kwargs = scenario.build(i)
+            start = time.perf_counter()
+            res = await client.request(scenario.method, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if res.status_code >= 400:
+                errors[res.status_code] = errors.get(res.status_code, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(min(concurrency, n))])
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": n,
+        "rps": n / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "errors": errors,
+    }
+
+
+def compare(name: str, result: dict, baseline: Optional[dict], tolerance: float, slack_ms: float) -> List[str]:
+    problems = []
+    if result["errors"]:
+        problems.append(f"{name}: HTTP errors {result['errors']}")
+    if baseline:
+        # Sub-millisecond endpoints would trip on noise alone, hence the absolute slack
+        if result["p95_ms"] > baseline["p95_ms"] * (1 + tolerance) + slack_ms:
+            problems.append(f"{name}: p95 {result['p95_ms']:.1f} ms > baseline {baseline['p95_ms']:.1f} ms")
+        if result["rps"] < baseline["rps"] * (1 - tolerance):
+            problems.append(f"{name}: {result['rps']:.0f} req/s < baseline {baseline['rps']:.0f} req/s")
+    return problems
+
+
+async def run(args) -> bool:
+    config.DATABASE_BACKEND = "fake"
+    # A handful of fixture users drive every route flat out; per-client limits would
+    # only measure the 429 path (the DB concurrency cap stays on)
+    config.RATE_LIMIT_ENABLED = False
+    fx = Fixture(args.requests)
+    db = fake_db.FakeClient(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+    db.seed(fx.tables())
+    database._client = db
+    generation_store.root = tempfile.mkdtemp(prefix="generation-bench-")
+
+    baselines = {}
+    if os.path.exists(args.baselines):
+        with open(args.baselines) as f:
+            baselines = json.load(f)
+
+    results, problems = {}, []
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            print(f"{'endpoint':<48}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  errors")
+            for scenario in scenarios(fx):
+                if args.only and args.only not in scenario.name:
+                    continue
+                n = min(args.requests, scenario.requests or args.requests)
+                result = await drive(client, scenario, n, args.concurrency)
+                results[scenario.name] = result
+                problems += compare(scenario.name, result, baselines.get(scenario.name), args.tolerance, args.slack_ms)
+                print(f"{scenario.name:<48}{result['rps']:>9.0f}{result['p50_ms']:>9.1f}"
+                      f"{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}  {result['errors'] or ''}")
+
+    if args.update_baselines:
+        baselines.update({name: {"rps": round(r["rps"], 1), "p95_ms": round(r["p95_ms"], 2)} for name, r in results.items()})
+        with open(args.baselines, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baselines written to {args.baselines}")
+        return not any(r["errors"] for r in results.values())
+
+    for problem in problems:
+        print("REGRESSION " + problem)
+    return not problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=300, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="injected latency per DB round trip")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--only", help="substring filter on endpoint names")
+    parser.add_argument("--baselines", default=BASELINES)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed regression, 0.5 = 50%%")
+    parser.add_argument("--slack-ms", type=float, default=5.0, help="p95 may also exceed the baseline by this much")
+    parser.add_argument("--update-baselines", action="store_true")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run(args)) else 1)
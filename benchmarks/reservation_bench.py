@@ -0,0 +1,76 @@
+# Concurrency benchmark for the atomic reservation path (POST /invest/request).
+#
+# Fires `--concurrency` simultaneous requests at each of `--lands` listings and
+# checks that exactly one reservation wins per land. The database is the in-memory
+# fake backend (fake_db.py), whose `reserve_land` mirrors the SQL function, with injected latency.
+#
+#   python benchmarks/reservation_bench.py --lands 20 --concurrency 500 --latency 0.005
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+import config
+import database
+import fake_db
+import main
+from services.stats import stats
+
+
+# 200: won the land; 400: land no longer available; 409: another reservation in flight
+EXPECTED_CODES = {200, 400, 409}
+
+
+async def run(n_lands: int, concurrency: int, latency: float):
+    # Every request comes from one client address: measure the reservation path,
+    # not the per-client rate limiter
+    config.RATE_LIMIT_ENABLED = False
+    land_ids = [str(uuid.uuid4()) for _ in range(n_lands)]
+    db = fake_db.FakeClient(latency_ms=latency * 1000)
+    db.seed({"lands": [{"id": i, "status": "available", "total_price": 1000.0} for i in land_ids]})
+    database._client = db
+    for land_id in land_ids:
+        stats.land_changed(land_id, "available")
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def attempt(land_id):
+            body = {"land_id": land_id, "investor_id": str(uuid.uuid4()), "amount": 1000.0}
+            return (await client.post("/invest/request", json=body)).status_code
+
+        start = time.perf_counter()
+        codes = await asyncio.gather(*[attempt(l) for l in land_ids for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+
+    total = len(codes)
+    statuses = Counter(codes)
+    unexpected = {code: n for code, n in statuses.items() if code not in EXPECTED_CODES}
+    winners = Counter(inv["land_id"] for inv in db.tables.get("investments", {}).values())
+    double_booked = sum(1 for n in winners.values() if n > 1)
+    print(f"requests:        {total} ({n_lands} lands x {concurrency} concurrent)")
+    print(f"elapsed:         {elapsed:.3f}s  ->  {total / elapsed:,.0f} req/s")
+    print(f"status codes:    {dict(statuses)}")
+    print(f"rate limited:    {statuses.get(429, 0)}")
+    print(f"db round trips:  {db.round_trips}  (guard rejected {total - db.round_trips} before the DB)")
+    print(f"reserved lands:  {len(winners)}/{n_lands}")
+    print(f"double-bookings: {double_booked}")
+    if unexpected:
+        print(f"unexpected:      {unexpected}")
+    return double_booked == 0 and len(winners) == n_lands and not unexpected
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lands", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.005, help="simulated DB latency (s)")
+    args = parser.parse_args()
+    ok = asyncio.run(run(args.lands, args.concurrency, args.latency))
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,121 @@
+# Benchmark for response encoding (services/responses.py).
+#
+# Serializes `--rows` land rows the old way (response-model validation +
+# jsonable_encoder + json.dumps) and the new way (orjson, streamed in chunks),
+# then fetches the same rows end to end through the app (bbox map query,
+# answered from the in-process spatial index so no database is needed)
+# with and without compression.
+#
+#   python benchmarks/serialization_bench.py --rows 10000
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import httpx
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+import main
+from models import LandResponse
+from services import responses
+from services.geo import geo_index
+
+
+def synthetic_rows(n: int) -> List[dict]:
+    now = datetime.now(timezone.utc).isoformat()
+    return [{
+        "id": str(uuid.UUID(int=i)),
+        "owner_id": str(uuid.UUID(int=10**9 + i % 500)),
+        "title": f"Site {i}",
+        "location": ["Chennai", "Bangalore", "Coimbatore", "Madurai"][i % 4],
+        "land_type": ["Rooftop", "Open Land", "Farm"][i % 3],
+        "ownership_info": "Sole Owner",
+        "area_sqft": 1000.0 + i,
+        "total_price": 250000.0 + i * 3,
+        "potential_capacity_kw": 5.0 + i % 100,
+        "owner_fixed_payout": 1000.0,
+        "owner_revenue_share_percent": 5.0,
+        "description": "South facing, no shading",
+        "image_url": None,
+        "latitude": 8.0 + (i % 1000) / 100,
+        "longitude": 76.0 + (i // 1000) / 100,
+        "status": "active",
+        "created_at": now,
+    } for i in range(n)]
+
+
+def timed(fn, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def before(rows):
+    # What FastAPI did for `response_model=List[LandResponse]` returning a list
+    adapter = TypeAdapter(List[LandResponse])
+    return json.dumps(jsonable_encoder(adapter.validate_python(rows))).encode()
+
+
+def after(rows):
+    return responses.dumps(rows)
+
+
+def streamed(rows):
+    return b"".join(responses._array_chunks(rows, responses.config.STREAM_CHUNK_ROWS))
+
+
+async def http_fetch(encoding: str, repeat: int):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        best, size = float("inf"), 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            res = await client.get("/map/solar-sites", params={"bbox": "-180,-90,180,90"},
+                                   headers={"Accept-Encoding": encoding})
+            body = res.content  # decoded by httpx
+            best = min(best, time.perf_counter() - start)
+            size = res.num_bytes_downloaded
+            assert res.status_code == 200 and len(json.loads(body)) == len(geo_index)
+        return best, size, res.headers.get("content-encoding", "identity")
+
+
+def run(n_rows: int, repeat: int):
+    rows = synthetic_rows(n_rows)
+
+    t_before, body_before = timed(lambda: before(rows), repeat)
+    t_after, body_after = timed(lambda: after(rows), repeat)
+    t_stream, body_stream = timed(lambda: streamed(rows), repeat)
+    assert json.loads(body_after) == json.loads(body_stream)
+    assert len(json.loads(body_before)) == n_rows
+
+    print(f"rows:                        {n_rows:,}")
+    print(f"validate+json.dumps:         {t_before * 1000:7.1f} ms  {len(body_before) / 1024:8.0f} KiB")
+    print(f"orjson:                      {t_after * 1000:7.1f} ms  {len(body_after) / 1024:8.0f} KiB  ({t_before / t_after:.0f}x)")
+    print(f"orjson, streamed chunks:     {t_stream * 1000:7.1f} ms")
+
+    geo_index.load(rows)
+    encodings = ["identity", "gzip"] + (["br"] if responses.brotli is not None else [])
+    for encoding in encodings:
+        t, size, used = asyncio.run(http_fetch(encoding, repeat))
+        print(f"GET bbox, {used:<8}           {t * 1000:7.1f} ms  {size / 1024:8.0f} KiB on the wire")
+    if responses.brotli is None:
+        print("(brotli not installed: br skipped)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
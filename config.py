@@ -0,0 +1,124 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Supabase credentials
+SUPABASE_URL: str = os.environ.get("SUPABASE_URL")
+SUPABASE_KEY: str = os.environ.get("SUPABASE_KEY")
+
+# "supabase", or "fake" for the in-memory stand-in (fake_db.py) used by local runs and load tests
+DATABASE_BACKEND: str = os.environ.get("DATABASE_BACKEND", "supabase").lower()
+FAKE_DB_LATENCY_MS: float = float(os.environ.get("FAKE_DB_LATENCY_MS", "0"))  # injected per round trip
+FAKE_DB_JITTER_MS: float = float(os.environ.get("FAKE_DB_JITTER_MS", "0"))  # + uniform random 0..jitter
+FAKE_DB_SEED: str = os.environ.get("FAKE_DB_SEED")  # optional JSON file {table: [rows]}
+
+# HTTP connection pool used by the async Supabase client (one pool per worker)
+SUPABASE_POOL_SIZE: int = int(os.environ.get("SUPABASE_POOL_SIZE", "20"))
+SUPABASE_TIMEOUT: float = float(os.environ.get("SUPABASE_TIMEOUT", "10"))
+
+# Signed session tokens + password hashing
+AUTH_SECRET: str = os.environ.get("AUTH_SECRET")  # HMAC key; must be the same on every worker/instance
+ACCESS_TOKEN_SECONDS: int = int(os.environ.get("ACCESS_TOKEN_SECONDS", "900"))
+REFRESH_TOKEN_SECONDS: int = int(os.environ.get("REFRESH_TOKEN_SECONDS", str(7 * 24 * 3600)))
+# Hard limit on a session from the password login, however often its refresh token is rotated
+SESSION_MAX_SECONDS: int = int(os.environ.get("SESSION_MAX_SECONDS", str(30 * 24 * 3600)))
+PASSWORD_HASH_ITERATIONS: int = int(os.environ.get("PASSWORD_HASH_ITERATIONS", "200000"))  # PBKDF2-SHA256 cost
+# Still accept the old X-User-ID header while clients move to tokens
+AUTH_LEGACY_HEADER: bool = os.environ.get("AUTH_LEGACY_HEADER", "true").lower() in ("1", "true", "yes")
+
+# Admission control: token buckets per client and route class (public / investor / admin),
+# refilled at these requests per second and holding RATE_LIMIT_BURST_SECONDS worth of burst
+RATE_LIMIT_ENABLED: bool = os.environ.get("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+RATE_LIMIT_PUBLIC: float = float(os.environ.get("RATE_LIMIT_PUBLIC", "20"))
+RATE_LIMIT_INVESTOR: float = float(os.environ.get("RATE_LIMIT_INVESTOR", "10"))
+RATE_LIMIT_ADMIN: float = float(os.environ.get("RATE_LIMIT_ADMIN", "20"))
+RATE_LIMIT_BURST_SECONDS: float = float(os.environ.get("RATE_LIMIT_BURST_SECONDS", "3"))
+RATE_LIMIT_MAX_CLIENTS: int = int(os.environ.get("RATE_LIMIT_MAX_CLIENTS", "100000"))  # buckets kept in memory
+# Supabase calls in flight per worker (0 = no cap); requests are shed with 503 when
+# the wait for a slot would exceed the budget
+DB_MAX_CONCURRENCY: int = int(os.environ.get("DB_MAX_CONCURRENCY", str(SUPABASE_POOL_SIZE)))
+DB_QUEUE_BUDGET_MS: float = float(os.environ.get("DB_QUEUE_BUDGET_MS", "250"))
+
+# Local (in-memory, per worker) SQLite read replica of users / lands / investments (replica.py)
+REPLICA_ENABLED: bool = os.environ.get("REPLICA_ENABLED", "true").lower() in ("1", "true", "yes")
+REPLICA_SYNC_SECONDS: float = float(os.environ.get("REPLICA_SYNC_SECONDS", "30"))  # incremental sync on updated_at
+
+# Outbox workers per process applying follow-up writes (services/outbox.py)
+OUTBOX_WORKERS: int = int(os.environ.get("OUTBOX_WORKERS", "2"))
+OUTBOX_BATCH_SIZE: int = int(os.environ.get("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_POLL_SECONDS: float = float(os.environ.get("OUTBOX_POLL_SECONDS", "1"))  # also woken on local writes
+OUTBOX_MAX_ATTEMPTS: int = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", "8"))  # then parked as 'failed'
+OUTBOX_LEASE_SECONDS: int = int(os.environ.get("OUTBOX_LEASE_SECONDS", "60"))  # claimed events of a dead worker come back
+
+# Platform/admin stats are served from memory and re-synced with the DB on this interval
+STATS_RECONCILE_SECONDS: float = float(os.environ.get("STATS_RECONCILE_SECONDS", "300"))
+
+# Keyset pagination for list endpoints
+DEFAULT_PAGE_SIZE: int = int(os.environ.get("DEFAULT_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE: int = int(os.environ.get("MAX_PAGE_SIZE", "500"))
+
+# In-process spatial index for the map endpoints
+GEO_CELL_DEGREES: float = float(os.environ.get("GEO_CELL_DEGREES", "0.25"))
+GEO_CLUSTER_MAX_ZOOM: int = int(os.environ.get("GEO_CLUSTER_MAX_ZOOM", "11"))  # cluster at zoom <= this
+
+# In-memory fuzzy search over available lands
+SEARCH_MIN_SCORE: float = float(os.environ.get("SEARCH_MIN_SCORE", "0.35"))
+
+# Read-through cache for land details and public listing pages
+CACHE_MAX_ENTRIES: int = int(os.environ.get("CACHE_MAX_ENTRIES", "2048"))
+CACHE_TTL_SECONDS: float = float(os.environ.get("CACHE_TTL_SECONDS", "60"))
+# After an expiry/invalidation, listing pages may be served stale this long while one refresh runs (0 = off)
+CACHE_STALE_SECONDS: float = float(os.environ.get("CACHE_STALE_SECONDS", "2"))
+
+# Streaming bulk land import (POST /land/submit/bulk)
+IMPORT_BATCH_SIZE: int = int(os.environ.get("IMPORT_BATCH_SIZE", "500"))
+IMPORT_MAX_ERRORS: int = int(os.environ.get("IMPORT_MAX_ERRORS", "1000"))  # per-row errors reported back
+# A CSV record (quoted fields may span lines) longer than this is reported as a bad row
+IMPORT_MAX_RECORD_LINES: int = int(os.environ.get("IMPORT_MAX_RECORD_LINES", "50"))
+IMPORT_MAX_RECORD_BYTES: int = int(os.environ.get("IMPORT_MAX_RECORD_BYTES", "65536"))
+
+# Land-owner payouts: revenue = capacity_kw * hours * capacity factor * tariff
+PAYOUT_TARIFF_PER_KWH: float = float(os.environ.get("PAYOUT_TARIFF_PER_KWH", "6.5"))
+PAYOUT_CAPACITY_FACTOR: float = float(os.environ.get("PAYOUT_CAPACITY_FACTOR", "0.18"))
+
+# Investor return projections (same tariff / capacity factor as payouts), with Monte Carlo
+# scenarios of year-to-year irradiance and a random-walk tariff around the escalation trend
+PROJECTION_YEARS: int = int(os.environ.get("PROJECTION_YEARS", "25"))
+PROJECTION_DEGRADATION_PERCENT: float = float(os.environ.get("PROJECTION_DEGRADATION_PERCENT", "0.5"))  # per year
+PROJECTION_TARIFF_ESCALATION_PERCENT: float = float(os.environ.get("PROJECTION_TARIFF_ESCALATION_PERCENT", "2"))
+PROJECTION_SCENARIOS: int = int(os.environ.get("PROJECTION_SCENARIOS", "2000"))
+PROJECTION_IRRADIANCE_SD: float = float(os.environ.get("PROJECTION_IRRADIANCE_SD", "0.07"))  # relative, per year
+PROJECTION_TARIFF_SD: float = float(os.environ.get("PROJECTION_TARIFF_SD", "0.05"))  # relative, per year
+PROJECTION_SEED: int = int(os.environ.get("PROJECTION_SEED", "42"))
+PROJECTION_CACHE_ENTRIES: int = int(os.environ.get("PROJECTION_CACHE_ENTRIES", "20000"))
+
+# Solar generation time-series (memory-mapped, partitioned by site and month)
+GENERATION_DATA_DIR: str = os.environ.get("GENERATION_DATA_DIR", "data/generation")
+GENERATION_OPEN_PARTITIONS: int = int(os.environ.get("GENERATION_OPEN_PARTITIONS", "64"))
+
+# Push notifications (Server-Sent Events)
+NOTIFY_BACKLOG: int = int(os.environ.get("NOTIFY_BACKLOG", "50"))  # events kept per user for reconnects
+NOTIFY_MAX_USERS: int = int(os.environ.get("NOTIFY_MAX_USERS", "100000"))  # users with a backlog in memory
+NOTIFY_HEARTBEAT_SECONDS: float = float(os.environ.get("NOTIFY_HEARTBEAT_SECONDS", "20"))
+
+# Response encoding: big JSON arrays are streamed, bodies above the threshold compressed
+STREAM_MIN_ROWS: int = int(os.environ.get("STREAM_MIN_ROWS", "2000"))
+STREAM_CHUNK_ROWS: int = int(os.environ.get("STREAM_CHUNK_ROWS", "500"))
+# Admin CSV/Parquet exports: rows per Supabase page (keep <= the API's max rows, 1000
+# by default on Supabase, or exports stop after the first page) / per Parquet row group
+EXPORT_PAGE_ROWS: int = int(os.environ.get("EXPORT_PAGE_ROWS", "1000"))
+EXPORT_ROW_GROUP_ROWS: int = int(os.environ.get("EXPORT_ROW_GROUP_ROWS", "50000"))
+COMPRESS_MIN_BYTES: int = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))
+
+# Adds X-DB-Round-Trips (Supabase calls made for the request) to every response
+DB_ROUND_TRIP_HEADER: bool = os.environ.get("DB_ROUND_TRIP_HEADER", "true").lower() in ("1", "true", "yes")
+
+# Several workers on one node (serve.py): shared L2 cache, change feed and locks under this directory
+SHARED_STATE: bool = os.environ.get("SHARED_STATE", "false").lower() in ("1", "true", "yes")
+SHARED_STATE_DIR: str = os.environ.get("SHARED_STATE_DIR")  # default /dev/shm/solar-backend
+SHARED_SYNC_SECONDS: float = float(os.environ.get("SHARED_SYNC_SECONDS", "0.5"))  # change feed poll interval
+SHARED_SNAPSHOT_SECONDS: float = float(os.environ.get("SHARED_SNAPSHOT_SECONDS", "60"))  # startup snapshot reuse
+WORKERS: int = int(os.environ.get("WORKERS", str(os.cpu_count() or 1)))
+HOST: str = os.environ.get("HOST", "0.0.0.0")
+PORT: int = int(os.environ.get("PORT", "8000"))
@@ -1,14 +1,206 @@
-import os
-from supabase import create_client, Client
-from dotenv import load_dotenv
+import asyncio
+import math
+import time
+import httpx
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, List
+from fastapi import HTTPException
+from supabase import acreate_client, AsyncClient, AsyncClientOptions
+import config
+from replica import Replica
+from services import metrics
 
-load_dotenv()
+if config.DATABASE_BACKEND == "supabase" and (not config.SUPABASE_URL or not config.SUPABASE_KEY):
+    print("Warning: SUPABASE_URL or SUPABASE_KEY not found in environment variables.")
 
-url: str = os.environ.get("SUPABASE_URL")
-key: str = os.environ.get("SUPABASE_KEY")
+_client: AsyncClient = None
+_http: httpx.AsyncClient = None
+
+
+class _ConcurrencyGate:
+    # Caps the Supabase calls in flight in this worker. Calls queue for a free slot;
+    # a request whose wait would exceed DB_QUEUE_BUDGET_MS is shed with a 503 instead
+    # (fast, when the queue is already too long to drain in time). Background work
+    # (startup loads, schedulers) and calls made under `patient()` always wait.
+
+    def __init__(self):
+        self.limit = 0
+        self._slots = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.avg_seconds = 0.05  # moving average of call latency, for wait estimates
+
+    def _estimated_wait(self) -> float:
+        return (self.waiting + 1) * self.avg_seconds / self.limit
+
+    def _gauges(self):
+        metrics.db_concurrency.set(("in_flight",), self.in_flight)
+        metrics.db_concurrency.set(("queued",), self.waiting)
+
+    async def run(self, call: Callable[[], Awaitable]):
+        if self.limit != config.DB_MAX_CONCURRENCY:
+            self.limit = config.DB_MAX_CONCURRENCY
+            self._slots = asyncio.Semaphore(self.limit) if self.limit > 0 else None
+        slots = self._slots
+        if slots is None:
+            return await call()
+        ctx = metrics.current_request()
+        budget = config.DB_QUEUE_BUDGET_MS / 1000 if ctx is not None and not _patient.get() else None
+        if slots.locked():
+            route_class = ctx.scope.get("route_class", "public") if ctx is not None else "background"
+            if budget is not None and self._estimated_wait() > budget:
+                self._shed(route_class)
+            metrics.db_queued.inc((route_class,))
+            self.waiting += 1
+            self._gauges()
+            try:
+                await asyncio.wait_for(slots.acquire(), budget)
+            except asyncio.TimeoutError:
+                self._shed(route_class)
+            finally:
+                self.waiting -= 1
+        else:
+            await slots.acquire()
+        self.in_flight += 1
+        self._gauges()
+        start = time.perf_counter()
+        try:
+            return await call()
+        finally:
+            self.avg_seconds += (time.perf_counter() - start - self.avg_seconds) * 0.1
+            self.in_flight -= 1
+            slots.release()
+            self._gauges()
+
+    def _shed(self, route_class: str):
+        metrics.admission_rejected.inc((route_class, "db_overloaded"))
+        retry_after = max(1, math.ceil(self._estimated_wait()))
+        raise HTTPException(status_code=503, detail="Service overloaded, retry shortly",
+                            headers={"Retry-After": str(retry_after)})
+
+
+gate = _ConcurrencyGate()
+_patient = ContextVar("db_patient", default=False)
+
+
+@contextmanager
+def patient():
+    # Supabase calls made inside wait for a slot instead of being shed: for responses
+    # already under way (e.g. a streamed export), where a 503 can no longer be sent
+    token = _patient.set(True)
+    try:
+        yield
+    finally:
+        _patient.reset(token)
+
+
+class _Traced:
+    # Wraps a query builder so `.execute()` is timed and counted (services/metrics.py)
+    __slots__ = ("_builder", "_table")
+
+    def __init__(self, builder, table: str):
+        self._builder = builder
+        self._table = table
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if hasattr(attr, "execute"):  # builder-valued properties such as `.not_`
+            return _Traced(attr, self._table)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            return _Traced(result, self._table) if hasattr(result, "execute") else result
+        return call
+
+    async def execute(self):
+        return await gate.run(lambda: metrics.track_query(self._table, self._builder.execute()))
+
+
+class _SupabaseProxy:
+    # Routers import `supabase` at module load, but the real client only exists
+    # once the app has started. Forward everything to the current client.
+    def __getattr__(self, name):
+        if _client is None:
+            raise RuntimeError("Supabase client not initialised (app not started or credentials missing)")
+        return getattr(_client, name)
+
+    def table(self, name: str):
+        return _Traced(self.__getattr__("table")(name), name)
+
+    def rpc(self, fn: str, params: dict = None, **kwargs):
+        return _Traced(self.__getattr__("rpc")(fn, params or {}, **kwargs), f"rpc:{fn}")
+
+
+supabase = _SupabaseProxy()
+
+
+class _ReplicaProxy:
+    # Reads that can be served from the local replica (replica.py) of users, lands and
+    # investments; tables not loaded (replica off, or still starting) go to Supabase.
+    # Writes always use `supabase`.
+    def table(self, name: str):
+        if replica_store.ready(name):
+            return replica_store.table(name)
+        return supabase.table(name)
+
+
+replica_store = Replica()
+replica = _ReplicaProxy()
+
+
+def is_connected() -> bool:
+    return _client is not None
+
+
+async def connect():
+    global _client, _http
+    if _client is not None:
+        return
+    if config.DATABASE_BACKEND == "fake":
+        # In-memory tables for local runs and load tests (fake_db.py)
+        import fake_db
+        _client = fake_db.from_config(config.FAKE_DB_LATENCY_MS, config.FAKE_DB_JITTER_MS, config.FAKE_DB_SEED)
+        return
+    if not config.SUPABASE_URL or not config.SUPABASE_KEY:
+        return
+
+    # Bounded keep-alive pool shared by every request in this worker
+    _http = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=config.SUPABASE_POOL_SIZE,
+            max_keepalive_connections=config.SUPABASE_POOL_SIZE,
+        ),
+        timeout=httpx.Timeout(config.SUPABASE_TIMEOUT),
+        event_hooks={"response": [metrics.record_response_size]},
+    )
+    options = AsyncClientOptions(
+        httpx_client=_http,
+        postgrest_client_timeout=config.SUPABASE_TIMEOUT,
+    )
+    _client = await acreate_client(config.SUPABASE_URL, config.SUPABASE_KEY, options=options)
+
+
+async def disconnect():
+    global _client, _http
+    if _http is not None:
+        await _http.aclose()
+    _client = None
+    _http = None
 
-if not url or not key:
-    print("Warning: SUPABASE_URL or SUPABASE_KEY not found in environment variables.")
 
-# Initialize Supabase Client
-supabase: Client = create_client(url, key) if url and key else None
+async def fetch_all(table: str, columns: str = "*", page_size: int = 1000, **eq) -> List[dict]:
+    # Pages through a whole table (PostgREST caps rows per request); keyword args are eq() filters
+    rows: List[dict] = []
+    start = 0
+    while True:
+        query = supabase.table(table).select(columns)
+        for column, value in eq.items():
+            query = query.eq(column, value)
+        res = await query.order("id").range(start, start + page_size - 1).execute()
+        rows.extend(res.data)
+        if len(res.data) < page_size:
+            return rows
+        start += page_size
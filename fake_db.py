@@ -0,0 +1,469 @@
+import asyncio
+import json
+import random
+import re
+import uuid
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+# In-memory stand-in for the Supabase/PostgREST client, used for local runs and
+# load tests (DATABASE_BACKEND=fake). It implements the part of the query builder
+# the routers use plus the SQL functions from SUPABASE_SETUP.md, with an optional
+# injected latency per round trip.
+
+# (table, embedded table) -> foreign key column on `table`
+FOREIGN_KEYS = {
+    ("lands", "users"): "owner_id",
+    ("investments", "lands"): "land_id",
+    ("investments", "users"): "investor_id",
+    ("wallet_transactions", "users"): "user_id",
+    ("owner_statements", "users"): "owner_id",
+}
+
+# Column defaults the real schema fills in on insert
+DEFAULTS = {
+    "users": {"role": "investor", "balance": 0},
+    "lands": {"status": "available"},
+    "investments": {"status": "pending"},
+    "outbox": {"status": "pending", "attempts": 0, "last_error": None},
+}
+TIMESTAMP_COLUMN = {"investments": "transaction_date", "owner_statements": "computed_at"}
+# Tables with the updated_at trigger (SUPABASE_SETUP.md 14)
+TOUCHED = ("users", "lands", "investments")
+PRIMARY_KEYS = {"owner_statements": ("owner_id", "period")}
+# Hash indexes for eq() lookups, roughly the B-tree indexes the real schema has
+INDEXES = {
+    "users": ("email", "role"),
+    "lands": ("owner_id", "status"),
+    "investments": ("investor_id", "land_id", "status"),
+    "wallet_transactions": ("user_id",),
+    "outbox": ("status",),
+}
+
+
+class FakeResponse:
+    def __init__(self, data, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _split(columns: str) -> List[str]:
+    # Top-level comma split that keeps "users(full_name, email)" together
+    parts, depth, current = [], 0, ""
+    for ch in columns:
+        depth += ch == "("
+        depth -= ch == ")"
+        if ch == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+        else:
+            current += ch
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+@lru_cache(maxsize=256)
+def _projection(columns: str) -> tuple:
+    # "*, users(full_name, email)" -> (("*", None), ("users", "full_name, email"))
+    out = []
+    for column in _split(columns):
+        match = re.match(r"(\w+)\((.*)\)$", column, re.S)
+        out.append(match.groups() if match else (column, None))
+    return tuple(out)
+
+
+def _comparable(row_value, value):
+    # PostgREST sends every filter value as text; compare numbers as numbers
+    if isinstance(row_value, (int, float)) and not isinstance(row_value, bool):
+        try:
+            return row_value, float(value)
+        except (TypeError, ValueError):
+            pass
+    return str(row_value), str(value)
+
+
+def _compare(op: str) -> Callable:
+    def check(row_value, value):
+        if row_value is None:
+            return False
+        a, b = _comparable(row_value, value)
+        if op == "eq":
+            return a == b
+        if op == "neq":
+            return a != b
+        if op == "lt":
+            return a < b
+        if op == "lte":
+            return a <= b
+        if op == "gt":
+            return a > b
+        return a >= b
+    return check
+
+
+def _parse_or(expr: str) -> Callable[[dict], bool]:
+    # or=(col.op.value, and(col.op.value, ...)) as produced by services/pagination.py
+    checks = []
+    for part in _split(expr):
+        if part.startswith("and(") and part.endswith(")"):
+            inner = [_parse_or(p) for p in _split(part[4:-1])]
+            checks.append(lambda row, inner=inner: all(c(row) for c in inner))
+            continue
+        column, op, value = part.split(".", 2)
+        value = value[1:-1] if value.startswith('"') and value.endswith('"') else value
+        compare = _compare(op)
+        checks.append(lambda row, c=column, v=value, f=compare: f(row.get(c), v))
+    return lambda row: any(c(row) for c in checks)
+
+
+class FakeQuery:
+    def __init__(self, db: "FakeClient", table: str):
+        self._db = db
+        self._table = table
+        self._op = "select"
+        self._columns = "*"
+        self._count = None
+        self._head = False
+        self._payload = None
+        self._on_conflict = None
+        self._filters: List[Callable[[dict], bool]] = []
+        self._lookup: Optional[tuple] = None  # (column, value) answered by an index
+        self._order: List[tuple] = []
+        self._range: Optional[tuple] = None
+        self._limit: Optional[int] = None
+
+    # --- verbs ---
+    def select(self, *columns, count=None, head=False):
+        self._columns = ",".join(columns) if columns else "*"
+        self._count = count
+        self._head = head
+        return self
+
+    def insert(self, payload):
+        self._op, self._payload = "insert", payload
+        return self
+
+    def update(self, payload):
+        self._op, self._payload = "update", payload
+        return self
+
+    def upsert(self, payload, on_conflict: str = ""):
+        self._op, self._payload = "upsert", payload
+        self._on_conflict = tuple(c.strip() for c in on_conflict.split(",") if c.strip()) or None
+        return self
+
+    def delete(self):
+        self._op = "delete"
+        return self
+
+    # --- filters ---
+    def _where(self, column: str, op: str, value):
+        compare = _compare(op)
+        self._filters.append(lambda row: compare(row.get(column), value))
+        return self
+
+    def eq(self, column, value):
+        # Primary key / indexed lookups skip the table scan
+        if column == "id" or column in INDEXES.get(self._table, ()):
+            if self._lookup is None or column == "id":
+                self._lookup = (column, str(value))
+        return self._where(column, "eq", value)
+
+    def neq(self, column, value):
+        return self._where(column, "neq", value)
+
+    def gt(self, column, value):
+        return self._where(column, "gt", value)
+
+    def gte(self, column, value):
+        return self._where(column, "gte", value)
+
+    def lt(self, column, value):
+        return self._where(column, "lt", value)
+
+    def lte(self, column, value):
+        return self._where(column, "lte", value)
+
+    def in_(self, column, values):
+        allowed = {str(v) for v in values}
+        self._filters.append(lambda row: str(row.get(column)) in allowed)
+        return self
+
+    def ilike(self, column, pattern):
+        regex = re.compile("^" + re.escape(pattern).replace("%", ".*").replace("_", ".") + "$", re.I | re.S)
+        self._filters.append(lambda row: row.get(column) is not None and bool(regex.match(str(row[column]))))
+        return self
+
+    def or_(self, expr):
+        self._filters.append(_parse_or(expr))
+        return self
+
+    # --- modifiers ---
+    def order(self, column, desc=False):
+        self._order.append((column, desc))
+        return self
+
+    def range(self, start, end):
+        self._range = (start, end)
+        return self
+
+    def limit(self, size):
+        self._limit = size
+        return self
+
+    # --- execution ---
+    def _candidates(self) -> List[dict]:
+        rows = self._db.tables.setdefault(self._table, {})
+        if self._lookup is None:
+            candidates = rows.values()
+        elif self._lookup[0] == "id":
+            row = rows.get(self._lookup[1])
+            candidates = [row] if row is not None else []
+        else:
+            candidates = self._db.indexes[(self._table, self._lookup[0])].get(self._lookup[1], {}).values()
+        return [r for r in candidates if all(f(r) for f in self._filters)]
+
+    async def execute(self) -> FakeResponse:
+        await self._db.round_trip()
+        if self._op == "insert":
+            return FakeResponse([dict(self._db.insert_row(self._table, r)) for r in self._items()])
+        if self._op == "upsert":
+            return FakeResponse([dict(self._db.upsert_row(self._table, r, self._on_conflict)) for r in self._items()])
+        if self._op == "update":
+            matched = self._candidates()
+            for row in matched:
+                self._db.update_row(self._table, row, self._payload)
+            return FakeResponse([dict(r) for r in matched])
+        if self._op == "delete":
+            matched = self._candidates()
+            for row in matched:
+                self._db.delete_row(self._table, row)
+            return FakeResponse([dict(r) for r in matched])
+
+        matched = self._candidates()
+        for column, desc in reversed(self._order):
+            # NULLS LAST ascending / NULLS FIRST descending, like Postgres
+            matched.sort(key=lambda r: (r.get(column) is None, r.get(column) if r.get(column) is not None else 0),
+                         reverse=desc)
+        count = len(matched) if self._count else None
+        if self._range:
+            matched = matched[self._range[0]:self._range[1] + 1]
+        if self._limit is not None:
+            matched = matched[:self._limit]
+        if self._head:
+            return FakeResponse([], count)
+        return FakeResponse([self._db.project(self._table, r, self._columns) for r in matched], count)
+
+    def _items(self) -> List[dict]:
+        return self._payload if isinstance(self._payload, list) else [self._payload]
+
+
+class FakeRpc:
+    def __init__(self, db: "FakeClient", fn: str, params: dict):
+        self._db = db
+        self._fn = fn
+        self._params = params
+
+    async def execute(self) -> FakeResponse:
+        await self._db.round_trip()
+        handler = RPCS.get(self._fn)
+        if handler is None:
+            raise RuntimeError(f"Fake backend has no function '{self._fn}'")
+        return FakeResponse(handler(self._db, **self._params))
+
+
+class FakeClient:
+    # Tables are dicts keyed by primary key (insertion ordered, like a heap scan)
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.tables: Dict[str, Dict[object, dict]] = {}
+        # (table, column) -> value -> {primary key: row}
+        self.indexes: Dict[tuple, Dict[str, Dict[object, dict]]] = {
+            (table, column): {} for table, columns in INDEXES.items() for column in columns
+        }
+        self.round_trips = 0
+        self.outbox_seq = 0
+
+    async def round_trip(self):
+        self.round_trips += 1
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0)
+        # Always yield, so concurrent requests interleave the way they do against the network
+        await asyncio.sleep(delay)
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rpc(self, fn: str, params: Optional[dict] = None, **_) -> FakeRpc:
+        return FakeRpc(self, fn, params or {})
+
+    # --- storage ---
+    def key(self, table: str, row: dict):
+        columns = PRIMARY_KEYS.get(table)
+        if columns:
+            return tuple(str(row.get(c)) for c in columns)
+        return str(row["id"])
+
+    def insert_row(self, table: str, values: dict) -> dict:
+        row = {**DEFAULTS.get(table, {}), **values}
+        if table not in PRIMARY_KEYS:
+            row.setdefault("id", str(uuid.uuid4()))
+        row.setdefault(TIMESTAMP_COLUMN.get(table, "created_at"), _now())
+        if table in TOUCHED:
+            row["updated_at"] = _now()
+        key = self.key(table, row)
+        rows = self.tables.setdefault(table, {})
+        if key in rows:
+            self._unindex(table, rows[key])
+        rows[key] = row
+        self._index(table, row)
+        return row
+
+    def update_row(self, table: str, row: dict, values: dict):
+        self._unindex(table, row)
+        row.update(values)
+        if table in TOUCHED:
+            row["updated_at"] = _now()
+        self._index(table, row)
+
+    def delete_row(self, table: str, row: dict):
+        self._unindex(table, row)
+        self.tables[table].pop(self.key(table, row), None)
+
+    def _index(self, table: str, row: dict):
+        key = self.key(table, row)
+        for column in INDEXES.get(table, ()):
+            self.indexes[(table, column)].setdefault(str(row.get(column)), {})[key] = row
+
+    def _unindex(self, table: str, row: dict):
+        key = self.key(table, row)
+        for column in INDEXES.get(table, ()):
+            bucket = self.indexes[(table, column)].get(str(row.get(column)))
+            if bucket is not None:
+                bucket.pop(key, None)
+
+    def upsert_row(self, table: str, values: dict, on_conflict: Optional[tuple]) -> dict:
+        rows = self.tables.setdefault(table, {})
+        if on_conflict and tuple(on_conflict) != PRIMARY_KEYS.get(table, ("id",)):
+            existing = next((r for r in rows.values() if all(str(r.get(c)) == str(values.get(c)) for c in on_conflict)), None)
+        else:
+            existing = rows.get(self.key(table, values)) if ("id" in values or table in PRIMARY_KEYS) else None
+        if existing is None:
+            return self.insert_row(table, values)
+        self.update_row(table, existing, values)
+        return existing
+
+    def seed(self, data: Dict[str, List[dict]]):
+        for table, rows in data.items():
+            for row in rows:
+                self.insert_row(table, row)
+
+    def get(self, table: str, row_id) -> Optional[dict]:
+        return self.tables.get(table, {}).get(str(row_id))
+
+    def project(self, table: str, row: dict, columns: str) -> dict:
+        out = {}
+        for column, embedded in _projection(columns):
+            if embedded is not None:
+                target = self.get(column, row.get(FOREIGN_KEYS[(table, column)]))
+                out[column] = self.project(column, target, embedded) if target else None
+            elif column == "*":
+                out.update(row)
+            else:
+                out[column] = row.get(column)
+        return out
+
+
+# --- SQL functions (see SUPABASE_SETUP.md 11, 12 and 15) ---
+
+def _reserve_land(db: FakeClient, p_land_id, p_investor_id, p_amount,
+                  p_status="pending_approval", p_require_full_price=False):
+    land = db.get("lands", p_land_id)
+    if land is None:
+        return {"error": "not_found"}
+    if land["status"] != "available":
+        return {"error": "not_available", "land": dict(land)}
+    if p_require_full_price and p_amount < land["total_price"]:
+        return {"error": "amount_too_low", "land": dict(land)}
+    db.update_row("lands", land, {"status": "reserved"})
+    investment = db.insert_row("investments", {
+        "land_id": p_land_id, "investor_id": p_investor_id, "amount": p_amount, "status": p_status,
+    })
+    return {"investment": dict(investment), "land": dict(land)}
+
+
+def _wallet_apply(db: FakeClient, p_user_id, p_amount, p_kind, p_reference=None, p_effects=None):
+    user = db.get("users", p_user_id)
+    if user is None:
+        return {"error": "not_found"}
+    balance = (user.get("balance") or 0) + p_amount
+    if balance < 0:
+        return {"error": "insufficient_funds"}
+    if p_kind == "investment_payment" and p_reference is not None:
+        ledger = db.tables.get("wallet_transactions", {}).values()
+        if any(t["kind"] == p_kind and t["reference"] == p_reference for t in ledger):
+            return {"error": "duplicate"}
+    db.update_row("users", user, {"balance": balance})
+    tx = db.insert_row("wallet_transactions", {
+        "user_id": p_user_id, "amount": p_amount, "kind": p_kind,
+        "reference": p_reference, "balance_after": balance,
+    })
+    _outbox_add(db, p_effects)
+    return {"balance": balance, "transaction": dict(tx)}
+
+
+# --- Outbox (SUPABASE_SETUP.md 15) ---
+
+def _outbox_add(db: FakeClient, p_effects=None):
+    for effect in p_effects or []:
+        db.outbox_seq += 1
+        db.insert_row("outbox", {"id": db.outbox_seq, "kind": effect["kind"], "payload": effect["payload"],
+                                 "available_at": _now()})
+
+
+def _outbox_claim(db: FakeClient, p_limit, p_lease_seconds=60):
+    now = datetime.now(timezone.utc)
+    due = [r for r in db.tables.get("outbox", {}).values()
+           if r["status"] in ("pending", "processing") and r["available_at"] <= now.isoformat()]
+    due.sort(key=lambda r: r["id"])
+    lease = (now + timedelta(seconds=p_lease_seconds)).isoformat()
+    claimed = []
+    for row in due[:p_limit]:
+        db.update_row("outbox", row, {"status": "processing", "attempts": row["attempts"] + 1, "available_at": lease})
+        claimed.append(dict(row))
+    return claimed
+
+
+def _set_status(db: FakeClient, p_table, p_id, p_status, p_effects=None):
+    if p_table not in ("lands", "investments"):
+        raise RuntimeError(f"set_status: unsupported table {p_table}")
+    row = db.get(p_table, p_id)
+    if row is None:
+        return {"error": "not_found"}
+    db.update_row(p_table, row, {"status": p_status})
+    _outbox_add(db, p_effects)
+    return {"row": dict(row)}
+
+
+RPCS = {
+    "reserve_land": _reserve_land,
+    "wallet_apply": _wallet_apply,
+    "outbox_claim": _outbox_claim,
+    "set_status": _set_status,
+}
+
+
+def from_config(latency_ms: float, jitter_ms: float, seed_path: Optional[str]) -> FakeClient:
+    client = FakeClient(latency_ms, jitter_ms)
+    if seed_path:
+        # {"users": [...], "lands": [...], ...}
+        with open(seed_path, encoding="utf-8") as f:
+            client.seed(json.load(f))
+    return client
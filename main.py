@@ -1,12 +1,89 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 import os
-from routers import auth, public, land_owner, investor, payment, admin
+import time
+import asyncio
+import config
+import database
+from services.stats import stats
+from services import catalog, outbox, payouts, projections, metrics
+from services.generation import generation_store
+from services.shared import store
+from services.responses import FastJSONResponse, CompressionMiddleware
+from services.admission import AdmissionMiddleware
+from routers import auth, public, land_owner, investor, payment, admin, generation
 
 load_dotenv()
 
-app = FastAPI(title="Solar Platform API", version="1.0.0")
+class StartupTimer:
+    # Times each startup step; the report is printed and exported on /metrics
+    def __init__(self):
+        self.steps = []
+        self._start = time.perf_counter()
+
+    @asynccontextmanager
+    async def step(self, name: str):
+        start = time.perf_counter()
+        yield
+        self.steps.append((name, time.perf_counter() - start))
+
+    def report(self):
+        total = time.perf_counter() - self._start
+        for name, seconds in self.steps + [("total", total)]:
+            metrics.startup_seconds.set((name,), seconds)
+        steps = ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.steps)
+        print(f"Worker {os.getpid()} ready in {total * 1000:.0f}ms ({steps})")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Everything per-process is created here, after the worker has forked
+    timer = StartupTimer()
+    if config.SHARED_STATE:
+        async with timer.step("shared_state"):
+            store.open()
+    # Async Supabase client + pooled HTTP connections live for the app's lifetime
+    async with timer.step("database"):
+        await database.connect()
+    # Monthly generation rollups are small; raw readings stay memory-mapped on disk
+    async with timer.step("generation"):
+        generation_store.load()
+    tasks = []
+    if database.is_connected():
+        # Stats counters are rebuilt from the DB now and then on a schedule
+        tasks.append(asyncio.create_task(stats.run_reconciler()))
+        # Month-end payouts run in one worker per node
+        if store.try_lead("payouts"):
+            tasks.append(asyncio.create_task(payouts.run_scheduler()))
+        # Map and search queries are answered from in-process indexes, catalog
+        # reads from the local replica (kept current by the write hooks + a periodic sync)
+        if config.REPLICA_ENABLED:
+            database.replica_store.open()
+        async with timer.step("catalog"):
+            await catalog.load()
+        # Monte Carlo scenario curves behind /invest/projections, built once per worker
+        async with timer.step("projections"):
+            projections.model()
+        if database.replica_store.enabled:
+            tasks.append(asyncio.create_task(catalog.run_replica_sync()))
+        # Follow-up writes recorded by requests (status changes after payment, ...)
+        tasks.extend(asyncio.create_task(outbox.run_worker()) for _ in range(config.OUTBOX_WORKERS))
+    if store.enabled:
+        tasks.append(asyncio.create_task(catalog.run_sync()))
+    timer.report()
+    yield
+    for task in tasks:
+        task.cancel()
+    generation_store.flush()
+    await database.disconnect()
+    database.replica_store.close()
+    store.close()
+
+app = FastAPI(title="Solar Platform API", version="1.0.0", lifespan=lifespan,
+              default_response_class=FastJSONResponse)
 
 # CORS Setup
 origins = [
@@ -15,24 +92,30 @@ origins = [
     "https://solarfrontend.netlify.app",
 ]
 
+# Per-client rate limits (innermost, so 429s still carry CORS headers)
+app.add_middleware(AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-DB-Round-Trips", "Retry-After"],
 )
 
+# gzip (or br when the brotli package is installed) for bodies over COMPRESS_MIN_BYTES
+app.add_middleware(CompressionMiddleware)
+# Per-route latency and per-query Supabase metrics, served on /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Welcome to Solar Energy Platform API"}
 
-app.include_router(auth.router)
-app.include_router(public.router)
-app.include_router(land_owner.router)
-app.include_router(investor.router)
-app.include_router(admin.router) # New Admin Router
-app.include_router(land_owner.router)
-app.include_router(investor.router)
-app.include_router(payment.router)
-app.include_router(admin.router)
+# Prometheus text exposition
+@app.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+for router in (auth, public, land_owner, investor, payment, admin, generation):
+    app.include_router(router.router)
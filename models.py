@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field
+from typing import Dict, Optional, List
 from datetime import datetime
 from uuid import UUID
 
@@ -25,6 +25,16 @@ class UserResponse(UserBase):
     id: str
     created_at: datetime
 
+class LoginResponse(UserResponse):
+    # Signed session tokens (send as "Authorization: Bearer <access_token>")
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+    expires_in: int # seconds until the access token expires
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
 # --- Land Models ---
 class LandBase(BaseModel):
     title: str # User gives a name/title
@@ -39,6 +49,9 @@ class LandBase(BaseModel):
     owner_revenue_share_percent: float = 0.0
     description: Optional[str] = None
     image_url: Optional[str] = None
+    # Site coordinates (WGS84) used by the map endpoints
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     status: str = "available" # 'available', 'reserved', 'active', 'pending_approval'
 
 class LandCreate(LandBase):
@@ -60,6 +73,49 @@ class InvestmentResponse(InvestmentCreate):
     status: str # 'pending', 'completed', 'cancelled'
     transaction_date: datetime
 
+# --- Portfolio Models ---
+class PortfolioHolding(InvestmentResponse):
+    lands: Optional[LandResponse] = None # embedded land row
+
+class StatusSummary(BaseModel):
+    count: int
+    total_invested: float
+    capacity_kw: float
+
+class PortfolioResponse(BaseModel):
+    holdings: List[PortfolioHolding]
+    by_status: Dict[str, StatusSummary]
+    total_invested: float # active + completed investments
+    active_capacity_kw: float
+
+# --- Projection Models ---
+class ProjectionCase(BaseModel):
+    investor_revenue: float # over the horizon, net of the owner's fixed payout and revenue share
+    net_return: float # investor_revenue - total_price
+    payback_years: Optional[float] = None # None if not paid back within the horizon
+    irr: Optional[float] = None # annual, 0.12 = 12%
+
+class ExpectedProjection(ProjectionCase):
+    annual_generation_kwh: float # year 1
+    lifetime_generation_kwh: float
+    gross_revenue: float
+    owner_payout: float
+    cash_flows: List[float] # investor cash per year
+
+class LandProjection(BaseModel):
+    land_id: str
+    title: Optional[str] = None
+    status: Optional[str] = None
+    total_price: float
+    potential_capacity_kw: Optional[float] = None
+    expected: ExpectedProjection
+    scenarios: Dict[str, ProjectionCase] # 'p10' (downside), 'p50', 'p90' (upside)
+
+class ProjectionResponse(BaseModel):
+    assumptions: Dict[str, float]
+    projections: List[LandProjection]
+    not_found: List[str]
+
 # --- Stats Models ---
 class PlatformStats(BaseModel):
     total_investors: int
@@ -67,6 +123,26 @@ class PlatformStats(BaseModel):
     active_sites: int
     total_energy_generated: float # Mock value or sum
 
+# --- Generation Models ---
+class GenerationReading(BaseModel):
+    site_id: str # land id
+    timestamp: datetime # start of the 15-minute interval
+    kwh: float = Field(..., ge=0)
+
+class GenerationBatch(BaseModel):
+    readings: List[GenerationReading] = Field(..., max_length=50000)
+
 # --- Wallet Models ---
+WALLET_MAX_AMOUNT = 10_000_000  # per top-up / withdrawal
+
 class WalletTransaction(BaseModel):
-    amount: float
+    amount: float = Field(..., gt=0, le=WALLET_MAX_AMOUNT, allow_inf_nan=False)
+
+class WalletLedgerEntry(BaseModel):
+    id: str
+    user_id: str
+    amount: float # +credit / -debit
+    kind: str # 'deposit', 'withdrawal', 'investment_payment'
+    reference: Optional[str] = None
+    balance_after: float
+    created_at: datetime
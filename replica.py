@@ -0,0 +1,289 @@
+import re
+import sqlite3
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+import orjson
+
+# Local SQLite copy of the small, read-heavy catalog tables (users, lands, investments).
+# Rows are stored whole as JSON next to a few real, indexed columns; `table()` returns
+# a read-only query builder with the same surface as the Supabase one the routers use
+# (select with embeds, eq/neq/lt/.../in_/or_, order, limit, range).
+# It is filled at startup, kept current by the catalog write hooks, and caught up with
+# changes made elsewhere by an incremental sync on updated_at (services/catalog.py).
+
+SCHEMA = {
+    "users": ("id", "email", "role", "created_at", "updated_at"),
+    "lands": ("id", "status", "owner_id", "created_at", "updated_at"),
+    "investments": ("id", "status", "investor_id", "land_id", "transaction_date", "updated_at"),
+}
+INDEXES = (
+    "create index if not exists users_email on users (email)",
+    "create index if not exists users_created on users (created_at, id)",
+    "create index if not exists lands_status on lands (status, created_at, id)",
+    "create index if not exists lands_owner on lands (owner_id, created_at, id)",
+    "create index if not exists lands_created on lands (created_at, id)",
+    "create index if not exists investments_investor on investments (investor_id, transaction_date, id)",
+    "create index if not exists investments_status on investments (status, transaction_date, id)",
+    "create index if not exists investments_land on investments (land_id)",
+)
+# (table, embedded table) -> foreign key column on `table`
+FOREIGN_KEYS = {
+    ("lands", "users"): "owner_id",
+    ("investments", "lands"): "land_id",
+    ("investments", "users"): "investor_id",
+}
+# Never copied out of the primary
+PRIVATE_COLUMNS = {"users": ("password",)}
+
+OPERATORS = {"eq": "=", "neq": "!=", "lt": "<", "lte": "<=", "gt": ">", "gte": ">="}
+
+
+class ReplicaResponse:
+    def __init__(self, data):
+        self.data = data
+        self.count = None
+
+
+@lru_cache(maxsize=256)
+def parse_select(columns: str) -> tuple:
+    # "*, users(full_name, email)" -> (("*", None), ("users", ("full_name", "email")))
+    out = []
+    for embed, inner, column in re.findall(r"(\w+)\s*\(([^)]*)\)|([\w*]+)", columns):
+        if embed:
+            out.append((embed, tuple(c.strip() for c in inner.split(",") if c.strip())))
+        else:
+            out.append((column, None))
+    return tuple(out)
+
+
+def _split_or(expr: str) -> List[str]:
+    parts, depth, current = [], 0, ""
+    for ch in expr:
+        depth += ch == "("
+        depth -= ch == ")"
+        if ch == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+        else:
+            current += ch
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def _unquote(value: str) -> str:
+    return value[1:-1] if value.startswith('"') and value.endswith('"') else value
+
+
+def _project(row: dict, columns: tuple) -> dict:
+    if columns == ("*",):
+        return row
+    out = {}
+    for column in columns:
+        if column == "*":
+            out.update(row)
+        else:
+            out[column] = row.get(column)
+    return out
+
+
+class ReplicaQuery:
+    def __init__(self, replica: "Replica", table: str):
+        self._replica = replica
+        self._table = table
+        self._columns = "*"
+        self._where: List[str] = []
+        self._params: list = []
+        self._order: List[str] = []
+        self._limit: Optional[int] = None
+        self._offset = 0
+
+    def _column(self, column: str) -> str:
+        if column in SCHEMA[self._table]:
+            return column
+        if not re.fullmatch(r"\w+", column):
+            raise ValueError(f"Bad column name: {column}")
+        return f"json_extract(doc, '$.{column}')"
+
+    def select(self, *columns, **_):
+        self._columns = ",".join(columns) if columns else "*"
+        return self
+
+    def _filter(self, column: str, op: str, value):
+        self._where.append(f"{self._column(column)} {OPERATORS[op]} ?")
+        self._params.append(value)
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, "eq", value)
+
+    def neq(self, column, value):
+        return self._filter(column, "neq", value)
+
+    def lt(self, column, value):
+        return self._filter(column, "lt", value)
+
+    def lte(self, column, value):
+        return self._filter(column, "lte", value)
+
+    def gt(self, column, value):
+        return self._filter(column, "gt", value)
+
+    def gte(self, column, value):
+        return self._filter(column, "gte", value)
+
+    def in_(self, column, values):
+        values = list(values)
+        if not values:
+            self._where.append("0")
+            return self
+        self._where.append(f"{self._column(column)} in ({','.join('?' * len(values))})")
+        self._params.extend(values)
+        return self
+
+    def or_(self, expr: str):
+        # PostgREST or=(col.op.value, and(...)) as built by services/pagination.py
+        self._where.append(self._or_sql(expr, " or "))
+        return self
+
+    def _or_sql(self, expr: str, joiner: str) -> str:
+        clauses = []
+        for part in _split_or(expr):
+            if part.startswith("and(") and part.endswith(")"):
+                clauses.append(self._or_sql(part[4:-1], " and "))
+                continue
+            column, op, value = part.split(".", 2)
+            clauses.append(f"{self._column(column)} {OPERATORS[op]} ?")
+            self._params.append(_unquote(value))
+        return "(" + joiner.join(clauses) + ")"
+
+    def order(self, column, desc=False):
+        self._order.append(f"{self._column(column)} {'desc' if desc else 'asc'}")
+        return self
+
+    def limit(self, size):
+        self._limit = size
+        return self
+
+    def range(self, start, end):
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    async def execute(self) -> ReplicaResponse:
+        # Local and sub-millisecond for indexed reads: runs inline on the event loop
+        return ReplicaResponse(self.fetch())
+
+    def fetch(self) -> List[dict]:
+        sql = f"select doc from {self._table}"
+        if self._where:
+            sql += " where " + " and ".join(self._where)
+        if self._order:
+            sql += " order by " + ", ".join(self._order)
+        sql += f" limit {int(self._limit) if self._limit is not None else -1} offset {int(self._offset)}"
+        rows = [orjson.loads(doc) for (doc,) in self._replica.db.execute(sql, self._params)]
+
+        plain = tuple(c for c, embedded in parse_select(self._columns) if embedded is None)
+        out = [_project(row, plain) for row in rows] if plain else [{} for _ in rows]
+        for target, inner in (e for e in parse_select(self._columns) if e[1] is not None):
+            key = FOREIGN_KEYS[(self._table, target)]
+            related = self._replica.get_many(target, {r.get(key) for r in rows if r.get(key)})
+            for row, item in zip(rows, out):
+                match = related.get(row.get(key))
+                item[target] = _project(match, inner) if match is not None else None
+        return out
+
+
+class Replica:
+    def __init__(self):
+        self.db: Optional[sqlite3.Connection] = None
+        self.loaded = set()  # tables filled by load(); others fall through to the primary
+
+    @property
+    def enabled(self) -> bool:
+        return self.db is not None
+
+    def open(self, path: str = ":memory:"):
+        if self.db is not None:
+            return
+        self.db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.db.execute("pragma journal_mode=wal" if path != ":memory:" else "pragma journal_mode=memory")
+        self.db.execute("pragma synchronous=off")
+        for table, columns in SCHEMA.items():
+            self.db.execute(f"create table if not exists {table} (id text primary key, "
+                            f"{', '.join(c + ' text' for c in columns[1:])}, doc blob not null)")
+        for statement in INDEXES:
+            self.db.execute(statement)
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+        self.db = None
+        self.loaded.clear()
+
+    def ready(self, table: str) -> bool:
+        return table in self.loaded
+
+    def table(self, name: str) -> ReplicaQuery:
+        return ReplicaQuery(self, name)
+
+    def _clean(self, table: str, row: dict) -> dict:
+        private = PRIVATE_COLUMNS.get(table)
+        if private:
+            row = {k: v for k, v in row.items() if k not in private}
+        return row
+
+    def _write(self, table: str, rows: List[dict]):
+        columns = SCHEMA[table]
+        sql = (f"insert or replace into {table} ({', '.join(columns)}, doc) "
+               f"values ({', '.join('?' * (len(columns) + 1))})")
+        self.db.executemany(sql, [
+            tuple(None if row.get(c) is None else str(row[c]) for c in columns) + (orjson.dumps(row),)
+            for row in rows
+        ])
+
+    def load(self, table: str, rows: Iterable[dict]):
+        # Full copy at startup
+        self.db.execute("begin")
+        try:
+            self.db.execute(f"delete from {table}")
+            self._write(table, [self._clean(table, r) for r in rows])
+            self.db.execute("commit")
+        except Exception:
+            self.db.execute("rollback")
+            raise
+        self.loaded.add(table)
+
+    def get_many(self, table: str, ids: Iterable[str]) -> Dict[str, dict]:
+        ids = [str(i) for i in ids]
+        if not ids:
+            return {}
+        found = {}
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            for row_id, doc in self.db.execute(
+                    f"select id, doc from {table} where id in ({','.join('?' * len(chunk))})", chunk):
+                found[row_id] = orjson.loads(doc)
+        return found
+
+    def upsert(self, table: str, rows: List[dict]) -> List[dict]:
+        # Merges (possibly partial) rows into the stored ones; returns the rows that
+        # actually changed, merged
+        if not self.ready(table):
+            return []
+        rows = [self._clean(table, r) for r in rows if r.get("id")]
+        current = self.get_many(table, {r["id"] for r in rows})
+        changed = []
+        for row in rows:
+            previous = current.get(str(row["id"]))
+            merged = {**previous, **row} if previous else row
+            if merged != previous:
+                current[str(row["id"])] = merged
+                changed.append(merged)
+        if changed:
+            self._write(table, changed)
+        return changed
+
+    def watermark(self, table: str) -> Optional[str]:
+        # Latest primary-side change seen, where incremental sync resumes
+        return self.db.execute(f"select max(updated_at) from {table}").fetchone()[0]
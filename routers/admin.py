@@ -1,9 +1,16 @@
-from fastapi import APIRouter, HTTPException, Header, Depends
-from typing import List, Optional
-from database import supabase
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Dict, List, Optional, Tuple
+from database import supabase, replica
+from models import LandResponse, InvestmentResponse
+from services.pagination import PageParams, is_uuid
+from services.stats import stats
+from services import catalog, exports, outbox, payouts
+from services.sessions import require_admin
+from pydantic import BaseModel, Field
+from datetime import datetime
 
-router = APIRouter(prefix="/admin", tags=["Admin"])
+# Every admin route requires the admin role (token claim, no users query)
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin)])
 
 # --- Models ---
 class AdminStatResponse(BaseModel):
@@ -17,85 +24,161 @@ class AdminAction(BaseModel):
     action: str # 'approve', 'reject'
     notes: Optional[str] = None
 
+class BulkAction(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=1000)
+    action: str # 'approve', 'reject'
+
+class BulkResult(BaseModel):
+    action: str
+    updated: List[str]
+    skipped: List[str] # exist, but not in the status the action applies to
+    not_found: List[str]
+    results: Dict[str, str] # id -> 'updated' | 'skipped' | 'not_found'
+
+class OutboxEvent(BaseModel):
+    id: int
+    kind: str
+    payload: dict
+    status: str # 'pending', 'processing', 'failed'
+    attempts: int
+    last_error: Optional[str] = None
+    available_at: str
+    created_at: str
+
+# Bulk action -> (status it applies to, new status)
+LAND_ACTIONS = {"approve": ("pending_approval", "available"), "reject": ("pending_approval", "rejected")}
+INVESTMENT_ACTIONS = {"approve": ("pending_approval", "payment_pending")}
+
 # --- Helpers ---
-def verify_admin(user_id: str):
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Unauthorized")
-    
-    res = supabase.table('users').select("role").eq("id", user_id).execute()
-    if not res.data or res.data[0]['role'] != 'admin':
-        raise HTTPException(status_code=403, detail="Admin Access Only")
-    return True
+async def bulk_update(table: str, body: BulkAction, actions: Dict[str, Tuple[str, str]]) -> Tuple[List[dict], dict]:
+    if body.action not in actions:
+        raise HTTPException(status_code=400, detail=f"Unknown action '{body.action}', expected one of: {', '.join(actions)}")
+    ids = list(dict.fromkeys(body.ids))
+    # Malformed ids can't exist (and would make Postgres reject the whole uuid IN list)
+    valid = [i for i in ids if is_uuid(i)]
+    source, target = actions[body.action]
+    rows = []
+    updated, existing = set(), set()
+    if valid:
+        # One set-based update for the whole batch; the status guard keeps a retried or
+        # stale request from moving rows that were already moderated
+        res = await supabase.table(table).update({"status": target}).in_("id", valid).eq("status", source).execute()
+        rows = res.data
+        updated = {str(row["id"]) for row in rows}
+        rest = [i for i in valid if i not in updated]
+        if rest:
+            res = await supabase.table(table).select("id").in_("id", rest).execute()
+            existing = {str(row["id"]) for row in res.data}
+    results = {i: "updated" if i in updated else "skipped" if i in existing else "not_found" for i in ids}
+    return rows, {
+        "action": body.action,
+        "updated": [i for i in ids if results[i] == "updated"],
+        "skipped": [i for i in ids if results[i] == "skipped"],
+        "not_found": [i for i in ids if results[i] == "not_found"],
+        "results": results,
+    }
 
 # --- Endpoints ---
 
 @router.get("/stats", response_model=AdminStatResponse)
-def get_admin_stats(user_id: str = Header(None, alias="X-User-ID")):
-    verify_admin(user_id)
-    
-    # 1. Users
-    users = supabase.table("users").select("id", count='exact').execute()
+async def get_admin_stats():
     
-    # 2. Lands
-    active_lands = supabase.table("lands").select("id", count='exact').eq("status", "active").execute()
-    pending_lands = supabase.table("lands").select("id", count='exact').eq("status", "pending_approval").execute() # pending verification
-    
-    # 3. Investments (Volume)
-    investments = supabase.table("investments").select("*").execute()
-    total_vol = sum(i['amount'] for i in investments.data if i['status'] in ['active', 'completed'])
-    pending_inv = len([i for i in investments.data if i['status'] == 'pending_approval'])
-
-    return {
-        "total_users": users.count or 0,
-        "active_lands": active_lands.count or 0,
-        "pending_lands": pending_lands.count or 0,
-        "pending_investments": pending_inv,
-        "total_volume": total_vol
-    }
+    # Counters/volume are maintained in memory by the write paths
+    return stats.admin()
 
 # --- Land Management ---
 
 @router.get("/lands/pending")
-def get_pending_lands(user_id: str = Header(None, alias="X-User-ID")):
-    verify_admin(user_id)
+async def get_pending_lands(page: PageParams = Depends()):
     # Fetch lands that need approval
-    res = supabase.table("lands").select("*, users(full_name, email)").eq("status", "pending_approval").execute()
-    return res.data
+    query = replica.table("lands").select(page.select(LandResponse, embed="users(full_name, email)")).eq("status", "pending_approval")
+    res = await page.apply(query).execute()
+    return page.response(res.data)
 
 @router.post("/lands/{land_id}/approve")
-def approve_land(land_id: str, user_id: str = Header(None, alias="X-User-ID")):
-    verify_admin(user_id)
+async def approve_land(land_id: str):
     
     # Update Status to 'open' (Available for investors)
-    res = supabase.table("lands").update({"status": "available"}).eq("id", land_id).execute()
+    res = await supabase.table("lands").update({"status": "available"}).eq("id", land_id).execute()
     if not res.data:
         raise HTTPException(status_code=404, detail="Land not found")
+    catalog.lands_changed(res.data)
     return {"message": "Land Approved and is now Open for Investment"}
 
 @router.post("/lands/{land_id}/reject")
-def reject_land(land_id: str, user_id: str = Header(None, alias="X-User-ID")):
-    verify_admin(user_id)
-    res = supabase.table("lands").update({"status": "rejected"}).eq("id", land_id).execute()
+async def reject_land(land_id: str):
+    res = await supabase.table("lands").update({"status": "rejected"}).eq("id", land_id).execute()
+    catalog.lands_changed(res.data)
     return {"message": "Land Rejected"}
 
+@router.post("/lands/bulk", response_model=BulkResult)
+async def bulk_moderate_lands(body: BulkAction):
+    # Approve/reject many lands: admin verified once, one UPDATE ... WHERE id IN (...)
+    rows, result = await bulk_update("lands", body, LAND_ACTIONS)
+    catalog.lands_changed(rows)
+    return result
+
 # --- Investment Management ---
 
 @router.get("/investments/pending")
-def get_pending_investments(user_id: str = Header(None, alias="X-User-ID")):
-    verify_admin(user_id)
+async def get_pending_investments(page: PageParams = Depends()):
     # Fetch investments waiting for approval (status: pending_approval)
-    res = supabase.table("investments").select("*, lands(location, area_sqft), users(full_name, email)").eq("status", "pending_approval").execute()
-    return res.data
+    query = replica.table("investments").select(page.select(InvestmentResponse, "transaction_date", embed="lands(location, area_sqft), users(full_name, email)")).eq("status", "pending_approval")
+    res = await page.apply(query).execute()
+    return page.response(res.data)
 
 @router.post("/investments/{inv_id}/approve")
-def approve_investment(inv_id: str, user_id: str = Header(None, alias="X-User-ID")):
-    verify_admin(user_id)
+async def approve_investment(inv_id: str):
     
     # 1. Update Investment Status -> 'payment_pending'
     # This unlocks the "Pay Now" button for the investor
-    res = supabase.table("investments").update({"status": "payment_pending"}).eq("id", inv_id).execute()
+    res = await supabase.table("investments").update({"status": "payment_pending"}).eq("id", inv_id).execute()
     
     if not res.data:
          raise HTTPException(status_code=404, detail="Investment not found")
+    catalog.investments_changed(res.data)
          
     return {"message": "Investment Approved. Status set to Payment Due."}
+
+@router.post("/investments/bulk", response_model=BulkResult)
+async def bulk_moderate_investments(body: BulkAction):
+    rows, result = await bulk_update("investments", body, INVESTMENT_ACTIONS)
+    catalog.investments_changed(rows)
+    return result
+
+# --- Payouts ---
+
+@router.post("/payouts/run")
+async def run_payouts(period: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$")):
+    # Recompute + persist every owner's statement for a month (defaults to last month)
+    return await payouts.run(period)
+
+# --- Outbox ---
+
+@router.get("/outbox")
+async def list_outbox_events(status: str = Query("failed", pattern="^(pending|processing|failed)$"),
+                             page: PageParams = Depends()):
+    # Follow-up writes still queued, or parked after OUTBOX_MAX_ATTEMPTS (with their last error)
+    query = supabase.table("outbox").select(page.select(OutboxEvent)).eq("status", status)
+    res = await page.apply(query).execute()
+    return page.response(res.data)
+
+@router.post("/outbox/{event_id}/retry")
+async def retry_outbox_event(event_id: int):
+    # Back in the queue with a fresh attempt budget; handlers are idempotent
+    event = await outbox.retry(str(event_id))
+    if event is None:
+        raise HTTPException(status_code=404, detail="No failed outbox event with this id")
+    return {"message": "Outbox event queued for retry", "id": event["id"]}
+
+# --- Exports ---
+
+@router.get("/export/{name}")
+async def export_table(name: str, format: str = Query("csv", pattern="^(csv|parquet)$"),
+                       from_: Optional[datetime] = Query(None, alias="from"),
+                       to: Optional[datetime] = Query(None)):
+    # lands | investments | payouts, oldest first, streamed page by page;
+    # from/to filter on created_at / transaction_date / period, [from, to)
+    if name not in exports.EXPORTS:
+        raise HTTPException(status_code=404, detail=f"Unknown export '{name}', expected one of: {', '.join(exports.EXPORTS)}")
+    return exports.stream(name, format, from_, to)
@@ -1,67 +1,89 @@
 from fastapi import APIRouter, HTTPException, Depends, Header
-from models import UserCreate, UserResponse, UserLogin
-from database import supabase
+from models import UserCreate, UserResponse, UserLogin, LoginResponse, RefreshRequest
+from database import supabase, replica, replica_store
+from services import catalog, sessions
+from services.sessions import Principal, authenticate
 from typing import Optional
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
-# Mock session store for MVP (In producton use Redis or JWT)
-# For this MVP, we will just return the User ID and User Object.
-# The frontend can store user_id in localStorage.
+# Login issues signed session tokens (services/sessions.py) carrying the user id and
+# role, so other routes authenticate without looking the user up.
+# Send them as "Authorization: Bearer <access_token>"; X-User-ID still works while
+# AUTH_LEGACY_HEADER is on.
+
+# Columns returned to the client (never the password hash)
+USER_COLUMNS = ",".join(["id", "created_at", *(f for f in UserResponse.model_fields if f not in ("id", "created_at"))])
 
 @router.post("/register", response_model=UserResponse)
-def register(user: UserCreate):
-    existing = supabase.table("users").select("*").eq("email", user.email).execute()
+async def register(user: UserCreate):
+    existing = await supabase.table("users").select("id").eq("email", user.email).execute()
     if existing.data:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    # In a real app, hash password here.
-    # We will store password for 'login' check (Simulated)
-    # Note: Modify 'users' table to have 'password' column or ignore for demo if just using email.
-    # Assuming user schema doesn't strict check extra fields yet, or we just rely on email for MVP demo uniqueness.
-    
-    response = supabase.table("users").insert({
+    response = await supabase.table("users").insert({
         "email": user.email,
         "full_name": user.full_name,
         "phone": user.phone,
         "role": user.role,
-        "password": user.password 
+        "password": await sessions.hash_password(user.password)
     }).execute()
 
     if not response.data:
         raise HTTPException(status_code=500, detail="Failed to create user")
     
+    catalog.user_added(response.data[0])
     return response.data[0]
 
-@router.post("/login", response_model=UserResponse)
-def login(creds: UserLogin):
-    # MVP: Check email. (password check skipped if DB doesn't have it, or matching if it does)
-    response = supabase.table("users").select("*").eq("email", creds.email).execute()
+@router.post("/login", response_model=LoginResponse)
+async def login(creds: UserLogin):
+    response = await supabase.table("users").select("*").eq("email", creds.email).execute()
     
     if not response.data:
         raise HTTPException(status_code=404, detail="User not found")
     
     user = response.data[0]
     
-    # Password Verification
-    # In production, use bcrypt.verify(creds.password, user['password'])
-    if user.get('password') != creds.password:
+    # Password Verification (PBKDF2 off the event loop)
+    if not await sessions.check_password(creds.password, user.get("password")):
          raise HTTPException(status_code=401, detail="Invalid Password")
-    
-    return user
+
+    # Upgrade legacy plaintext rows / old hash cost on the way in
+    if sessions.needs_rehash(user["password"]):
+        await supabase.table("users").update({"password": await sessions.hash_password(creds.password)}).eq("id", user["id"]).execute()
+
+    return {**user, **sessions.issue_pair(user["id"], user["role"])}
+
+@router.post("/refresh")
+async def refresh(body: RefreshRequest):
+    # New token pair for a valid refresh token; the old refresh token is revoked (rotation).
+    # The user is looked up again, so a deleted user or a changed role takes effect here
+    claims = sessions.verify(body.refresh_token, kind="refresh")
+    response = await replica.table("users").select("id, role").eq("id", claims["sub"]).execute()
+    if not response.data and replica_store.ready("users"):
+        # Not replicated yet (e.g. just registered through another worker)
+        response = await supabase.table("users").select("id, role").eq("id", claims["sub"]).execute()
+    sessions.revocations.revoke(claims["jti"], claims["exp"])
+    if not response.data:
+        raise HTTPException(status_code=401, detail="User no longer exists")
+    # Tokens from before auth_time was recorded count from their own issue time
+    return sessions.issue_pair(claims["sub"], response.data[0]["role"], claims.get("auth_time") or claims["iat"])
 
 @router.get("/me", response_model=UserResponse)
-def get_me(user_id: str = Header(None, alias="X-User-ID")):
-    # For MVP, we pass User ID in header "X-User-ID" as a simple auth mechanism
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Missing User ID header")
-        
-    response = supabase.table("users").select("*").eq("id", user_id).execute()
+async def get_me(principal: Principal = Depends(authenticate)):
+    response = await supabase.table("users").select(USER_COLUMNS).eq("id", principal.id).execute()
     if not response.data:
         raise HTTPException(status_code=404, detail="User not found")
         
     return response.data[0]
 
 @router.post("/logout")
-def logout():
+async def logout(body: Optional[RefreshRequest] = None, authorization: Optional[str] = Header(None)):
+    # Revokes the presented access token (and the refresh token, if sent)
+    if authorization and authorization.lower().startswith("bearer "):
+        claims = sessions.verify(authorization[7:].strip())
+        sessions.revocations.revoke(claims["jti"], claims["exp"])
+    if body is not None:
+        claims = sessions.verify(body.refresh_token, kind="refresh")
+        sessions.revocations.revoke(claims["jti"], claims["exp"])
     return {"message": "Logged out successfully"}
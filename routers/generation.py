@@ -0,0 +1,56 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from database import supabase, replica, replica_store
+from models import GenerationBatch
+from services.generation import generation_store
+from services.pagination import is_uuid
+from typing import List, Optional
+
+router = APIRouter(prefix="/generation", tags=["Generation"])
+
+# --- Helpers ---
+async def _check_sites(site_ids: List[str]):
+    # Sites are lands: readings for anything else would create data directories for it
+    valid = [i for i in site_ids if is_uuid(i)]
+    known = set()
+    if valid:
+        res = await replica.table("lands").select("id").in_("id", valid).execute()
+        known = {str(r["id"]) for r in res.data}
+        missing = [i for i in valid if i not in known]
+        if missing and replica_store.ready("lands"):
+            # Not replicated yet (e.g. just created through another worker)
+            res = await supabase.table("lands").select("id").in_("id", missing).execute()
+            known.update(str(r["id"]) for r in res.data)
+    unknown = [i for i in site_ids if i not in known]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown site ids: {', '.join(unknown[:20])}")
+
+# POST /generation/readings
+@router.post("/readings")
+async def ingest_readings(batch: GenerationBatch):
+    # Batched 15-minute meter readings; rollups are updated on write
+    await _check_sites(list(dict.fromkeys(r.site_id for r in batch.readings)))
+    # File lock, memmap writes and flushes block: keep them off the event loop
+    readings = [(r.site_id, r.timestamp, r.kwh) for r in batch.readings]
+    count = await run_in_threadpool(generation_store.ingest, readings)
+    return {"ingested": count}
+
+# GET /generation/sites/{site_id}?resolution=daily&month=YYYY-MM
+@router.get("/sites/{site_id}")
+async def get_site_generation(
+    site_id: str,
+    resolution: str = Query("daily", pattern="^(hourly|daily|monthly)$"),
+    month: Optional[str] = Query(None, pattern=r"^\d{4}-(0[1-9]|1[0-2])$"),
+):
+    return {
+        "site_id": site_id,
+        "resolution": resolution,
+        "total_kwh": generation_store.site_total(site_id),
+        # Waits for a running ingest (same lock): off the event loop
+        "series": await run_in_threadpool(generation_store.series, site_id, resolution, month),
+    }
+
+# GET /generation/platform
+@router.get("/platform")
+async def get_platform_generation():
+    return {"total_kwh": round(generation_store.platform_total, 3)}
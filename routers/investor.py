@@ -1,129 +1,187 @@
-from fastapi import APIRouter, HTTPException, Header, Query
-from models import LandResponse, InvestmentCreate, InvestmentResponse, LandBase, WalletTransaction
-from database import supabase
+from fastapi import APIRouter, HTTPException, Header, Query, Depends, Request
+from fastapi.responses import StreamingResponse
+from services.responses import FastJSONResponse
+from models import LandResponse, InvestmentCreate, InvestmentResponse, LandBase, WalletTransaction, WalletLedgerEntry, PortfolioResponse, ProjectionResponse
+from database import supabase, replica
+from services import catalog, outbox, portfolio, projections, reservations, wallet
+from services.pagination import PageParams
+from services.search import search_index
+from services.cache import cached_page, etag_response
+from services.notifications import broker
+from services.sessions import current_user_id, verify
 from typing import List, Optional
+import config
 
 router = APIRouter(prefix="/invest", tags=["Investor"])
 
 # 18. GET /invest/wallet
 @router.get("/wallet")
-def get_wallet_balance(user_id: str = Header(..., alias="X-User-ID")):
-    # Fetch user balance
-    response = supabase.table("users").select("balance").eq("id", user_id).execute()
+async def get_wallet_balance(user_id: str = Depends(current_user_id)):
+    # Materialized balance, maintained by the wallet ledger
+    response = await supabase.table("users").select("balance").eq("id", user_id).execute()
     if not response.data:
         raise HTTPException(status_code=404, detail="User wallet not found")
     return {"balance": response.data[0]['balance']}
 
+# GET /invest/wallet/transactions
+@router.get("/wallet/transactions", response_model=List[WalletLedgerEntry])
+async def get_wallet_transactions(user_id: str = Depends(current_user_id), page: PageParams = Depends()):
+    query = supabase.table("wallet_transactions").select(page.select(WalletLedgerEntry)).eq("user_id", user_id)
+    response = await page.apply(query).execute()
+    return page.response(response.data)
+
 # 19. POST /invest/wallet/add
 @router.post("/wallet/add")
-def add_funds(transaction: WalletTransaction, user_id: str = Header(..., alias="X-User-ID")):
-    # 1. Get current balance
-    user_res = supabase.table("users").select("Balance").eq("id", user_id).execute()
-    if not user_res.data:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    current_balance = user_res.data[0]['Balance'] or 0.0
-    new_balance = int(current_balance + transaction.amount)
-    
-    # 2. Update balance
-    supabase.table("users").update({"Balance": new_balance}).eq("id", user_id).execute()
-    return {"message": "Funds added successfully", "balance": new_balance}
+async def add_funds(transaction: WalletTransaction, user_id: str = Depends(current_user_id)):
+    # Atomic increment + ledger entry
+    result = await wallet.apply(user_id, transaction.amount, "deposit")
+    return {"message": "Funds added successfully", "balance": result["balance"]}
 
 # 20. POST /invest/wallet/withdraw
 @router.post("/wallet/withdraw")
-def withdraw_funds(transaction: WalletTransaction, user_id: str = Header(..., alias="X-User-ID")):
-    # 1. Get current balance
-    user_res = supabase.table("users").select("Balance").eq("id", user_id).execute()
-    if not user_res.data:
-        raise HTTPException(status_code=404, detail="User not found")
-        
-    current_balance = user_res.data[0]['Balance'] or 0.0
-    
-    if current_balance < transaction.amount:
-         raise HTTPException(status_code=400, detail="Insufficient funds")
-
-    new_balance = int(current_balance - transaction.amount)
-    
-    # 2. Update balance
-    supabase.table("users").update({"Balance": new_balance}).eq("id", user_id).execute()
-    return {"message": "Funds withdrawn successfully", "balance": new_balance}
+async def withdraw_funds(transaction: WalletTransaction, user_id: str = Depends(current_user_id)):
+    # Atomic decrement (only if balance >= amount) + ledger entry
+    result = await wallet.apply(user_id, -transaction.amount, "withdrawal")
+    return {"message": "Funds withdrawn successfully", "balance": result["balance"]}
 
 
 # 12. GET /invest/available-lands?location=
 @router.get("/available-lands", response_model=List[LandResponse])
-def search_lands(location: Optional[str] = Query(None)):
-    query = supabase.table("lands").select("*").eq("status", "available")
-    if location:
-        # Simple text match (ilike if supported via library or just exact match for MVP)
-        # supabase-py might allow .ilike('location', f'%{location}%')
-        query = query.ilike("location", f"%{location}%")
-    
-    response = query.execute()
-    return response.data
+async def search_lands(
+    request: Request,
+    location: Optional[str] = Query(None, description="Fuzzy match on location only"),
+    q: Optional[str] = Query(None, description="Fuzzy match on location, title, type and description"),
+    land_type: Optional[str] = Query(None),
+    min_area: Optional[float] = Query(None), max_area: Optional[float] = Query(None),
+    min_price: Optional[float] = Query(None), max_price: Optional[float] = Query(None),
+    min_capacity: Optional[float] = Query(None), max_capacity: Optional[float] = Query(None),
+    page: PageParams = Depends(),
+):
+    ranges = {
+        column: (low, high)
+        for column, low, high in (
+            ("area_sqft", min_area, max_area),
+            ("total_price", min_price, max_price),
+            ("potential_capacity_kw", min_capacity, max_capacity),
+        )
+        if low is not None or high is not None
+    }
+    if not (location or q or land_type or ranges):
+        # Plain browsing -> paginated DB listing (cached per page)
+        async def build():
+            query = replica.table("lands").select(page.select(LandResponse)).eq("status", "available")
+            response = await page.apply(query).execute()
+            return page.response(response.data)
+        return await cached_page(request, build)
+
+    # Search/filter -> ranked answer from the in-memory trigram index, paged by offset
+    offset = page.offset()
+    rows = search_index.search(
+        text=" ".join(t for t in (q, location) if t),
+        fields=("location",) if location and not q else ("location", "title", "land_type", "description"),
+        ranges=ranges,
+        land_type=land_type,
+        limit=offset + page.limit + 1,
+    )
+    return page.offset_response(rows[offset:], LandResponse)
+
+# GET /invest/available-lands/autocomplete?prefix=
+@router.get("/available-lands/autocomplete", response_model=List[str])
+async def autocomplete_lands(prefix: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=50)):
+    return search_index.suggest(prefix, limit)
 
 # 13. GET /invest/land/:id
 @router.get("/land/{land_id}", response_model=LandResponse)
-def get_land_details(land_id: str):
-    response = supabase.table("lands").select("*").eq("id", land_id).execute()
-    if not response.data:
-        raise HTTPException(status_code=404, detail="Land not found")
-    return response.data[0]
+async def get_land_details(land_id: str, request: Request):
+    return etag_response(request, await catalog.get_land(land_id))
+
+# GET /invest/projections?land_ids=a,b
+@router.get("/projections", response_model=ProjectionResponse)
+async def get_projections(land_ids: Optional[str] = Query(None, description="Comma separated land ids; default: every available land")):
+    # Expected + p10/p50/p90 investor returns per land, cached until the land changes
+    ids = None
+    if land_ids is not None:
+        ids = [i.strip() for i in land_ids.split(",") if i.strip()]
+        if not 1 <= len(ids) <= 1000:
+            raise HTTPException(status_code=400, detail="land_ids takes 1 to 1000 ids")
+    # Trusted computed values: serialized directly, no response-model pass
+    return FastJSONResponse(content=await projections.get(ids))
 
 # 14. POST /invest/request (Reserve Land)
 @router.post("/request", response_model=InvestmentResponse)
-def request_land(investment: InvestmentCreate):
-    # 1. Check Availability
-    land = supabase.table("lands").select("status").eq("id", investment.land_id).execute()
-    if not land.data or land.data[0]['status'] != 'available':
-        raise HTTPException(status_code=400, detail="Land not available")
-
-    # 2. Check User Balance (Optional but recommended)
+async def request_land(investment: InvestmentCreate):
+    # Check User Balance (Optional but recommended)
     # user = supabase.table("users").select("Balance").eq("id", investment.investor_id).execute()
     # if not user.data or user.data[0]['Balance'] < investment.amount:
     #     raise HTTPException(status_code=400, detail="Insufficient Wallet Balance")
 
-    # 3. Reserve (Update Land Status)
-    # This removes it from the 'available' marketplace view
-    supabase.table("lands").update({"status": "reserved"}).eq("id", investment.land_id).execute()
-
-    # 4. Create Investment Record
-    data = {
-        "land_id": investment.land_id,
-        "investor_id": investment.investor_id,
-        "amount": investment.amount,
-        "status": "pending_approval" # Admin approval needed to go Active
-    }
-    response = supabase.table("investments").insert(data).execute()
-    
-    return response.data[0]
+    # Reserve the land (only if still 'available') + create the investment record
+    # in a single DB call; this removes it from the 'available' marketplace view.
+    # Admin approval is needed to go Active.
+    return await reservations.reserve(
+        investment.land_id, investment.investor_id, investment.amount, status="pending_approval"
+    )
 
 # 15. GET /invest/my-requests
 @router.get("/my-requests", response_model=List[InvestmentResponse])
-def get_my_requests(user_id: str = Header(..., alias="X-User-ID")):
+async def get_my_requests(user_id: str = Depends(current_user_id), page: PageParams = Depends()):
     # Pending investments
-    response = supabase.table("investments").select("*").eq("investor_id", user_id).neq("status", "completed").execute()
-    return response.data
+    query = replica.table("investments").select(page.select(InvestmentResponse, "transaction_date")).eq("investor_id", user_id).neq("status", "completed")
+    response = await page.apply(query).execute()
+    return page.response(response.data)
 
 # 16. GET /invest/my-investments
 @router.get("/my-investments", response_model=List[InvestmentResponse])
-def get_my_investments(user_id: str = Header(..., alias="X-User-ID")):
+async def get_my_investments(user_id: str = Depends(current_user_id), page: PageParams = Depends()):
     # Return ALL investments (pending, active, etc.) so user can see status
-    response = supabase.table("investments").select("*").eq("investor_id", user_id).execute()
-    return response.data
+    query = replica.table("investments").select(page.select(InvestmentResponse, "transaction_date")).eq("investor_id", user_id)
+    response = await page.apply(query).execute()
+    return page.response(response.data)
+
+# GET /invest/portfolio
+@router.get("/portfolio", response_model=PortfolioResponse)
+async def get_portfolio(request: Request, user_id: str = Depends(current_user_id)):
+    # Investments with their lands embedded + per-status totals, in one query (cached)
+    return etag_response(request, await portfolio.get(user_id))
 
 # 17. GET /invest/notifications
 @router.get("/notifications")
-def get_notifications(user_id: str = Header(..., alias="X-User-ID")):
-    # Mock notifications
-    return [
-        {"id": 1, "message": "Welcome to the platform!"},
-        {"id": 2, "message": "Check available lands now."}
-    ]
+async def get_notifications(user_id: str = Depends(current_user_id), after: int = Query(0, ge=0)):
+    # Recent events for this user (same backlog the live stream replays)
+    return broker.backlog(user_id, after)
+
+# GET /invest/notifications/stream (Server-Sent Events)
+# EventSource can't send custom headers, so the token may also come as ?access_token=
+# (or the legacy ?user_id= while AUTH_LEGACY_HEADER is on)
+@router.get("/notifications/stream")
+async def stream_notifications(
+    authorization: Optional[str] = Header(None),
+    access_token: Optional[str] = Query(None),
+    user_id: Optional[str] = Header(None, alias="X-User-ID"),
+    user_id_param: Optional[str] = Query(None, alias="user_id"),
+    last_event_id: int = Header(0, alias="Last-Event-ID"),
+):
+    if authorization and authorization.lower().startswith("bearer "):
+        access_token = authorization[7:].strip()
+    if access_token:
+        uid = verify(access_token)["sub"]
+    elif config.AUTH_LEGACY_HEADER:
+        uid = user_id or user_id_param
+    else:
+        uid = None
+    if not uid:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return StreamingResponse(
+        broker.stream(uid, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # 21. POST /invest/pay-now/:investment_id
 @router.post("/pay-now/{investment_id}")
-def pay_now(investment_id: str, user_id: str = Header(..., alias="X-User-ID")):
+async def pay_now(investment_id: str, user_id: str = Depends(current_user_id)):
     # 1. Get Investment
-    inv_res = supabase.table("investments").select("*").eq("id", investment_id).eq("investor_id", user_id).execute()
+    inv_res = await supabase.table("investments").select("*").eq("id", investment_id).eq("investor_id", user_id).execute()
     if not inv_res.data:
         raise HTTPException(status_code=404, detail="Investment not found")
     
@@ -134,22 +192,21 @@ def pay_now(investment_id: str, user_id: str = Header(..., alias="X-User-ID")):
     if investment['status'] != 'payment_pending':
         raise HTTPException(status_code=400, detail=f"Cannot pay for investment with status: {investment['status']}")
 
-    # 2. Get User Balance
-    user_res = supabase.table("users").select("Balance").eq("id", user_id).execute()
-    current_balance = user_res.data[0]['Balance'] or 0.0
-    
-    if current_balance < investment['amount']:
-        raise HTTPException(status_code=400, detail="Insufficient Wallet Balance")
-
-    # 3. Process Payment (Deduct Balance)
-    new_balance = int(current_balance - investment['amount'])
-    supabase.table("users").update({"Balance": new_balance}).eq("id", user_id).execute()
+    # 2. Process Payment (atomic conditional debit; an investment can only be paid once)
+    try:
+        result = await wallet.apply(user_id, -investment['amount'], "investment_payment", reference=investment_id,
+                                    effects=[outbox.set_status("investments", investment_id, "active"),
+                                             outbox.set_status("lands", investment['land_id'], "active")])
+    except HTTPException as e:
+        if e.status_code == 400:
+            raise HTTPException(status_code=400, detail="Insufficient Wallet Balance")
+        raise
+    new_balance = result["balance"]
     
-    # 4. Update Investment Status -> 'active'
+    # 3. Update Investment Status -> 'active'
     # Using 'active' to signify it generates returns
-    supabase.table("investments").update({"status": "active"}).eq("id", investment_id).execute()
-    
-    # 5. Update Land Status -> 'active'
-    supabase.table("lands").update({"status": "active"}).eq("id", investment['land_id']).execute()
+    # 4. Update Land Status -> 'active'
+    # Both are recorded with the debit above and applied by the outbox workers
+    outbox.notify()
     
     return {"message": "Payment Successful! Investment Active.", "balance": new_balance}
@@ -1,37 +1,40 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends, Request
 from models import LandCreate, LandResponse
 from database import supabase
+from services import catalog
+from services.pagination import PageParams
+from services.cache import cached_page, etag_response
 from typing import List, Optional
 
 router = APIRouter(prefix="/lands", tags=["Lands"])
 
 @router.get("/", response_model=List[LandResponse])
-def get_lands(status: Optional[str] = None):
-    query = supabase.table("lands").select("*")
-    if status:
-        query = query.eq("status", status)
-    
-    response = query.execute()
-    return response.data
+async def get_lands(request: Request, status: Optional[str] = None, page: PageParams = Depends()):
+    async def build():
+        query = supabase.table("lands").select(page.select(LandResponse))
+        if status:
+            query = query.eq("status", status)
+        
+        response = await page.apply(query).execute()
+        return page.response(response.data)
+    return await cached_page(request, build)
 
 @router.post("/", response_model=LandResponse)
-def create_land(land: LandCreate):
+async def create_land(land: LandCreate):
     # Verify owner exists
-    owner = supabase.table("users").select("id").eq("id", land.owner_id).execute()
+    owner = await supabase.table("users").select("id").eq("id", land.owner_id).execute()
     if not owner.data:
         raise HTTPException(status_code=404, detail="Owner not found")
 
     data = land.dict()
-    response = supabase.table("lands").insert(data).execute()
+    response = await supabase.table("lands").insert(data).execute()
     
     if not response.data:
         raise HTTPException(status_code=500, detail="Failed to create land")
         
+    catalog.lands_changed(response.data)
     return response.data[0]
 
 @router.get("/{land_id}", response_model=LandResponse)
-def get_land(land_id: str):
-    response = supabase.table("lands").select("*").eq("id", land_id).execute()
-    if not response.data:
-        raise HTTPException(status_code=404, detail="Land not found")
-    return response.data[0]
+async def get_land(land_id: str, request: Request):
+    return etag_response(request, await catalog.get_land(land_id))
@@ -1,13 +1,17 @@
-from fastapi import APIRouter, HTTPException, Header
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from models import LandCreate, LandResponse
-from database import supabase
-from typing import List
+from database import supabase, replica
+from services import catalog, land_import, payouts
+from services.pagination import PageParams
+from services.geo import geo_index, parse_bbox
+from services.sessions import current_user_id
+from typing import List, Optional
 
 router = APIRouter(prefix="/land", tags=["Land Owner"])
 
 # 8. POST /land/submit
 @router.post("/submit", response_model=LandResponse)
-def submit_land(land: LandCreate):
+async def submit_land(land: LandCreate):
     # Default status could be 'pending_approval' if admin needs to check first
     # For MVP user flow, let's assume it goes to 'available' or 'pending'
     # User asked for Admin Approval flow later (Endpoint 22), so let's default to 'pending_approval'
@@ -17,9 +21,7 @@ def submit_land(land: LandCreate):
     data['status'] = 'pending_approval' 
     
     try:
-        print(f"DEBUG: Submitting Land Data: {data}")
-        response = supabase.table("lands").insert(data).execute()
-        print(f"DEBUG: Supabase Response: {response}")
+        response = await supabase.table("lands").insert(data).execute()
     except Exception as e:
         print(f"CRITICAL ERROR: {str(e)}")
         # Check if it has 'details'
@@ -29,30 +31,54 @@ def submit_land(land: LandCreate):
 
     if not response.data:
         raise HTTPException(status_code=500, detail="Failed to submit land - No Data Returned")
+    catalog.lands_changed(response.data)
     return response.data[0]
 
+# POST /land/submit/bulk
+# Streaming CSV (text/csv, header row) or NDJSON (application/x-ndjson) import for onboarding partners
+@router.post("/submit/bulk")
+async def submit_lands_bulk(
+    request: Request,
+    format: Optional[str] = Query(None, description="csv | ndjson (defaults to the Content-Type)"),
+    batch_size: Optional[int] = Query(None, ge=1, le=5000),
+):
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+
+    lines = land_import.iter_lines(request.stream())
+    records = land_import.iter_csv(lines) if fmt == "csv" else land_import.iter_ndjson(lines)
+    return await land_import.import_lands(records, batch_size)
+
 # 9. GET /land/my-lands
 @router.get("/my-lands", response_model=List[LandResponse])
-def get_my_lands(user_id: str = Header(..., alias="X-User-ID")):
-    response = supabase.table("lands").select("*").eq("owner_id", user_id).execute()
-    return response.data
+async def get_my_lands(user_id: str = Depends(current_user_id), page: PageParams = Depends()):
+    query = replica.table("lands").select(page.select(LandResponse)).eq("owner_id", user_id)
+    response = await page.apply(query).execute()
+    return page.response(response.data)
 
-# 10. GET /land/my-earnings
+# 10. GET /land/my-earnings?period=YYYY-MM
 @router.get("/my-earnings")
-def get_my_earnings(user_id: str = Header(..., alias="X-User-ID")):
-    # Mock calculation based on active lands
-    lands = supabase.table("lands").select("*").eq("owner_id", user_id).eq("status", "active").execute().data
-    
-    # Formula: Base rent + Share
-    total_earnings = 0
-    for l in lands:
-        total_earnings += 5000 # Fixed base
-    
-    return {"total_earnings": total_earnings, "breakdown": "Fixed Rent + 10% Share"}
+async def get_my_earnings(
+    user_id: str = Depends(current_user_id),
+    period: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$", description="Defaults to the current month"),
+):
+    # Fixed payout + revenue share per active land, from the precomputed statement
+    return await payouts.get_statement(user_id, period)
 
 # 11. GET /land/map
 @router.get("/map", response_model=List[LandResponse])
-def get_owner_map(user_id: str = Header(..., alias="X-User-ID")):
+async def get_owner_map(
+    user_id: str = Depends(current_user_id),
+    bbox: Optional[str] = Query(None, description="min_lon,min_lat,max_lon,max_lat"),
+):
     # Show user's lands on map (active ones usually)
-    response = supabase.table("lands").select("*").eq("owner_id", user_id).execute()
+    if bbox:
+        return geo_index.query(parse_bbox(bbox), owner_id=user_id)
+    response = await replica.table("lands").select("*").eq("owner_id", user_id).execute()
     return response.data
+
+# GET /land/map/tiles/{z}/{x}/{y}
+@router.get("/map/tiles/{z}/{x}/{y}")
+async def get_owner_map_tile(z: int, x: int, y: int, user_id: str = Depends(current_user_id)):
+    return geo_index.tile(z, x, y, owner_id=user_id)
@@ -1,22 +1,25 @@
 from fastapi import APIRouter, HTTPException
-from database import supabase
+from database import supabase, replica, replica_store
+from services import outbox
 
 router = APIRouter(prefix="/payment", tags=["Payment"])
 
 # 18. POST /payment/mark-paid
 @router.post("/mark-paid")
-def mark_payment_paid(investment_id: str):
+async def mark_payment_paid(investment_id: str):
     # Admin confirming backend payment manually
     # ideally guarded by Admin Check
     
     # 1. Update Investment
-    inv_res = supabase.table("investments").update({"status": "completed"}).eq("id", investment_id).execute()
+    # 2. Update Land to Active (recorded with 1. and applied by the outbox workers)
+    inv_res = await replica.table("investments").select("land_id").eq("id", investment_id).execute()
+    if not inv_res.data and replica_store.ready("investments"):
+        # Not replicated yet (e.g. just created through another worker)
+        inv_res = await supabase.table("investments").select("land_id").eq("id", investment_id).execute()
     if not inv_res.data:
         raise HTTPException(status_code=404, detail="Investment not found")
-        
-    investment = inv_res.data[0]
     
-    # 2. Update Land to Active
-    supabase.table("lands").update({"status": "active"}).eq("id", investment['land_id']).execute()
+    await outbox.update_status("investments", investment_id, "completed",
+                               [outbox.set_status("lands", inv_res.data[0]['land_id'], "active")])
     
     return {"message": "Payment confirmed, Land is now Active"}
@@ -1,45 +1,55 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Query, Request
+from services.responses import json_rows
 from models import LandResponse, PlatformStats
-from database import supabase
-from typing import List
+from database import replica
+from services.stats import stats
+from services.pagination import PageParams
+from services.geo import geo_index, parse_bbox
+from services.cache import cached_page
+from services.generation import generation_store
+from typing import List, Optional
 
 router = APIRouter(tags=["Public"])
 
+def with_generation(rows: List[dict]) -> List[dict]:
+    # Lifetime kWh per site from the generation rollups
+    return [{**r, "energy_generated_kwh": generation_store.site_total(r["id"])} for r in rows]
+
 # 5. GET /map/solar-sites
 @router.get("/map/solar-sites", response_model=List[LandResponse])
-def get_active_sites():
+async def get_active_sites(
+    request: Request,
+    bbox: Optional[str] = Query(None, description="min_lon,min_lat,max_lon,max_lat"),
+    page: PageParams = Depends(),
+):
     # 'active' means installed/sold
-    response = supabase.table("lands").select("*").eq("status", "active").execute()
-    return response.data
+    if bbox:
+        # Only the sites visible in the viewport, straight from the spatial index
+        return json_rows(with_generation(geo_index.query(parse_bbox(bbox), status="active")))
+
+    async def build():
+        query = replica.table("lands").select(page.select(LandResponse)).eq("status", "active")
+        response = await page.apply(query).execute()
+        return page.response(with_generation(response.data))
+    return await cached_page(request, build)
+
+# GET /map/solar-sites/tiles/{z}/{x}/{y}
+# Sites inside one map tile; clustered server-side at low zoom levels
+@router.get("/map/solar-sites/tiles/{z}/{x}/{y}")
+async def get_active_sites_tile(z: int, x: int, y: int):
+    return geo_index.tile(z, x, y, status="active")
 
 # 6. GET /stats/platform
 @router.get("/stats/platform", response_model=PlatformStats)
-def get_platform_stats():
-    # Count users
-    users_res = supabase.table("users").select("role", count="exact").execute()
-    # This is a bit manual in Supabase-py without direct count queries sometimes, 
-    # but let's try fetching all or using robust counting if available.
-    # For MVP with low data, fetching * is fine.
-    
-    all_users = supabase.table("users").select("role").execute().data
-    all_lands = supabase.table("lands").select("status").execute().data
-    
-    investors = len([u for u in all_users if u['role'] == 'investor'])
-    owners = len([u for u in all_users if u['role'] == 'land_owner'])
-    active_sites = len([l for l in all_lands if l['status'] == 'active'])
-    
-    # Mocking energy for now as we don't have generation data table yet
-    total_energy = active_sites * 1250.5 # Random multiplier
-    
-    return {
-        "total_investors": investors,
-        "total_land_owners": owners,
-        "active_sites": active_sites,
-        "total_energy_generated": total_energy
-    }
+async def get_platform_stats():
+    # Served from the in-memory stats engine (kept current by the write paths)
+    return stats.platform()
 
 # 7. GET /lands/available
 @router.get("/lands/available", response_model=List[LandResponse])
-def get_available_lands():
-    response = supabase.table("lands").select("*").eq("status", "available").execute()
-    return response.data
+async def get_available_lands(request: Request, page: PageParams = Depends()):
+    async def build():
+        query = replica.table("lands").select(page.select(LandResponse)).eq("status", "available")
+        response = await page.apply(query).execute()
+        return page.response(response.data)
+    return await cached_page(request, build)
@@ -0,0 +1,43 @@
+# Production entry point: several uvicorn workers on one node sharing one cache.
+#
+#   python serve.py --workers 4 --port 8000
+#
+# With more than one worker SHARED_STATE is turned on, so the workers share an
+# L2 cache, replay each other's writes and elect one worker for the schedulers
+# (services/shared.py). Each worker reports its startup timings when it is ready.
+
+import argparse
+import os
+import shutil
+import uvicorn
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=None, help="defaults to WORKERS (CPU count)")
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=int, default=None)
+    args = parser.parse_args()
+
+    import config
+    from services.shared import default_dir
+
+    workers = args.workers or config.WORKERS
+    if workers > 1:
+        # Workers are separate processes and read their settings from the environment
+        os.environ["SHARED_STATE"] = "true"
+        # Start from an empty shared cache/feed; nothing in it outlives a deployment
+        shutil.rmtree(config.SHARED_STATE_DIR or default_dir(), ignore_errors=True)
+
+    uvicorn.run(
+        "main:app",
+        host=args.host or config.HOST,
+        port=args.port or config.PORT,
+        workers=workers,
+        proxy_headers=True,
+        log_level="info",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Tuple
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from services import metrics, sessions
+from services.responses import FastJSONResponse
+import config
+
+# Token-bucket rate limits per client and route class, in front of the routers.
+# The client is the token's user (or the legacy X-User-ID), else the remote address.
+# The cap on Supabase calls in flight lives with the client (database.py).
+
+# Path prefix (whole segments: "/land" is not "/lands") -> route class;
+# land-owner routes share the signed-in user limits
+ROUTE_CLASSES = (("/admin", "admin"), ("/invest", "investor"), ("/land", "investor"),
+                 ("/payment", "investor"), ("/auth/me", "investor"))
+EXEMPT_PATHS = {"/", "/metrics", "/docs", "/redoc", "/openapi.json"}
+
+
+def route_class(path: str) -> str:
+    for prefix, name in ROUTE_CLASSES:
+        if path == prefix or path.startswith(prefix + "/"):
+            return name
+    return "public"
+
+
+def _rate(name: str) -> float:
+    return {"public": config.RATE_LIMIT_PUBLIC, "investor": config.RATE_LIMIT_INVESTOR,
+            "admin": config.RATE_LIMIT_ADMIN}[name]
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, capacity: float):
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, rate: float, capacity: float) -> float:
+        # 0 when a token was taken, else seconds until one is available
+        now = time.monotonic()
+        self.tokens = min(capacity, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / rate
+
+
+class RateLimiter:
+    def __init__(self, max_clients: int = None):
+        self.max_clients = max_clients or config.RATE_LIMIT_MAX_CLIENTS
+        # LRU: a bucket evicted for being idle would have refilled anyway
+        self._buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def check(self, name: str, client: str) -> float:
+        rate = _rate(name)
+        if rate <= 0:
+            return 0.0
+        capacity = max(1.0, rate * config.RATE_LIMIT_BURST_SECONDS)
+        key = (name, client)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(capacity)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket.take(rate, capacity)
+
+
+limiter = RateLimiter()
+
+
+def client_key(scope) -> str:
+    headers = Headers(scope=scope)
+    authorization = headers.get("authorization")
+    if authorization and authorization.lower().startswith("bearer "):
+        try:
+            return "user:" + sessions.verify(authorization[7:].strip())["sub"]
+        except HTTPException:
+            pass  # rejected by the route itself; counted against the address meanwhile
+    user_id = headers.get("x-user-id")
+    if user_id and config.AUTH_LEGACY_HEADER:
+        return "user:" + user_id
+    client = scope.get("client")
+    return "addr:" + (client[0] if client else "unknown")
+
+
+class AdmissionMiddleware:
+    # 429 + Retry-After once a client's bucket for the route class is empty
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            return await self.app(scope, receive, send)
+        name = scope["route_class"] = route_class(scope["path"])
+        if config.RATE_LIMIT_ENABLED and scope["method"] != "OPTIONS":
+            wait = limiter.check(name, client_key(scope))
+            if wait > 0:
+                metrics.admission_rejected.inc((name, "rate_limited"))
+                response = FastJSONResponse({"detail": "Too many requests"}, status_code=429,
+                                            headers={"Retry-After": str(max(1, math.ceil(wait)))})
+                return await response(scope, receive, send)
+        return await self.app(scope, receive, send)
@@ -0,0 +1,202 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+import config
+from services.shared import store
+from services.metrics import cached_reads
+
+
+class TTLCache:
+    # Bounded LRU with a per-entry time-to-live. Entries are also dropped
+    # explicitly by the write paths (see services/catalog.py).
+    # With a `shared` namespace the cache is the L1 in front of the node-wide
+    # store (services/shared.py): misses fall through to it, writes and
+    # invalidations go to both, and invalidations from other workers are seen
+    # through the namespace generation.
+
+    def __init__(self, maxsize: int = None, ttl: float = None, shared: Optional[str] = None):
+        self.maxsize = maxsize or config.CACHE_MAX_ENTRIES
+        self.ttl = ttl or config.CACHE_TTL_SECONDS
+        self.shared = shared
+        self._data: "OrderedDict[Hashable, Tuple[float, int, object]]" = OrderedDict()
+        self._invalidations = 0  # this worker's invalidate()/clear() calls
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def generation(self) -> Tuple[int, int]:
+        # Take this before building a value and pass it to set(), so a value built
+        # from data that was invalidated in the meantime (by this worker, or by
+        # another one through the shared namespace) is not stored
+        return self._invalidations, self._shared_generation()
+
+    def _shared_generation(self) -> int:
+        return store.generation(self.shared) if self.shared else 0
+
+    def get(self, key: Hashable):
+        generation = self._shared_generation()
+        entry = self._data.get(key)
+        if entry is not None and entry[0] >= time.monotonic() and entry[1] == generation:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+        if entry is not None:
+            del self._data[key]
+        if self.shared:
+            value = store.get(self.shared, key)
+            if value is not None:
+                self._put(key, value, generation)
+                self.hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    def set(self, key: Hashable, value, generation: Optional[Tuple[int, int]] = None):
+        current = self.generation()
+        if generation is not None and generation != current:
+            return
+        self._put(key, value, current[1])
+        if self.shared:
+            store.set(self.shared, key, value, self.ttl)
+
+    def _put(self, key: Hashable, value, generation: int):
+        self._data[key] = (time.monotonic() + self.ttl, generation, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        self._invalidations += 1
+        self._data.pop(key, None)
+        if self.shared:
+            store.delete(self.shared, key)
+
+    def clear(self):
+        self._invalidations += 1
+        self._data.clear()
+        if self.shared:
+            store.clear(self.shared)
+
+
+# Single land rows (serialized) keyed by land id, and whole listing pages keyed by URL
+land_cache = TTLCache(shared="lands")
+page_cache = TTLCache(shared="pages")
+
+
+class CachedBody:
+    __slots__ = ("body", "etag", "headers")
+
+    def __init__(self, body: bytes, headers: Optional[dict] = None):
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        self.headers = headers or {}
+
+
+def etag_response(request: Request, cached: CachedBody) -> Response:
+    headers = {**cached.headers, "ETag": cached.etag}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        # Weak comparison: the compression middleware hands out W/ versions of the tag
+        tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+        if "*" in tags or cached.etag in tags:
+            return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+class SingleFlight:
+    # Concurrent calls with the same key share one in-flight call and its result.
+    # The call runs as its own task, so a caller that disconnects doesn't cancel it
+    # for the others.
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self):
+        return len(self._inflight)
+
+    def start(self, key: Hashable, fn: Callable[[], Awaitable]) -> Tuple[asyncio.Task, bool]:
+        task = self._inflight.get(key)
+        if task is not None:
+            return task, True
+        task = asyncio.get_running_loop().create_task(fn())
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._forget(key, t))
+        return task, False
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled() and task.exception() is not None:
+            task.exception()  # retrieved here; awaiting callers still get it raised
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]) -> Tuple[object, bool]:
+        # -> (result, whether it came from another caller's call)
+        task, shared = self.start(key, fn)
+        return await asyncio.shield(task), shared
+
+
+page_flights = SingleFlight()
+# Last body built per page, kept after it expires or is invalidated: served for
+# CACHE_STALE_SECONDS (from the first stale read) while a single refresh runs
+stale_pages: "OrderedDict[Hashable, list]" = OrderedDict()  # key -> [CachedBody, stale_until or None]
+
+
+async def _fill_page(key: Hashable, build: Callable[[], Awaitable[Response]]):
+    generation = page_cache.generation()
+    response = await build()
+    if response.status_code != 200:
+        return response
+    keep = {k: v for k, v in response.headers.items() if k.lower() == "x-next-cursor"}
+    if isinstance(response, StreamingResponse):
+        body = b"".join([chunk async for chunk in response.body_iterator])
+    else:
+        body = response.body
+    cached = CachedBody(body, keep)
+    page_cache.set(key, cached, generation)
+    if config.CACHE_STALE_SECONDS > 0:
+        stale_pages[key] = [cached, None]
+        stale_pages.move_to_end(key)
+        while len(stale_pages) > page_cache.maxsize:
+            stale_pages.popitem(last=False)
+    return cached
+
+
+async def cached_page(request: Request, build: Callable[[], Awaitable[Response]]) -> Response:
+    # Read-through cache for a whole listing response, keyed by path + query string.
+    # Identical concurrent misses share one query (single flight); just after an
+    # invalidation the previous body is served while that query runs.
+    key = (request.url.path, tuple(sorted(request.query_params.multi_items())))
+    route = getattr(request.scope.get("route"), "path", request.url.path)
+    cached = page_cache.get(key)
+    if cached is not None:
+        cached_reads.inc((route, "hit"))
+        return etag_response(request, cached)
+
+    stale = stale_pages.get(key)
+    if stale is not None:
+        now = time.monotonic()
+        if stale[1] is None:
+            stale[1] = now + config.CACHE_STALE_SECONDS
+        if now < stale[1]:
+            page_flights.start(key, lambda: _fill_page(key, build))
+            cached_reads.inc((route, "stale"))
+            return etag_response(request, stale[0])
+
+    result, shared = await page_flights.do(key, lambda: _fill_page(key, build))
+    cached_reads.inc((route, "coalesced" if shared else "miss"))
+    if isinstance(result, Response):
+        return result
+    return etag_response(request, result)
+
+
+def invalidate_lands(land_ids):
+    for land_id in land_ids:
+        land_cache.invalidate(land_id)
+    # Any listing page may contain (or now exclude) the changed lands
+    page_cache.clear()
@@ -0,0 +1,179 @@
+import asyncio
+from typing import List
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from database import supabase, replica, replica_store, fetch_all
+from services.stats import stats
+from services.geo import geo_index
+from services.search import search_index
+from services.cache import CachedBody, land_cache, invalidate_lands
+from services.responses import dumps
+from services import payouts, portfolio, projections, notifications, sessions
+from services.generation import generation_store
+from services.shared import store
+import config
+
+# Single place the routers report writes to lands/investments, so every
+# in-memory view of the catalog (stats, spatial index, search, caches, ...) stays current.
+# With several workers the same changes are published to the node's change feed
+# (services/shared.py) and replayed by the other workers' run_sync().
+
+
+# Tables copied into the local read replica (replica.py), in sync order
+REPLICATED = ("users", "lands", "investments")
+
+
+async def _fetch_users() -> List[dict]:
+    users = await fetch_all("users")
+    for user in users:
+        user.pop("password", None)
+    return users
+
+
+async def load() -> int:
+    # One pass over the lands table at startup feeds every index
+    # (workers booting together share a single pass)
+    lands = await store.load_once("lands", lambda: fetch_all("lands"), ttl=config.SHARED_SNAPSHOT_SECONDS)
+    geo_index.load(lands)
+    search_index.load(lands)
+    if replica_store.enabled:
+        replica_store.load("lands", lands)
+        users = await store.load_once("users", _fetch_users, ttl=config.SHARED_SNAPSHOT_SECONDS)
+        replica_store.load("users", users)
+        investments = await store.load_once("investments", lambda: fetch_all("investments"),
+                                            ttl=config.SHARED_SNAPSHOT_SECONDS)
+        replica_store.load("investments", investments)
+    return len(lands)
+
+
+async def get_land(land_id: str) -> CachedBody:
+    # Read-through: serialized land row from the LRU cache, DB on a miss
+    cached = land_cache.get(land_id)
+    if cached is None:
+        generation = land_cache.generation()
+        response = await replica.table("lands").select("*").eq("id", land_id).execute()
+        if not response.data and replica_store.ready("lands"):
+            # Not replicated yet (e.g. just created through another worker)
+            response = await supabase.table("lands").select("*").eq("id", land_id).execute()
+        if not response.data:
+            raise HTTPException(status_code=404, detail="Land not found")
+        cached = CachedBody(dumps(response.data[0]))
+        land_cache.set(land_id, cached, generation)
+    return cached
+
+
+def lands_changed(rows: List[dict]):
+    rows = rows or []
+    _apply_lands(rows)
+    # Caches are shared across workers, so they are invalidated once, here
+    invalidate_lands(r["id"] for r in rows if r.get("id"))
+    for owner_id in {r["owner_id"] for r in rows if r.get("owner_id")}:
+        payouts.invalidate_owner(owner_id)
+    portfolio.lands_changed(rows)
+    store.publish("lands", rows)
+
+
+def investments_changed(rows: List[dict]):
+    rows = rows or []
+    _apply_investments(rows)
+    portfolio.invalidate({r["investor_id"] for r in rows if r.get("investor_id")})
+    store.publish("investments", rows)
+
+
+def user_added(row: dict):
+    row = {k: v for k, v in row.items() if k != "password"}
+    stats.user_added(row["role"])
+    replica_store.upsert("users", [row])
+    store.publish("user", row)
+
+
+def _apply_lands(rows: List[dict]):
+    # Previous statuses (as known to the stats engine) tell real transitions from re-reads
+    for row in rows:
+        notifications.land_changed(row, stats.land_status(row.get("id")))
+    stats.record_lands(rows)
+    geo_index.upsert(rows)
+    search_index.upsert(rows)
+    replica_store.upsert("lands", rows)
+    projections.invalidate(r["id"] for r in rows if r.get("id"))
+
+
+def _apply_investments(rows: List[dict]):
+    for row in rows:
+        notifications.investment_changed(row, stats.investment_status(row.get("id")))
+    stats.record_investments(rows)
+    replica_store.upsert("investments", rows)
+
+
+def apply_remote(kind: str, payload):
+    if kind == "lands":
+        _apply_lands(payload)
+    elif kind == "investments":
+        _apply_investments(payload)
+    elif kind == "user":
+        stats.user_added(payload["role"])
+        replica_store.upsert("users", [payload])
+    elif kind == "users":
+        replica_store.upsert("users", payload)
+    elif kind == "revoke":
+        sessions.revocations.revoke(payload["jti"], payload["exp"], publish=False)
+
+
+async def run_sync():
+    # Replays the other workers' writes into this worker's indexes, stats and notifications
+    last_prune = 0.0
+    while True:
+        try:
+            for kind, payload in store.poll():
+                if kind == "generation":
+                    # Takes the generation store's lock, which an ingest may hold: off the event loop
+                    await run_in_threadpool(generation_store.apply_monthly, payload)
+                else:
+                    apply_remote(kind, payload)
+            last_prune += config.SHARED_SYNC_SECONDS
+            if last_prune >= 60:
+                store.prune(older_than=max(600, config.SHARED_SNAPSHOT_SECONDS * 2))
+                last_prune = 0.0
+        except Exception as e:
+            print(f"Shared state sync failed: {e}")
+        await asyncio.sleep(config.SHARED_SYNC_SECONDS)
+
+
+async def _changed_since(table: str, since: str) -> List[dict]:
+    rows: List[dict] = []
+    while True:
+        res = await (supabase.table(table).select("*").gte("updated_at", since)
+                     .order("updated_at").order("id").range(len(rows), len(rows) + 999).execute())
+        rows.extend(res.data)
+        if len(res.data) < 1000:
+            return rows
+
+
+async def sync_replica():
+    # Pulls rows changed on the primary since the replica's newest updated_at (changes
+    # made outside this app, or missed) and feeds the real changes through the hooks
+    for table in REPLICATED:
+        if not replica_store.ready(table):
+            continue
+        since = replica_store.watermark(table) or "1970-01-01T00:00:00+00:00"
+        changed = replica_store.upsert(table, await _changed_since(table, since))
+        if not changed:
+            continue
+        if table == "lands":
+            lands_changed(changed)
+        elif table == "investments":
+            investments_changed(changed)
+        else:
+            store.publish("users", changed)
+
+
+async def run_replica_sync():
+    while True:
+        await asyncio.sleep(config.REPLICA_SYNC_SECONDS)
+        # One worker per node pulls; the others get the changes from the feed
+        if not store.try_lead("replica-sync"):
+            continue
+        try:
+            await sync_replica()
+        except Exception as e:
+            print(f"Replica sync failed: {e}")
@@ -0,0 +1,239 @@
+import csv
+import io
+import re
+from datetime import datetime
+from typing import AsyncIterator, List, NamedTuple, Optional, Tuple
+import orjson
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from database import supabase, patient
+from services.pagination import sort_value, row_id
+import config
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only needed for format=parquet
+    pa = pq = None
+
+# Admin exports for finance: the table is read from Supabase in keyset pages of
+# EXPORT_PAGE_ROWS (with the land/user columns embedded, as in the admin queues),
+# and each page is encoded and sent before the next one is fetched, so memory stays
+# flat whatever the row count. CSV is written page by page; Parquet gets one row
+# group per EXPORT_ROW_GROUP_ROWS.
+
+# Column kinds: str, float, ts (timestamptz), json (serialized to a string)
+Columns = Tuple[Tuple[str, str], ...]
+
+
+class Export(NamedTuple):
+    table: str
+    columns: Columns
+    embeds: Tuple[Tuple[str, str, Columns], ...]  # (table, output prefix, columns)
+    sort_key: str  # keyset order is (sort_key, tie_key) ascending
+    tie_key: str
+    date_column: str  # from= / to= filter
+    period: bool = False  # date_column holds 'YYYY-MM'
+
+
+OWNER = (("users", "owner_", (("full_name", "str"), ("email", "str"))),)
+
+EXPORTS = {
+    "lands": Export(
+        table="lands",
+        columns=(("id", "str"), ("title", "str"), ("location", "str"), ("land_type", "str"),
+                 ("ownership_info", "str"), ("area_sqft", "float"), ("total_price", "float"),
+                 ("potential_capacity_kw", "float"), ("owner_fixed_payout", "float"),
+                 ("owner_revenue_share_percent", "float"), ("latitude", "float"), ("longitude", "float"),
+                 ("status", "str"), ("owner_id", "str"), ("created_at", "ts")),
+        embeds=OWNER,
+        sort_key="created_at", tie_key="id", date_column="created_at",
+    ),
+    "investments": Export(
+        table="investments",
+        columns=(("id", "str"), ("land_id", "str"), ("investor_id", "str"), ("amount", "float"),
+                 ("status", "str"), ("transaction_date", "ts")),
+        embeds=(("lands", "land_", (("title", "str"), ("location", "str"), ("area_sqft", "float"))),
+                ("users", "investor_", (("full_name", "str"), ("email", "str")))),
+        sort_key="transaction_date", tie_key="id", date_column="transaction_date",
+    ),
+    "payouts": Export(
+        table="owner_statements",
+        columns=(("owner_id", "str"), ("period", "str"), ("total_earnings", "float"), ("fixed_total", "float"),
+                 ("revenue_share_total", "float"), ("breakdown", "json"), ("computed_at", "ts")),
+        embeds=OWNER,
+        sort_key="period", tie_key="owner_id", date_column="period", period=True,
+    ),
+}
+
+EXPORT_ERROR_MARKER = "#EXPORT-ERROR"
+PERIOD = re.compile(r"\d{4}-\d{2}")
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "parquet": "application/vnd.apache.parquet"}
+
+
+def _select(spec: Export) -> str:
+    columns = [c for c, _ in spec.columns]
+    columns += [f"{table}({', '.join(c for c, _ in inner)})" for table, _, inner in spec.embeds]
+    return ", ".join(columns)
+
+
+def header(spec: Export) -> Columns:
+    return spec.columns + tuple((prefix + c, kind) for _, prefix, inner in spec.embeds for c, kind in inner)
+
+
+def flatten(spec: Export, row: dict) -> list:
+    # One output record: own columns, then the embedded ones (None when the related row is gone)
+    values = [orjson.dumps(row.get(c)).decode() if kind == "json" and row.get(c) is not None else row.get(c)
+              for c, kind in spec.columns]
+    for table, _, inner in spec.embeds:
+        related = row.get(table) or {}
+        values.extend(related.get(c) for c, _ in inner)
+    return values
+
+
+def _keyset(spec: Export, row: dict) -> Tuple[str, str]:
+    # The last row's (sort key, tie key) goes into the next page's or=(...) filter:
+    # check its shape as for the pagination cursors
+    value = row[spec.sort_key]
+    if spec.period:
+        if not isinstance(value, str) or not PERIOD.fullmatch(value):
+            raise ValueError(f"invalid period {value!r}")
+    else:
+        value = sort_value(value)
+    return value, row_id(row[spec.tie_key])
+
+
+async def pages(spec: Export, start: Optional[str], end: Optional[str]) -> AsyncIterator[List[dict]]:
+    # Keyset pagination, so page N costs the same as page 1 (no OFFSET scans)
+    select = _select(spec)
+    key, tie = spec.sort_key, spec.tie_key
+    last = None
+    while True:
+        query = supabase.table(spec.table).select(select)
+        if start:
+            query = query.gte(spec.date_column, start)
+        if end:
+            query = query.lt(spec.date_column, end)
+        if last is not None:
+            query = query.or_(f'{key}.gt."{last[0]}",and({key}.eq."{last[0]}",{tie}.gt."{last[1]}")')
+        with patient():
+            # The 200 is already sent: queue for a DB slot rather than be shed mid-stream
+            res = await query.order(key).order(tie).limit(config.EXPORT_PAGE_ROWS).execute()
+        if res.data:
+            yield res.data
+        if len(res.data) < config.EXPORT_PAGE_ROWS:
+            return
+        last = _keyset(spec, res.data[-1])
+
+
+async def _csv(spec: Export, start: Optional[str], end: Optional[str]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in header(spec)])
+    async for rows in pages(spec, start, end):
+        writer.writerows(flatten(spec, row) for row in rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class _Sink:
+    # Write-only file for ParquetWriter; drain() hands over what was written so far
+    closed = False
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+ARROW_TYPES = {"str": "string", "json": "string", "float": "float64"}
+
+
+def _arrow_schema(spec: Export):
+    return pa.schema([(name, pa.timestamp("us", tz="UTC") if kind == "ts" else pa.type_for_alias(ARROW_TYPES[kind]))
+                      for name, kind in header(spec)])
+
+
+def _row_group(schema, records: List[list]):
+    arrays = []
+    for index, field in enumerate(schema):
+        values = [r[index] for r in records]
+        if pa.types.is_timestamp(field.type):
+            values = [datetime.fromisoformat(v) if isinstance(v, str) else v for v in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+async def _parquet(spec: Export, start: Optional[str], end: Optional[str]) -> AsyncIterator[bytes]:
+    schema = _arrow_schema(spec)
+    sink = _Sink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    records: List[list] = []
+
+    def write(batch: List[list]):
+        writer.write_table(_row_group(schema, batch))
+
+    async for rows in pages(spec, start, end):
+        records.extend(flatten(spec, row) for row in rows)
+        if len(records) >= config.EXPORT_ROW_GROUP_ROWS:
+            # Encoding + compression is CPU work: keep it off the event loop
+            await run_in_threadpool(write, records)
+            records = []
+            yield sink.drain()
+    if records:
+        await run_in_threadpool(write, records)
+    writer.close()
+    yield sink.drain()
+
+
+async def _guarded(body: AsyncIterator[bytes], fmt: str) -> AsyncIterator[bytes]:
+    # A failure mid-stream must not look like a complete file: CSV gets a final error line,
+    # Parquet is left without its footer, and the connection is aborted (no clean EOF)
+    try:
+        async for chunk in body:
+            yield chunk
+    except Exception as e:
+        print(f"Export failed mid-stream: {e}")
+        if fmt == "csv":
+            yield f"{EXPORT_ERROR_MARKER} incomplete export, please retry\r\n".encode()
+        raise
+
+
+def _bound(spec: Export, value: Optional[datetime]) -> Optional[str]:
+    if value is None:
+        return None
+    return value.strftime("%Y-%m") if spec.period else value.isoformat()
+
+
+def stream(name: str, fmt: str, start: Optional[datetime], end: Optional[datetime]) -> StreamingResponse:
+    spec = EXPORTS[name]
+    if fmt == "parquet" and pq is None:
+        raise HTTPException(status_code=501, detail="Parquet export needs the pyarrow package")
+    lower, upper = _bound(spec, start), _bound(spec, end)
+    body = _guarded((_parquet if fmt == "parquet" else _csv)(spec, lower, upper), fmt)
+    filename = name + "".join(f"_{value:%Y-%m-%d}" for value in (start, end) if value) + f".{fmt}"
+    return StreamingResponse(body, media_type=MEDIA_TYPES[fmt],
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
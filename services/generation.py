@@ -0,0 +1,207 @@
+import calendar
+import json
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from fastapi import HTTPException
+import config
+from services.shared import store
+
+SLOTS_PER_DAY = 96  # 15-minute readings
+SLOTS_PER_HOUR = 4
+
+
+def month_of(ts: datetime) -> str:
+    return f"{ts.year:04d}-{ts.month:02d}"
+
+
+def _days(month: str) -> int:
+    year, mon = (int(p) for p in month.split("-"))
+    return calendar.monthrange(year, mon)[1]
+
+
+class Partition:
+    # One site-month: raw 15-minute readings plus hourly/daily rollups, each a
+    # memory-mapped array on disk. Missing readings are NaN in the raw array.
+
+    def __init__(self, directory: str, month: str):
+        days = _days(month)
+        os.makedirs(directory, exist_ok=True)
+        self.raw = self._open(os.path.join(directory, f"{month}.raw.f32"), np.float32, days * SLOTS_PER_DAY, np.nan)
+        self.hourly = self._open(os.path.join(directory, f"{month}.hourly.f64"), np.float64, days * 24, 0.0)
+        self.daily = self._open(os.path.join(directory, f"{month}.daily.f64"), np.float64, days, 0.0)
+
+    @staticmethod
+    def _open(path: str, dtype, length: int, fill) -> np.memmap:
+        if os.path.exists(path):
+            return np.memmap(path, dtype=dtype, mode="r+", shape=(length,))
+        arr = np.memmap(path, dtype=dtype, mode="w+", shape=(length,))
+        arr[:] = fill
+        return arr
+
+    def write(self, slots: np.ndarray, kwh: np.ndarray) -> float:
+        # Overwrites are allowed (meter re-sends): rollups move by the difference
+        old = np.nan_to_num(self.raw[slots].astype(np.float64))
+        delta = kwh - old
+        self.raw[slots] = kwh
+        np.add.at(self.hourly, slots // SLOTS_PER_HOUR, delta)
+        np.add.at(self.daily, slots // SLOTS_PER_DAY, delta)
+        return float(delta.sum())
+
+    def flush(self):
+        self.raw.flush()
+        self.hourly.flush()
+        self.daily.flush()
+
+
+class GenerationStore:
+    # Per-site meter readings. Queries read the hourly/daily arrays or the
+    # in-memory monthly totals, never the raw readings. Only a bounded number
+    # of partitions is mapped at a time, so memory stays flat as history grows.
+
+    def __init__(self, root: str = None, max_open: int = None):
+        self.root = root or config.GENERATION_DATA_DIR
+        self.max_open = max_open or config.GENERATION_OPEN_PARTITIONS
+        self._open: "OrderedDict[Tuple[str, str], Partition]" = OrderedDict()
+        self.monthly: Dict[str, Dict[str, float]] = defaultdict(dict)  # site -> month -> kWh
+        self.site_totals: Dict[str, float] = defaultdict(float)
+        self.platform_total = 0.0
+        # ingest and series run in the threadpool: every access to _open / monthly /
+        # the totals that may change them holds this lock
+        self._lock = threading.Lock()
+
+    def load(self):
+        # Monthly rollups are tiny JSON files; everything else stays on disk
+        self.__init__(self.root, self.max_open)
+        if not os.path.isdir(self.root):
+            return
+        for site in os.listdir(self.root):
+            path = os.path.join(self.root, site, "monthly.json")
+            if os.path.exists(path):
+                with open(path) as f:
+                    self.monthly[site] = json.load(f)
+                self.site_totals[site] = sum(self.monthly[site].values())
+        self.platform_total = sum(self.site_totals.values())
+
+    def _site_dir(self, site_id: str) -> str:
+        if not site_id or os.sep in site_id or site_id.startswith("."):
+            raise HTTPException(status_code=400, detail="Invalid site id")
+        return os.path.join(self.root, site_id)
+
+    def _partition(self, site_id: str, month: str, create: bool = True) -> Optional[Partition]:
+        key = (site_id, month)
+        part = self._open.get(key)
+        if part is None:
+            directory = self._site_dir(site_id)
+            if not create and not os.path.exists(os.path.join(directory, f"{month}.raw.f32")):
+                return None
+            part = Partition(directory, month)
+            self._open[key] = part
+            while len(self._open) > self.max_open:
+                _, evicted = self._open.popitem(last=False)
+                evicted.flush()
+        self._open.move_to_end(key)
+        return part
+
+    # --- Ingest ---
+
+    def ingest(self, readings: Iterable[Tuple[str, datetime, float]]) -> int:
+        # Threads of this worker and other workers on the node write the same files: one ingest at a time
+        with self._lock, store.lock("generation"):
+            return self._ingest(readings)
+
+    def _ingest(self, readings: Iterable[Tuple[str, datetime, float]]) -> int:
+        # Group the batch by site-month, then write each partition with array ops
+        groups: Dict[Tuple[str, str], List[Tuple[int, float]]] = defaultdict(list)
+        count = 0
+        for site_id, ts, kwh in readings:
+            ts = ts.astimezone(timezone.utc) if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+            slot = (ts.day - 1) * SLOTS_PER_DAY + ts.hour * SLOTS_PER_HOUR + ts.minute // 15
+            groups[(site_id, month_of(ts))].append((slot, kwh))
+            count += 1
+
+        if store.enabled:
+            # Another worker may have written these sites since we last looked
+            self._apply_monthly({site_id: self._read_monthly(site_id) for site_id, _ in groups})
+
+        touched = set()
+        for (site_id, month), items in groups.items():
+            slots = np.fromiter((s for s, _ in items), np.int64, len(items))
+            kwh = np.fromiter((v for _, v in items), np.float64, len(items))
+            # Within a batch the last reading for a slot wins
+            _, last = np.unique(slots[::-1], return_index=True)
+            keep = len(slots) - 1 - last
+            part = self._partition(site_id, month)
+            delta = part.write(slots[keep], kwh[keep])
+            part.flush()
+
+            self.monthly[site_id][month] = self.monthly[site_id].get(month, 0.0) + delta
+            self.site_totals[site_id] += delta
+            self.platform_total += delta
+            touched.add(site_id)
+
+        for site_id in touched:
+            # Write then rename, so a crash or a concurrent reader never sees a partial file
+            path = os.path.join(self._site_dir(site_id), "monthly.json")
+            temp = f"{path}.{os.getpid()}.tmp"
+            with open(temp, "w") as f:
+                json.dump(self.monthly[site_id], f)
+            os.replace(temp, path)
+        store.publish("generation", {site_id: self.monthly[site_id] for site_id in touched})
+        return count
+
+    def _read_monthly(self, site_id: str) -> Dict[str, float]:
+        path = os.path.join(self._site_dir(site_id), "monthly.json")
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def apply_monthly(self, monthly: Dict[str, Dict[str, float]]):
+        # Replace the rollups of these sites (site -> month -> kWh), keeping totals in step
+        with self._lock:
+            self._apply_monthly(monthly)
+
+    def _apply_monthly(self, monthly: Dict[str, Dict[str, float]]):
+        for site_id, months in monthly.items():
+            total = sum(months.values())
+            self.platform_total += total - self.site_totals.get(site_id, 0.0)
+            self.site_totals[site_id] = total
+            self.monthly[site_id] = dict(months)
+
+    # --- Queries ---
+
+    def series(self, site_id: str, resolution: str, month: Optional[str] = None) -> List[dict]:
+        # Reads memory-mapped files and may map a partition: call from the threadpool
+        with self._lock:
+            return self._series(site_id, resolution, month)
+
+    def _series(self, site_id: str, resolution: str, month: Optional[str] = None) -> List[dict]:
+        if resolution == "monthly":
+            return [{"period": m, "kwh": round(v, 3)} for m, v in sorted(self.monthly.get(site_id, {}).items())]
+        month = month or month_of(datetime.now(timezone.utc))
+        part = self._partition(site_id, month, create=False)
+        if part is None:
+            return []
+        if resolution == "daily":
+            return [{"period": f"{month}-{d + 1:02d}", "kwh": round(float(v), 3)} for d, v in enumerate(part.daily)]
+        if resolution == "hourly":
+            return [
+                {"period": f"{month}-{h // 24 + 1:02d}T{h % 24:02d}:00", "kwh": round(float(v), 3)}
+                for h, v in enumerate(part.hourly)
+            ]
+        raise HTTPException(status_code=400, detail="resolution must be hourly, daily or monthly")
+
+    def site_total(self, site_id: str) -> float:
+        return round(self.site_totals.get(site_id, 0.0), 3)
+
+    def flush(self):
+        with self._lock:
+            for part in self._open.values():
+                part.flush()
+
+
+generation_store = GenerationStore()
@@ -0,0 +1,157 @@
+import math
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from fastapi import HTTPException
+import config
+
+BBox = Tuple[float, float, float, float]  # (min_lon, min_lat, max_lon, max_lat)
+CLUSTER_GRID = 8  # a tile is split into CLUSTER_GRID x CLUSTER_GRID cluster buckets
+
+
+def parse_bbox(bbox: str) -> BBox:
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be min_lon,min_lat,max_lon,max_lat")
+    if not (-180 <= min_lon <= 180 and -180 <= max_lon <= 180 and -90 <= min_lat <= max_lat <= 90):
+        raise HTTPException(status_code=400, detail="bbox out of range")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def tile_bbox(z: int, x: int, y: int) -> BBox:
+    # Standard web-mercator (slippy map) tile -> lon/lat bounds
+    n = 2 ** z
+    if not (0 <= x < n and 0 <= y < n):
+        raise HTTPException(status_code=400, detail="Tile out of range")
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360.0 - 180.0, lat(y + 1), (x + 1) / n * 360.0 - 180.0, lat(y)
+
+
+def _coords(row: dict) -> Optional[Tuple[float, float]]:
+    lon, lat = row.get("longitude"), row.get("latitude")
+    if lon is None or lat is None:
+        return None
+    return float(lon), float(lat)
+
+
+class GridIndex:
+    # Uniform lon/lat grid over the lands catalog. Each cell holds the ids of the
+    # lands inside it; bbox queries only visit the cells that overlap the box.
+
+    def __init__(self, cell_degrees: float = None):
+        self.cell = cell_degrees or config.GEO_CELL_DEGREES
+        self._rows: Dict[str, dict] = {}
+        self._cell_of: Dict[str, Tuple[int, int]] = {}
+        self._cells: Dict[Tuple[int, int], Set[str]] = defaultdict(set)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _key(self, lon: float, lat: float) -> Tuple[int, int]:
+        return int(math.floor(lon / self.cell)), int(math.floor(lat / self.cell))
+
+    # --- Maintenance ---
+
+    def load(self, rows: Iterable[dict]):
+        self.__init__(self.cell)
+        self.upsert(rows)
+
+    def upsert(self, rows: Iterable[dict]):
+        for row in rows or []:
+            land_id = row.get("id")
+            if not land_id:
+                continue
+            # Partial rows (e.g. status-only updates) are merged into what we have
+            merged = {**self._rows.get(land_id, {}), **row}
+            coords = _coords(merged)
+            if coords is None:
+                self.remove(land_id)
+                continue
+            key = self._key(*coords)
+            old_key = self._cell_of.get(land_id)
+            if old_key != key:
+                if old_key is not None:
+                    self._discard(old_key, land_id)
+                self._cells[key].add(land_id)
+                self._cell_of[land_id] = key
+            self._rows[land_id] = merged
+
+    def remove(self, land_id: str):
+        key = self._cell_of.pop(land_id, None)
+        if key is not None:
+            self._discard(key, land_id)
+        self._rows.pop(land_id, None)
+
+    def _discard(self, key, land_id):
+        ids = self._cells.get(key)
+        if ids is not None:
+            ids.discard(land_id)
+            if not ids:
+                del self._cells[key]
+
+    # --- Queries ---
+
+    def query(self, bbox: BBox, status: Optional[str] = None, owner_id: Optional[str] = None) -> List[dict]:
+        min_lon, min_lat, max_lon, max_lat = bbox
+        if min_lon > max_lon:
+            # Box crosses the antimeridian
+            return (self.query((min_lon, min_lat, 180.0, max_lat), status, owner_id)
+                    + self.query((-180.0, min_lat, max_lon, max_lat), status, owner_id))
+
+        x0, y0 = self._key(min_lon, min_lat)
+        x1, y1 = self._key(max_lon, max_lat)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(self._cells):
+            # Huge box (low zoom): cheaper to walk the occupied cells than the box
+            candidates = (i for (cx, cy), ids in self._cells.items()
+                          if x0 <= cx <= x1 and y0 <= cy <= y1 for i in ids)
+        else:
+            candidates = (i for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1)
+                          for i in self._cells.get((cx, cy), ()))
+
+        out = []
+        for land_id in candidates:
+            row = self._rows[land_id]
+            if status and row.get("status") != status:
+                continue
+            if owner_id and row.get("owner_id") != owner_id:
+                continue
+            lon, lat = _coords(row)
+            if min_lon <= lon <= max_lon and min_lat <= lat <= max_lat:
+                out.append(row)
+        return out
+
+    def tile(self, z: int, x: int, y: int, status: Optional[str] = None, owner_id: Optional[str] = None) -> dict:
+        bbox = tile_bbox(z, x, y)
+        rows = self.query(bbox, status, owner_id)
+        if z > config.GEO_CLUSTER_MAX_ZOOM:
+            return {"z": z, "x": x, "y": y, "clusters": [], "sites": rows}
+
+        # Low zoom: bucket the tile into a fixed grid and return one cluster per bucket
+        min_lon, min_lat, max_lon, max_lat = bbox
+        step_lon = (max_lon - min_lon) / CLUSTER_GRID
+        step_lat = (max_lat - min_lat) / CLUSTER_GRID
+        buckets: Dict[Tuple[int, int], List[dict]] = defaultdict(list)
+        for row in rows:
+            lon, lat = _coords(row)
+            bx = min(int((lon - min_lon) / step_lon), CLUSTER_GRID - 1)
+            by = min(int((lat - min_lat) / step_lat), CLUSTER_GRID - 1)
+            buckets[(bx, by)].append(row)
+
+        clusters, sites = [], []
+        for members in buckets.values():
+            if len(members) == 1:
+                sites.append(members[0])
+                continue
+            clusters.append({
+                "count": len(members),
+                "longitude": sum(_coords(r)[0] for r in members) / len(members),
+                "latitude": sum(_coords(r)[1] for r in members) / len(members),
+                "total_capacity_kw": sum(float(r.get("potential_capacity_kw") or 0) for r in members),
+            })
+        return {"z": z, "x": x, "y": y, "clusters": clusters, "sites": sites}
+
+
+geo_index = GridIndex()
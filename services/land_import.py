@@ -0,0 +1,203 @@
+import asyncio
+import codecs
+import csv
+import json
+from collections import deque
+from typing import AsyncIterator, Deque, List, Optional
+from postgrest.exceptions import APIError
+from pydantic import ValidationError
+from database import supabase, patient
+from models import LandCreate
+from services import catalog
+import config
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    # Splits a byte stream into text lines without ever holding more than one chunk
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    async for chunk in chunks:
+        text = tail + decoder.decode(chunk)
+        lines = text.split("\n")
+        tail = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail.rstrip("\r")
+
+
+class _RecordScanner:
+    # Tracks whether the record read so far ends inside a quoted field. Only a quote
+    # at the start of a field opens one (a bare quote like `Roof 5" panel` is literal,
+    # as for csv.reader), and each line is scanned once.
+    def __init__(self):
+        self.in_quotes = False
+        self.field_start = True
+        self.closed = False  # just saw a closing quote ("" inside a field is an escaped quote)
+
+    def feed(self, line: str) -> bool:
+        # True when the record is complete at the end of this line
+        for ch in line:
+            if self.in_quotes:
+                if ch == '"':
+                    self.in_quotes, self.closed = False, True
+                continue
+            if ch == '"' and (self.field_start or self.closed):
+                self.in_quotes = True
+            self.closed = False
+            self.field_start = ch == ","
+        if not self.in_quotes:
+            self.field_start, self.closed = True, False
+        return not self.in_quotes
+
+
+async def iter_csv(lines: AsyncIterator[str]) -> AsyncIterator[dict]:
+    # A quoted field may contain newlines, so a record can span lines. A record still open
+    # after IMPORT_MAX_RECORD_LINES lines / IMPORT_MAX_RECORD_BYTES is reported as one bad
+    # row and parsing resumes at its second line, so memory stays bounded and later good
+    # rows are not swallowed by one stray quote.
+    header: Optional[List[str]] = None
+    queue: Deque[str] = deque()  # lines to (re)parse
+    pending: List[str] = []
+    size = 0
+    scanner = _RecordScanner()
+    source = lines.__aiter__()
+    exhausted = False
+
+    while True:
+        if not queue:
+            if exhausted:
+                if not pending:
+                    return
+                # Unterminated quote at end of input
+                yield {"__error__": "Unterminated quoted field"}
+                queue.extend(pending[1:])
+                pending, size, scanner = [], 0, _RecordScanner()
+                continue
+            try:
+                queue.append(await source.__anext__())
+            except StopAsyncIteration:
+                exhausted = True
+                continue
+        line = queue.popleft()
+        pending.append(line)
+        size += len(line) + 1
+        if not scanner.feed(line):
+            if len(pending) >= config.IMPORT_MAX_RECORD_LINES or size > config.IMPORT_MAX_RECORD_BYTES:
+                yield {"__error__": "Unterminated quoted field"}
+                queue.extendleft(reversed(pending[1:]))
+                pending, size, scanner = [], 0, _RecordScanner()
+            continue
+        record = "\n".join(pending)
+        pending, size = [], 0
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+        # Empty cells mean "not provided" so model defaults apply
+        yield {k: v for k, v in zip(header, values) if v != ""}
+
+
+async def iter_ndjson(lines: AsyncIterator[str]) -> AsyncIterator[dict]:
+    async for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            record = {"__error__": f"Invalid JSON: {e.msg}"}
+        if not isinstance(record, dict):
+            record = {"__error__": "Each line must be a JSON object"}
+        yield record
+
+
+class ImportReport:
+    def __init__(self):
+        self.received = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    def error(self, row: int, message: str):
+        self.failed += 1
+        if len(self.errors) < config.IMPORT_MAX_ERRORS:
+            self.errors.append({"row": row, "error": message})
+
+    def as_dict(self) -> dict:
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+async def import_lands(records: AsyncIterator[dict], batch_size: int = None) -> dict:
+    # Validates rows as they arrive and inserts them in batches; bad rows are
+    # reported and skipped. One batch is inserted while the next is parsed, so
+    # memory is bounded by two batches + the error list.
+    batch_size = batch_size or config.IMPORT_BATCH_SIZE
+    report = ImportReport()
+    batch: List[tuple] = []  # (row number, insert payload)
+    inflight: Optional[asyncio.Task] = None
+
+    async for record in records:
+        report.received += 1
+        row_no = report.received
+        if "__error__" in record:
+            report.error(row_no, record["__error__"])
+            continue
+        try:
+            land = LandCreate(**record)
+        except ValidationError as e:
+            report.error(row_no, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+            continue
+        data = land.dict()
+        data["status"] = "pending_approval"  # same as /land/submit
+        batch.append((row_no, data))
+        if len(batch) >= batch_size:
+            if inflight:
+                await inflight
+            inflight = asyncio.create_task(_flush(batch, report))
+            batch = []
+
+    if inflight:
+        await inflight
+    if batch:
+        await _flush(batch, report)
+    return report.as_dict()
+
+
+def _row_error(e: APIError) -> bool:
+    # Postgres data exceptions (22xxx) and constraint violations (23xxx, e.g. an unknown
+    # owner_id) are caused by a row; anything else is the database or the network
+    return (e.code or "")[:2] in ("22", "23")
+
+
+async def _flush(batch: List[tuple], report: ImportReport):
+    # Transport errors, timeouts and a shed 503 propagate (a retry row by row would only
+    # multiply the load, and could insert twice if the batch did commit)
+    try:
+        with patient():
+            res = await supabase.table("lands").insert([data for _, data in batch]).execute()
+        rows = res.data
+    except APIError as e:
+        if not _row_error(e):
+            raise
+        # One bad row fails the whole INSERT; retry row by row so only the offending rows are reported
+        rows = []
+        for row_no, data in batch:
+            try:
+                with patient():
+                    res = await supabase.table("lands").insert(data).execute()
+                rows.extend(res.data)
+            except APIError as e:
+                if not _row_error(e):
+                    raise
+                report.error(row_no, e.message or str(e))
+    report.inserted += len(rows)
+    catalog.lands_changed(rows)
@@ -0,0 +1,205 @@
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from starlette.datastructures import MutableHeaders
+import config
+
+# Request latency per route and Supabase call latency/size per table + route,
+# rendered in the Prometheus text format by GET /metrics.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROUND_TRIP_BUCKETS = (0, 1, 2, 3, 4, 5, 8, 13, 21)
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...], buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # label values -> [bucket counts..., +Inf count, sum]
+        self._series: Dict[tuple, List[float]] = {}
+
+    def observe(self, label_values: tuple, value: float):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for values, series in sorted(self._series.items()):
+            labels = _labels(self.labels, values)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...]):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._series: Dict[tuple, float] = defaultdict(float)
+
+    def inc(self, label_values: tuple, amount: float = 1):
+        self._series[label_values] += amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for values, total in sorted(self._series.items()):
+            lines.append(f"{self.name}{{{_labels(self.labels, values)}}} {total:g}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...]):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._series: Dict[tuple, float] = {}
+
+    def set(self, label_values: tuple, value: float):
+        self._series[label_values] = value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for values, value in sorted(self._series.items()):
+            lines.append(f"{self.name}{{{_labels(self.labels, values)}}} {value:g}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values) -> str:
+    return ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+
+
+http_duration = Histogram("http_request_duration_seconds", "Request latency by route", ("method", "route"))
+http_requests = Counter("http_requests_total", "Requests by route and status code", ("method", "route", "status"))
+db_duration = Histogram("db_query_duration_seconds", "Supabase call latency", ("table", "route"))
+db_errors = Counter("db_query_errors_total", "Supabase calls that raised", ("table", "route"))
+db_rows = Counter("db_rows_returned_total", "Rows returned by Supabase calls", ("table", "route"))
+db_bytes = Counter("db_response_bytes_total", "Response payload bytes from Supabase", ("table", "route"))
+db_round_trips = Histogram("db_round_trips_per_request", "Supabase calls made while serving one request",
+                           ("method", "route"), buckets=ROUND_TRIP_BUCKETS)
+cached_reads = Counter("cached_reads_total", "Cached listing reads: hit, stale (served while refreshing), "
+                       "miss (ran the query) or coalesced (waited on another request's query)", ("route", "outcome"))
+admission_rejected = Counter("admission_rejected_total", "Requests turned away: rate_limited (429) or "
+                             "db_overloaded (503)", ("route_class", "reason"))
+db_queued = Counter("db_queued_total", "Supabase calls that waited for a free slot (DB_MAX_CONCURRENCY)", ("route_class",))
+db_concurrency = Gauge("db_concurrency", "Supabase calls in flight / queued for a slot in this worker", ("state",))
+outbox_events = Counter("outbox_events_total", "Outbox events applied, retried (backoff) or parked as failed",
+                        ("kind", "outcome"))
+outbox_lag = Histogram("outbox_lag_seconds", "Time from an outbox event being recorded to being applied", ("kind",),
+                       buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0))
+startup_seconds = Gauge("startup_seconds", "Time spent in each startup step of this worker", ("step",))
+
+REGISTRY = [http_duration, http_requests, db_duration, db_errors, db_rows, db_bytes, db_round_trips, cached_reads,
+            admission_rejected, db_queued, db_concurrency, outbox_events, outbox_lag, startup_seconds]
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class _RequestContext:
+    __slots__ = ("scope", "round_trips")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.round_trips = 0
+
+    @property
+    def route(self) -> str:
+        # The router stores the matched route on the (shared) scope dict
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or "unmatched"
+
+
+_request: ContextVar[Optional[_RequestContext]] = ContextVar("metrics_request", default=None)
+
+
+def current_request() -> Optional[_RequestContext]:
+    # None outside a request (startup, schedulers, sync loops)
+    return _request.get()
+
+# Per-call cell the HTTP response hook adds payload bytes to
+_query_bytes: ContextVar[Optional[list]] = ContextVar("metrics_query_bytes", default=None)
+
+
+async def track_query(table: str, call):
+    # Wraps one `.execute()`: latency, row count and payload size tagged by table + route
+    ctx = _request.get()
+    route = ctx.route if ctx is not None else "background"
+    if ctx is not None:
+        ctx.round_trips += 1
+    cell = [0]
+    token = _query_bytes.set(cell)
+    start = time.perf_counter()
+    try:
+        result = await call
+    except Exception:
+        db_errors.inc((table, route))
+        raise
+    finally:
+        db_duration.observe((table, route), time.perf_counter() - start)
+        _query_bytes.reset(token)
+    data = getattr(result, "data", None)
+    if isinstance(data, list):
+        db_rows.inc((table, route), len(data))
+    elif data is not None:
+        db_rows.inc((table, route))
+    db_bytes.inc((table, route), cell[0])
+    return result
+
+
+async def record_response_size(response):
+    # httpx response event hook: the body is read here once and reused by the caller
+    cell = _query_bytes.get()
+    if cell is not None:
+        await response.aread()
+        cell[0] += len(response.content)
+
+
+class MetricsMiddleware:
+    # Latency per route template, plus the X-DB-Round-Trips debug header
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        ctx = _RequestContext(scope)
+        token = _request.set(ctx)
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def wrapped_send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if config.DB_ROUND_TRIP_HEADER:
+                    MutableHeaders(scope=message)["X-DB-Round-Trips"] = str(ctx.round_trips)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, wrapped_send)
+        finally:
+            _request.reset(token)
+            route, method = ctx.route, scope["method"]
+            http_duration.observe((method, route), time.perf_counter() - start)
+            http_requests.inc((method, route, status["code"]))
+            db_round_trips.observe((method, route), ctx.round_trips)
@@ -0,0 +1,111 @@
+import asyncio
+import itertools
+import json
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import AsyncIterator, Deque, Dict, List, Optional, Set
+import config
+
+SUBSCRIBER_QUEUE = 100  # per connection; a slow client drops its oldest events
+
+# Status transitions worth telling the user about
+INVESTMENT_MESSAGES = {
+    "pending_approval": "Reservation received. Waiting for admin approval.",
+    "payment_pending": "Investment approved. Payment is due.",
+    "active": "Payment successful! Your investment is active.",
+    "completed": "Payment confirmed. Your investment is complete.",
+}
+LAND_MESSAGES = {
+    "available": "Your land '{title}' was approved and is open for investment.",
+    "rejected": "Your land '{title}' was rejected.",
+    "reserved": "An investor reserved your land '{title}'.",
+    "active": "Your land '{title}' is now an active solar site.",
+}
+
+
+class Broker:
+    # asyncio fan-out keyed by user id. Each open stream is one queue; every user
+    # also has a small backlog so reconnecting clients can catch up (Last-Event-ID).
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._backlog: "OrderedDict[str, Deque[dict]]" = OrderedDict()
+        # Millisecond-based ids keep Last-Event-ID meaningful across restarts
+        self._ids = itertools.count(int(time.time() * 1000))
+        self.published = 0
+
+    @property
+    def connections(self) -> int:
+        return sum(len(qs) for qs in self._subscribers.values())
+
+    def publish(self, user_id: str, event_type: str, message: str, data: Optional[dict] = None) -> dict:
+        event = {
+            "id": next(self._ids),
+            "type": event_type,
+            "message": message,
+            "data": data or {},
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        backlog = self._backlog.get(user_id)
+        if backlog is None:
+            backlog = self._backlog[user_id] = deque(maxlen=config.NOTIFY_BACKLOG)
+            while len(self._backlog) > config.NOTIFY_MAX_USERS:
+                self._backlog.popitem(last=False)
+        self._backlog.move_to_end(user_id)
+        backlog.append(event)
+
+        for queue in self._subscribers.get(user_id, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+        self.published += 1
+        return event
+
+    def backlog(self, user_id: str, after_id: int = 0) -> List[dict]:
+        return [e for e in self._backlog.get(user_id, ()) if e["id"] > after_id]
+
+    async def stream(self, user_id: str, last_event_id: int = 0) -> AsyncIterator[str]:
+        # SSE frames for one connection: missed events first, then live ones,
+        # with comment heartbeats so proxies keep idle connections open
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        try:
+            for event in self.backlog(user_id, last_event_id):
+                yield _frame(event)
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), config.NOTIFY_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _frame(event)
+        finally:
+            subs = self._subscribers.get(user_id)
+            if subs is not None:
+                subs.discard(queue)
+                if not subs:
+                    del self._subscribers[user_id]
+
+
+def _frame(event: dict) -> str:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+
+
+broker = Broker()
+
+
+def investment_changed(row: dict, old_status: Optional[str]):
+    status = row.get("status")
+    if status == old_status or status not in INVESTMENT_MESSAGES or not row.get("investor_id"):
+        return
+    broker.publish(row["investor_id"], f"investment.{status}", INVESTMENT_MESSAGES[status],
+                   {"investment_id": row.get("id"), "land_id": row.get("land_id"), "status": status})
+
+
+def land_changed(row: dict, old_status: Optional[str]):
+    status = row.get("status")
+    if status == old_status or status not in LAND_MESSAGES or not row.get("owner_id"):
+        return
+    broker.publish(row["owner_id"], f"land.{status}", LAND_MESSAGES[status].format(title=row.get("title") or "listing"),
+                   {"land_id": row.get("id"), "status": status})
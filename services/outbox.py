@@ -0,0 +1,159 @@
+import asyncio
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from database import supabase
+from services import catalog, metrics
+import config
+
+# Transactional outbox (SUPABASE_SETUP.md 15). A request makes its critical write
+# through an SQL function that also records the follow-up writes ("effects") as
+# outbox rows in the same transaction, then returns. Outbox workers claim due rows
+# in batches, apply them (idempotently, so a retry after a crash is harmless) and
+# delete them; failures are retried with backoff and parked as 'failed' after
+# OUTBOX_MAX_ATTEMPTS, where GET /admin/outbox shows them.
+
+_wakeup = asyncio.Event()
+
+
+def effect(kind: str, **payload) -> dict:
+    return {"kind": kind, "payload": payload}
+
+
+def set_status(table: str, row_id: str, status: str) -> dict:
+    return effect("set_status", table=table, id=row_id, status=status)
+
+
+def notify():
+    # New events were recorded: wake the local workers instead of waiting for the poll
+    _wakeup.set()
+
+
+async def update_status(table: str, row_id: str, status: str, effects: List[dict]) -> dict:
+    # Primary status change + its effects in one transaction; returns the updated row
+    res = await supabase.rpc("set_status", {
+        "p_table": table, "p_id": row_id, "p_status": status, "p_effects": effects,
+    }).execute()
+    result = res.data or {}
+    if result.get("error"):
+        raise HTTPException(status_code=404, detail=f"{table[:-1].capitalize()} not found")
+    row = result["row"]
+    if table == "lands":
+        catalog.lands_changed([row])
+    else:
+        catalog.investments_changed([row])
+    notify()
+    return row
+
+
+# --- Handlers: kind -> batch of events -> {event id: error} for the ones that failed ---
+
+async def _apply_set_status(events: List[dict]) -> Dict[str, str]:
+    # One UPDATE ... WHERE id IN (...) per (table, status)
+    groups: Dict[Tuple[str, str], List[dict]] = defaultdict(list)
+    for event in events:
+        payload = event["payload"]
+        groups[(payload["table"], payload["status"])].append(event)
+    failed = {}
+    for (table, status), group in groups.items():
+        ids = list({e["payload"]["id"] for e in group})
+        res = await supabase.table(table).update({"status": status}).in_("id", ids).execute()
+        if table == "lands":
+            catalog.lands_changed(res.data)
+        elif table == "investments":
+            catalog.investments_changed(res.data)
+        found = {str(r["id"]) for r in res.data}
+        for e in group:
+            if str(e["payload"]["id"]) not in found:
+                failed[e["id"]] = f"{table} {e['payload']['id']} not found"
+    return failed
+
+
+HANDLERS = {
+    "set_status": _apply_set_status,
+}
+
+
+def _lag(event: dict) -> float:
+    try:
+        return time.time() - datetime.fromisoformat(event["created_at"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return 0.0
+
+
+async def process_batch() -> int:
+    res = await supabase.rpc("outbox_claim", {
+        "p_limit": config.OUTBOX_BATCH_SIZE, "p_lease_seconds": config.OUTBOX_LEASE_SECONDS,
+    }).execute()
+    events = res.data or []
+    if not events:
+        return 0
+
+    by_kind: Dict[str, List[dict]] = defaultdict(list)
+    for event in events:
+        by_kind[event["kind"]].append(event)
+    failed: Dict[str, str] = {}
+    for kind, batch in by_kind.items():
+        handler = HANDLERS.get(kind)
+        if handler is None:
+            failed.update({e["id"]: f"no handler for '{kind}'" for e in batch})
+            continue
+        try:
+            failed.update(await handler(batch))
+        except Exception as e:
+            failed.update({ev["id"]: f"{type(e).__name__}: {e}" for ev in batch})
+
+    done = [e for e in events if e["id"] not in failed]
+    if done:
+        await supabase.table("outbox").delete().in_("id", [e["id"] for e in done]).execute()
+        for event in done:
+            metrics.outbox_events.inc((event["kind"], "applied"))
+            metrics.outbox_lag.observe((event["kind"],), _lag(event))
+    for event in events:
+        if event["id"] in failed:
+            await _record_failure(event, failed[event["id"]])
+    return len(events)
+
+
+async def _record_failure(event: dict, error: str):
+    attempts = event.get("attempts") or 1
+    if attempts >= config.OUTBOX_MAX_ATTEMPTS:
+        values = {"status": "failed", "last_error": error}
+        metrics.outbox_events.inc((event["kind"], "failed"))
+    else:
+        # Exponential backoff: 1s, 2s, 4s, ... capped at 5 minutes
+        delay = min(300, 2 ** (attempts - 1))
+        available = datetime.now(timezone.utc) + timedelta(seconds=delay)
+        values = {"status": "pending", "last_error": error, "available_at": available.isoformat()}
+        metrics.outbox_events.inc((event["kind"], "retried"))
+    print(f"Outbox event {event['id']} ({event['kind']}) failed, attempt {attempts}: {error}")
+    await supabase.table("outbox").update(values).eq("id", event["id"]).execute()
+
+
+async def retry(event_id: str) -> Optional[dict]:
+    # Puts a failed event back in the queue (admin)
+    res = await supabase.table("outbox").update({
+        "status": "pending", "attempts": 0, "available_at": datetime.now(timezone.utc).isoformat(),
+    }).eq("id", event_id).eq("status", "failed").execute()
+    if res.data:
+        notify()
+        return res.data[0]
+    return None
+
+
+async def run_worker():
+    while True:
+        try:
+            claimed = await process_batch()
+        except Exception as e:
+            print(f"Outbox worker failed: {e}")
+            claimed = 0
+        if claimed >= config.OUTBOX_BATCH_SIZE:
+            continue  # more may be due right away
+        _wakeup.clear()
+        try:
+            await asyncio.wait_for(_wakeup.wait(), config.OUTBOX_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
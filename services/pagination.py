@@ -0,0 +1,143 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Type
+from uuid import UUID
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+import config
+from services.responses import json_rows
+
+
+def encode_cursor(sort_value, row_id) -> str:
+    raw = json.dumps([sort_value, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+# Keyset values are interpolated into a PostgREST or=(...) filter, so only the shapes
+# our sort keys and ids take are accepted; anything else raises ValueError.
+
+def is_uuid(value: str) -> bool:
+    try:
+        UUID(value)
+        return True
+    except ValueError:
+        return False
+
+
+def sort_value(value) -> str:
+    # ISO timestamp or number
+    if isinstance(value, bool):
+        raise ValueError("invalid sort value")
+    if isinstance(value, (int, float)):
+        return str(value)
+    datetime.fromisoformat(value)
+    return value
+
+
+def row_id(value) -> str:
+    # uuid, or integer (e.g. outbox events)
+    if isinstance(value, bool):
+        raise ValueError("invalid id")
+    if isinstance(value, int):
+        return str(value)
+    return str(UUID(value))
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, last_id = json.loads(raw)
+        return sort_value(value), row_id(last_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def encode_offset(offset: int) -> str:
+    # Cursor for results ranked in memory (search), which have no stable keyset
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode().rstrip("=")
+
+
+def decode_offset(cursor: str) -> int:
+    try:
+        offset = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))["offset"]
+        if type(offset) is not int or offset < 0:
+            raise ValueError("invalid offset")
+        return offset
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+class PageParams:
+    # Keyset pagination (newest first, on `sort_key` then `id`) + optional column projection.
+    # Use as a dependency:
+    #   query = supabase.table("lands").select(page.select(LandResponse))
+    #   res = await page.apply(query.eq(...)).execute()
+    #   return page.response(res.data)
+    # or, for rows ranked in memory:
+    #   rows = search(..., limit=page.offset() + page.limit + 1)
+    #   return page.offset_response(rows[page.offset():], LandResponse)
+
+    def __init__(
+        self,
+        limit: int = Query(config.DEFAULT_PAGE_SIZE, ge=1, le=config.MAX_PAGE_SIZE),
+        cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+        fields: Optional[str] = Query(None, description="Comma separated columns to return"),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.fields = fields
+        self.sort_key = "created_at"
+
+    def columns(self, model: Type[BaseModel], sort_key: str = "created_at") -> Optional[List[str]]:
+        # The `fields=` projection (None: every column)
+        if not self.fields:
+            return None
+        allowed = set(model.model_fields) | {"id", sort_key}
+        requested = [f.strip() for f in self.fields.split(",") if f.strip()]
+        unknown = [f for f in requested if f not in allowed]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        # id + sort key are always needed to build the next cursor
+        return list(dict.fromkeys(["id", sort_key] + requested))
+
+    def select(self, model: Type[BaseModel], sort_key: str = "created_at", embed: Optional[str] = None) -> str:
+        # Builds the Supabase select string, pushing the `fields=` projection down to the DB
+        self.sort_key = sort_key
+        columns = self.columns(model, sort_key) or ["*"]
+        if embed:
+            columns.append(embed)
+        return ", ".join(columns)
+
+    def apply(self, query):
+        query = query.order(self.sort_key, desc=True).order("id", desc=True)
+        if self.cursor:
+            value, last_id = decode_cursor(self.cursor)
+            key = self.sort_key
+            query = query.or_(f'{key}.lt."{value}",and({key}.eq."{value}",id.lt."{last_id}")')
+        # One extra row tells us whether there is a next page
+        return query.limit(self.limit + 1)
+
+    def response(self, rows: List[dict]):
+        # Rows come straight from Supabase, so they are returned as-is
+        # (no second validation pass through the response model)
+        headers = {}
+        if len(rows) > self.limit:
+            rows = rows[: self.limit]
+            last = rows[-1]
+            headers["X-Next-Cursor"] = encode_cursor(last[self.sort_key], last["id"])
+        return json_rows(rows, headers=headers)
+
+    def offset(self) -> int:
+        return decode_offset(self.cursor) if self.cursor else 0
+
+    def offset_response(self, rows: List[dict], model: Type[BaseModel]):
+        # `rows` start at offset(); one more than `limit` means there is a next page
+        columns = self.columns(model)
+        headers = {}
+        if len(rows) > self.limit:
+            rows = rows[: self.limit]
+            headers["X-Next-Cursor"] = encode_offset(self.offset() + self.limit)
+        if columns:
+            rows = [{c: row.get(c) for c in columns} for row in rows]
+        return json_rows(rows, headers=headers)
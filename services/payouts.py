@@ -0,0 +1,202 @@
+import asyncio
+import calendar
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import numpy as np
+from fastapi import HTTPException
+from database import supabase, replica, fetch_all
+from services.cache import TTLCache
+import config
+
+LAND_COLUMNS = "id, title, owner_id, owner_fixed_payout, owner_revenue_share_percent, potential_capacity_kw"
+UPSERT_BATCH = 500
+
+# (owner_id, period) -> statement; filled by monthly runs and on first read
+statement_cache = TTLCache(ttl=6 * 3600, shared="statements")
+
+
+def current_period(now: Optional[datetime] = None) -> str:
+    now = now or datetime.now(timezone.utc)
+    return f"{now.year:04d}-{now.month:02d}"
+
+
+def previous_period(now: Optional[datetime] = None) -> str:
+    now = now or datetime.now(timezone.utc)
+    year, month = (now.year, now.month - 1) if now.month > 1 else (now.year - 1, 12)
+    return f"{year:04d}-{month:02d}"
+
+
+def period_hours(period: str) -> float:
+    try:
+        year, month = (int(p) for p in period.split("-"))
+        return calendar.monthrange(year, month)[1] * 24.0
+    except (ValueError, calendar.IllegalMonthError):
+        raise HTTPException(status_code=400, detail="period must be YYYY-MM")
+
+
+class LandArrays:
+    # Column-oriented view of active lands; owners are mapped to dense integer ids
+    def __init__(self, ids: List[str], titles: List[str], owner_idx: np.ndarray, owners: List[str],
+                 fixed: np.ndarray, share_pct: np.ndarray, capacity_kw: np.ndarray):
+        self.ids = ids
+        self.titles = titles
+        self.owner_idx = owner_idx
+        self.owners = owners
+        self.fixed = fixed
+        self.share_pct = share_pct
+        self.capacity_kw = capacity_kw
+
+    @classmethod
+    def from_rows(cls, rows: List[dict]) -> "LandArrays":
+        owner_pos: Dict[str, int] = {}
+        owner_idx = np.fromiter((owner_pos.setdefault(r["owner_id"], len(owner_pos)) for r in rows), np.int64, len(rows))
+
+        def column(name):
+            return np.fromiter((r.get(name) or 0.0 for r in rows), np.float64, len(rows))
+
+        return cls(
+            ids=[r["id"] for r in rows],
+            titles=[r.get("title") for r in rows],
+            owner_idx=owner_idx,
+            owners=list(owner_pos),
+            fixed=column("owner_fixed_payout"),
+            share_pct=column("owner_revenue_share_percent"),
+            capacity_kw=column("potential_capacity_kw"),
+        )
+
+
+def compute(lands: LandArrays, hours: float, tariff: float = None, capacity_factor: float = None) -> Dict[str, np.ndarray]:
+    # Vectorized fixed + revenue-share earnings for every land, summed per owner
+    tariff = config.PAYOUT_TARIFF_PER_KWH if tariff is None else tariff
+    capacity_factor = config.PAYOUT_CAPACITY_FACTOR if capacity_factor is None else capacity_factor
+
+    energy_kwh = lands.capacity_kw * (hours * capacity_factor)
+    revenue_share = energy_kwh * tariff * (lands.share_pct / 100.0)
+    total = lands.fixed + revenue_share
+
+    n_owners = len(lands.owners)
+    return {
+        "energy_kwh": energy_kwh,
+        "revenue_share": revenue_share,
+        "total": total,
+        "owner_fixed": np.bincount(lands.owner_idx, weights=lands.fixed, minlength=n_owners),
+        "owner_share": np.bincount(lands.owner_idx, weights=revenue_share, minlength=n_owners),
+        "owner_total": np.bincount(lands.owner_idx, weights=total, minlength=n_owners),
+    }
+
+
+def build_statements(lands: LandArrays, result: Dict[str, np.ndarray], period: str) -> List[dict]:
+    # Group land rows by owner with one stable sort instead of a Python group-by
+    order = np.argsort(lands.owner_idx, kind="stable")
+    bounds = np.searchsorted(lands.owner_idx[order], np.arange(len(lands.owners) + 1))
+    computed_at = datetime.now(timezone.utc).isoformat()
+
+    energy = result["energy_kwh"].round(3).tolist()
+    fixed = lands.fixed.round(2).tolist()
+    share = result["revenue_share"].round(2).tolist()
+    total = result["total"].round(2).tolist()
+
+    statements = []
+    for o, owner_id in enumerate(lands.owners):
+        breakdown = [
+            {
+                "land_id": lands.ids[i],
+                "title": lands.titles[i],
+                "energy_kwh": energy[i],
+                "fixed_payout": fixed[i],
+                "revenue_share": share[i],
+                "total": total[i],
+            }
+            for i in order[bounds[o]:bounds[o + 1]].tolist()
+        ]
+        statements.append({
+            "owner_id": owner_id,
+            "period": period,
+            "total_earnings": round(float(result["owner_total"][o]), 2),
+            "fixed_total": round(float(result["owner_fixed"][o]), 2),
+            "revenue_share_total": round(float(result["owner_share"][o]), 2),
+            "breakdown": breakdown,
+            "computed_at": computed_at,
+        })
+    return statements
+
+
+async def _persist(statements: List[dict]):
+    for start in range(0, len(statements), UPSERT_BATCH):
+        batch = statements[start:start + UPSERT_BATCH]
+        await supabase.table("owner_statements").upsert(batch, on_conflict="owner_id,period").execute()
+        for s in batch:
+            statement_cache.set((s["owner_id"], s["period"]), s)
+
+
+async def run(period: Optional[str] = None) -> dict:
+    # Month-end run: every active land in bulk -> per-owner statements, persisted
+    period = period or previous_period()
+    hours = period_hours(period)
+    rows = await fetch_all("lands", LAND_COLUMNS, status="active")
+    lands = LandArrays.from_rows(rows)
+    statements = build_statements(lands, compute(lands, hours), period)
+    await _persist(statements)
+    return {"period": period, "lands": len(lands.ids), "owners": len(statements)}
+
+
+async def get_statement(owner_id: str, period: Optional[str] = None) -> dict:
+    period = period or current_period()
+    key = (owner_id, period)
+    statement = statement_cache.get(key)
+    if statement is not None:
+        return statement
+    generation = statement_cache.generation()
+
+    period_hours(period)  # validates the format
+    if period != current_period():
+        # Closed months come only from the month-end run (POST /admin/payouts/run);
+        # they are never computed or written on the read path
+        res = await supabase.table("owner_statements").select("*").eq("owner_id", owner_id).eq("period", period).execute()
+        if not res.data:
+            raise HTTPException(status_code=404, detail=f"No payout statement for {period}")
+        statement_cache.set(key, res.data[0], generation)
+        return res.data[0]
+
+    # Running month: computed from this owner's active lands, not persisted
+    lands_res = await replica.table("lands").select(LAND_COLUMNS).eq("owner_id", owner_id).eq("status", "active").execute()
+    lands = LandArrays.from_rows(lands_res.data)
+    if lands.ids:
+        statement = build_statements(lands, compute(lands, period_hours(period)), period)[0]
+    else:
+        statement = {"owner_id": owner_id, "period": period, "total_earnings": 0.0, "fixed_total": 0.0,
+                     "revenue_share_total": 0.0, "breakdown": []}
+    statement_cache.set(key, statement, generation)
+    return statement
+
+
+def invalidate_owner(owner_id: str):
+    # Active lands changed for this owner: the running month is recomputed on next read
+    statement_cache.invalidate((owner_id, current_period()))
+
+
+async def _catch_up():
+    # The scheduling worker may have been down at 00:05 on the 1st: if last month has no
+    # statements yet, run it now (the upsert makes a repeated run harmless)
+    period = previous_period()
+    res = await supabase.table("owner_statements").select("owner_id").eq("period", period).limit(1).execute()
+    if not res.data:
+        print(f"No payout statements for {period}, running it now")
+        await run(period)
+
+
+async def run_scheduler():
+    # Runs the previous month's payouts shortly after each month starts (UTC)
+    try:
+        await _catch_up()
+    except Exception as e:
+        print(f"Payout catch-up failed: {e}")
+    while True:
+        now = datetime.now(timezone.utc)
+        year, month = (now.year + 1, 1) if now.month == 12 else (now.year, now.month + 1)
+        next_month = datetime(year, month, 1, 0, 5, tzinfo=timezone.utc)
+        await asyncio.sleep((next_month - now).total_seconds())
+        try:
+            await run(previous_period())
+        except Exception as e:
+            print(f"Payout run failed: {e}")
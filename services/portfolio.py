@@ -0,0 +1,53 @@
+from collections import defaultdict
+from typing import Iterable, List
+from database import replica
+from services.cache import CachedBody, TTLCache
+from services.responses import dumps
+
+# Investor dashboard in one round trip: every investment with its land embedded
+# (same embedded select as the admin listings) plus per-status aggregates.
+# Cached per investor; the catalog hooks drop entries when investments or lands change.
+
+# Paid investments: the land is live and its capacity counts as the investor's
+ACTIVE_STATUSES = ("active", "completed")
+
+portfolio_cache = TTLCache(shared="portfolios")
+
+
+def summarize(rows: List[dict]) -> dict:
+    by_status = defaultdict(lambda: {"count": 0, "total_invested": 0.0, "capacity_kw": 0.0})
+    for row in rows:
+        bucket = by_status[row["status"]]
+        bucket["count"] += 1
+        bucket["total_invested"] += row.get("amount") or 0.0
+        bucket["capacity_kw"] += (row.get("lands") or {}).get("potential_capacity_kw") or 0.0
+    active = [by_status[s] for s in ACTIVE_STATUSES if s in by_status]
+    return {
+        "holdings": rows,
+        "by_status": dict(by_status),
+        "total_invested": sum(b["total_invested"] for b in active),
+        "active_capacity_kw": sum(b["capacity_kw"] for b in active),
+    }
+
+
+async def get(investor_id: str) -> CachedBody:
+    cached = portfolio_cache.get(investor_id)
+    if cached is None:
+        generation = portfolio_cache.generation()
+        res = await (replica.table("investments").select("*, lands(*)").eq("investor_id", investor_id)
+                     .order("transaction_date", desc=True).execute())
+        rows = res.data
+        cached = CachedBody(dumps(summarize(rows)))
+        portfolio_cache.set(investor_id, cached, generation)
+    return cached
+
+
+def invalidate(investor_ids: Iterable[str]):
+    for investor_id in investor_ids:
+        portfolio_cache.invalidate(investor_id)
+
+
+def lands_changed(rows: List[dict]):
+    # Which investors hold a land isn't known here; freshly submitted lands have none
+    if any(r.get("status") != "pending_approval" for r in rows):
+        portfolio_cache.clear()
@@ -0,0 +1,213 @@
+from functools import lru_cache
+from typing import Dict, List, Optional
+import numpy as np
+from database import replica, replica_store, fetch_all
+from services.cache import TTLCache
+from services.pagination import is_uuid
+import config
+
+# Investor return projections for listings: expected generation, investor revenue net of
+# the owner's fixed payout and revenue share, payback and IRR over PROJECTION_YEARS, plus
+# downside / median / upside outcomes from Monte Carlo scenarios of irradiance and tariff.
+#
+# Every land's yearly investor cash flow in scenario s is  base * G[s, year] - fixed,
+# where G (degradation, escalation, irradiance and tariff shocks) is common to all lands.
+# So the scenario work is done once per process: percentiles across scenarios of the
+# discounted sum of G (on a grid of rates) and of its running total. A land's p-th
+# percentile IRR / payback / return is then the root of one equation on those curves,
+# which is exact for the sampled scenarios and costs O(lands), whatever the scenario count.
+
+LAND_COLUMNS = "id, title, status, total_price, potential_capacity_kw, owner_fixed_payout, owner_revenue_share_percent"
+HOURS_PER_YEAR = 8760.0
+RATE_GRID = np.linspace(-0.5, 1.0, 1501)  # IRR search range, 0.1% steps
+PERCENTILES = (10, 50, 90)
+CASES = ("expected", "p10", "p50", "p90")  # p10 = downside (10th percentile outcome)
+
+# land id -> projection; per worker, dropped by the catalog hooks when a land changes
+projection_cache = TTLCache(maxsize=config.PROJECTION_CACHE_ENTRIES, ttl=24 * 3600)
+
+
+class ScenarioModel:
+    def __init__(self, years: int, scenarios: int, degradation: float, escalation: float,
+                 irradiance_sd: float, tariff_sd: float, seed: int):
+        rng = np.random.default_rng(seed)
+        t = np.arange(years)
+        # Revenue multipliers relative to year 1: (scenarios, years)
+        trend = ((1 - degradation) * (1 + escalation)) ** t
+        irradiance = np.clip(1 + irradiance_sd * rng.standard_normal((scenarios, years)), 0, None)
+        shocks = tariff_sd * rng.standard_normal((scenarios, years)) - tariff_sd ** 2 / 2  # mean-one lognormal steps
+        shocks[:, 0] = 0  # year-1 tariff is known
+        paths = trend * irradiance * np.exp(np.cumsum(shocks, axis=1))
+
+        discount = (1 + RATE_GRID[None, :]) ** -(t[:, None] + 1.0)  # (years, rates)
+        self.years = years
+        self.trend = trend
+        self.generation = float(((1 - degradation) ** t).sum())  # lifetime kWh per year-1 kWh
+        self.annuity = discount.sum(axis=0)  # present value of 1 per year, per rate
+        # Row per case (expected, then PERCENTILES): present value per rate / running total per year
+        self.present_value = np.vstack([trend @ discount, np.percentile(paths @ discount, PERCENTILES, axis=0)])
+        self.cumulative = np.vstack([np.cumsum(trend), np.percentile(np.cumsum(paths, axis=1), PERCENTILES, axis=0)])
+
+
+@lru_cache(maxsize=1)
+def model() -> ScenarioModel:
+    return ScenarioModel(
+        years=config.PROJECTION_YEARS,
+        scenarios=config.PROJECTION_SCENARIOS,
+        degradation=config.PROJECTION_DEGRADATION_PERCENT / 100,
+        escalation=config.PROJECTION_TARIFF_ESCALATION_PERCENT / 100,
+        irradiance_sd=config.PROJECTION_IRRADIANCE_SD,
+        tariff_sd=config.PROJECTION_TARIFF_SD,
+        seed=config.PROJECTION_SEED,
+    )
+
+
+def assumptions() -> dict:
+    return {
+        "horizon_years": config.PROJECTION_YEARS,
+        "tariff_per_kwh": config.PAYOUT_TARIFF_PER_KWH,
+        "capacity_factor": config.PAYOUT_CAPACITY_FACTOR,
+        "degradation_percent": config.PROJECTION_DEGRADATION_PERCENT,
+        "tariff_escalation_percent": config.PROJECTION_TARIFF_ESCALATION_PERCENT,
+        "scenarios": config.PROJECTION_SCENARIOS,
+        "irradiance_sd": config.PROJECTION_IRRADIANCE_SD,
+        "tariff_sd": config.PROJECTION_TARIFF_SD,
+    }
+
+
+def _payback(cumulative: np.ndarray, price: np.ndarray) -> np.ndarray:
+    # First (fractional) year the running investor cash covers the price; NaN if never
+    reached = cumulative >= price[:, None, None]
+    year = reached.argmax(axis=2)
+    current = np.take_along_axis(cumulative, year[..., None], axis=2)[..., 0]
+    previous = np.where(year > 0, np.take_along_axis(cumulative, np.maximum(year - 1, 0)[..., None], axis=2)[..., 0], 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = (price[:, None] - previous) / (current - previous)
+    return np.where(reached.any(axis=2) & (price[:, None] > 0), year + np.clip(fraction, 0, 1), np.nan)
+
+
+def _irr(m: ScenarioModel, base: np.ndarray, fixed: np.ndarray, price: np.ndarray) -> np.ndarray:
+    # NPV(rate) = base * PV_case(rate) - fixed * annuity(rate) - price, falling with the rate.
+    # Bisection over grid indices (all lands and cases at once), then linear within the bracket
+    cases = np.arange(len(CASES))
+
+    def npv(k):
+        return base[:, None] * m.present_value[cases, k] - fixed[:, None] * m.annuity[k] - price[:, None]
+
+    shape = (len(price), len(CASES))
+    low, high = np.zeros(shape, np.int64), np.full(shape, len(RATE_GRID) - 1)
+    at_low, at_high = npv(low), npv(high)
+    valid = (at_low >= 0) & (at_high <= 0) & (price[:, None] > 0)
+    while True:
+        open_ = high - low > 1
+        if not open_.any():
+            break
+        mid = (low + high) // 2
+        above = npv(mid) > 0
+        low = np.where(open_ & above, mid, low)
+        high = np.where(open_ & ~above, mid, high)
+    at_low, at_high = npv(low), npv(high)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = np.clip(np.nan_to_num(at_low / (at_low - at_high)), 0, 1)
+    rate = RATE_GRID[low] + fraction * (RATE_GRID[high] - RATE_GRID[low])
+    return np.where(valid, rate, np.nan)
+
+
+def _values(array: np.ndarray, decimals: int) -> list:
+    # NaN -> None (JSON null)
+    return [None if v != v else v for v in np.round(array, decimals).tolist()]
+
+
+def project(rows: List[dict]) -> List[dict]:
+    m = model()
+    n = len(rows)
+    if not n:
+        return []
+
+    def column(name):
+        return np.fromiter((r.get(name) or 0.0 for r in rows), np.float64, n)
+
+    price = column("total_price")
+    fixed = 12 * column("owner_fixed_payout")  # monthly, as in the payout engine
+    share = column("owner_revenue_share_percent") / 100
+    energy = column("potential_capacity_kw") * HOURS_PER_YEAR * config.PAYOUT_CAPACITY_FACTOR  # year 1 kWh
+    gross = energy * config.PAYOUT_TARIFF_PER_KWH
+    base = gross * (1 - share)  # investor's part of year-1 revenue, before the fixed payout
+
+    years = np.arange(1, m.years + 1)
+    cumulative = base[:, None, None] * m.cumulative[None] - fixed[:, None, None] * years  # (lands, cases, years)
+    investor = cumulative[:, :, -1]
+    payback = _payback(cumulative, price)
+    irr = _irr(m, base, fixed, price)
+
+    gross_total = gross * m.trend.sum()
+    cash_flows = np.round(base[:, None] * m.trend - fixed[:, None], 2).tolist()
+    cases = []
+    for c in range(len(CASES)):
+        cases.append([
+            {"investor_revenue": revenue, "net_return": net, "payback_years": years_, "irr": rate}
+            for revenue, net, years_, rate in zip(_values(investor[:, c], 2), _values(investor[:, c] - price, 2),
+                                                  _values(payback[:, c], 2), _values(irr[:, c], 4))
+        ])
+    expected = zip(_values(energy, 1), _values(energy * m.generation, 1), _values(gross_total, 2),
+                   _values(fixed * m.years + gross_total * share, 2), cash_flows, cases[0])
+
+    out = []
+    for row, (annual, lifetime, gross_, owner, flows, case), p10, p50, p90 in zip(rows, expected, *cases[1:]):
+        out.append({
+            "land_id": row["id"],
+            "title": row.get("title"),
+            "status": row.get("status"),
+            "total_price": row.get("total_price"),
+            "potential_capacity_kw": row.get("potential_capacity_kw"),
+            "expected": {"annual_generation_kwh": annual, "lifetime_generation_kwh": lifetime,
+                         "gross_revenue": gross_, "owner_payout": owner, **case, "cash_flows": flows},
+            "scenarios": {"p10": p10, "p50": p50, "p90": p90},
+        })
+    return out
+
+
+async def _available_lands() -> List[dict]:
+    if replica_store.ready("lands"):
+        res = await replica.table("lands").select(LAND_COLUMNS).eq("status", "available").execute()
+        return res.data
+    return await fetch_all("lands", LAND_COLUMNS, status="available")
+
+
+async def get(land_ids: Optional[List[str]] = None) -> dict:
+    # Given lands (any status) or, without ids, the whole available catalog
+    if land_ids is None:
+        rows = await _available_lands()
+        ids = [r["id"] for r in rows]
+    else:
+        rows = None
+        ids = list(dict.fromkeys(land_ids))
+
+    found: Dict[str, dict] = {}
+    for land_id in ids:
+        cached = projection_cache.get(land_id)
+        if cached is not None:
+            found[land_id] = cached
+    missing = [i for i in ids if i not in found]
+    if missing:
+        if rows is None:
+            # Malformed ids can't exist (and would make Postgres reject the whole uuid IN list)
+            valid = [i for i in missing if is_uuid(i)]
+            rows = (await replica.table("lands").select(LAND_COLUMNS).in_("id", valid).execute()).data if valid else []
+        else:
+            pending = set(missing)
+            rows = [r for r in rows if r["id"] in pending]
+        for projection in project(rows):
+            found[projection["land_id"]] = projection
+            projection_cache.set(projection["land_id"], projection)
+
+    return {
+        "assumptions": assumptions(),
+        "projections": [found[i] for i in ids if i in found],
+        "not_found": [i for i in ids if i not in found],
+    }
+
+
+def invalidate(land_ids):
+    for land_id in land_ids:
+        projection_cache.invalidate(land_id)
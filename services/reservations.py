@@ -0,0 +1,48 @@
+from typing import Set
+from fastapi import HTTPException
+from database import supabase
+from services import catalog
+
+RESERVE_ERRORS = {
+    "not_found": (404, "Land not found"),
+    "not_available": (400, "Land not available"),
+    "amount_too_low": (400, "Investment amount must cover total price"),
+}
+
+# Lands with a reservation currently in flight from this worker
+_inflight: Set[str] = set()
+
+
+async def reserve(land_id: str, investor_id: str, amount: float, status: str, require_full_price: bool = False) -> dict:
+    # 1. In-process guard: a concurrent duplicate from this worker is turned away before it
+    #    reaches the database. That reservation may still fail, so the answer is a retryable
+    #    409, not "not available": availability is decided only by the compare-and-set below
+    #    (in-memory statuses can lag behind other instances and reconciles)
+    if land_id in _inflight:
+        raise HTTPException(status_code=409, detail="Reservation in progress for this land, retry shortly",
+                            headers={"Retry-After": "1"})
+
+    _inflight.add(land_id)
+    try:
+        # 2. Compare-and-set on the land + investment insert, one round trip
+        res = await supabase.rpc("reserve_land", {
+            "p_land_id": land_id,
+            "p_investor_id": investor_id,
+            "p_amount": amount,
+            "p_status": status,
+            "p_require_full_price": require_full_price,
+        }).execute()
+    finally:
+        _inflight.discard(land_id)
+
+    result = res.data or {}
+    if result.get("error"):
+        if result.get("land"):
+            # Someone else (e.g. another worker) won; bring the in-memory views up to date
+            catalog.lands_changed([result["land"]])
+        code, detail = RESERVE_ERRORS.get(result["error"], (400, "Land not available"))
+        raise HTTPException(status_code=code, detail=detail)
+
+    catalog.lands_changed([result["land"]])
+    catalog.investments_changed([result["investment"]])
+    return result["investment"]
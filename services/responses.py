@@ -0,0 +1,115 @@
+from typing import Any, Iterator, List, Optional
+import zlib
+import orjson
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.datastructures import Headers, MutableHeaders
+import config
+
+try:
+    import brotli
+except ImportError:  # optional: falls back to gzip only
+    brotli = None
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+class FastJSONResponse(JSONResponse):
+    # orjson instead of json.dumps; used as the app's default response class
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _array_chunks(rows: List[dict], chunk_rows: int) -> Iterator[bytes]:
+    # `[` + rows serialized chunk by chunk + `]`, never one giant buffer
+    yield b"["
+    for start in range(0, len(rows), chunk_rows):
+        chunk = dumps(rows[start:start + chunk_rows])[1:-1]
+        yield (b"," + chunk) if start else chunk
+    yield b"]"
+
+
+def json_rows(rows: List[dict], headers: Optional[dict] = None):
+    # Trusted DB rows go straight to JSON (no response-model re-validation);
+    # large arrays are streamed in chunks
+    if len(rows) >= config.STREAM_MIN_ROWS:
+        return StreamingResponse(_array_chunks(rows, config.STREAM_CHUNK_ROWS),
+                                 media_type="application/json", headers=headers)
+    return FastJSONResponse(content=rows, headers=headers)
+
+
+class CompressionMiddleware:
+    # Negotiates br (if the brotli package is installed) or gzip from Accept-Encoding
+    # and compresses bodies >= COMPRESS_MIN_BYTES, including streamed ones.
+
+    SKIP_TYPES = ("text/event-stream", "image/", "application/zip", "application/gzip", "application/vnd.apache.parquet")
+
+    def __init__(self, app, minimum_size: int = None):
+        self.app = app
+        self.minimum_size = config.COMPRESS_MIN_BYTES if minimum_size is None else minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        accept = Headers(scope=scope).get("accept-encoding", "")
+        encodings = {e.split(";")[0].strip().lower() for e in accept.split(",")}
+        if brotli is not None and "br" in encodings:
+            encoding = "br"
+        elif "gzip" in encodings:
+            encoding = "gzip"
+        else:
+            return await self.app(scope, receive, send)
+
+        state = {"start": None, "compressor": None, "passthrough": False}
+
+        async def wrapped_send(message):
+            if message["type"] == "http.response.start":
+                state["start"] = message
+                headers = Headers(raw=message["headers"])
+                ctype = headers.get("content-type", "")
+                if "content-encoding" in headers or any(ctype.startswith(t) for t in self.SKIP_TYPES):
+                    state["passthrough"] = True
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or state["passthrough"]:
+                return await send(message)
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if state["compressor"] is None:
+                if not more and len(body) < self.minimum_size:
+                    # Small complete body: not worth compressing
+                    state["passthrough"] = True
+                    await send(state["start"])
+                    return await send(message)
+                state["compressor"] = _Compressor(encoding)
+                start = state["start"]
+                headers = MutableHeaders(raw=start["headers"])
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "content-length" in headers:
+                    del headers["content-length"]
+                if "etag" in headers and not headers["etag"].startswith("W/"):
+                    # Different bytes on the wire -> weak validator (RFC 9110 8.8.1)
+                    headers["etag"] = "W/" + headers["etag"]
+                await send(start)
+
+            data = state["compressor"].process(body)
+            if not more:
+                data += state["compressor"].finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more})
+
+        await self.app(scope, receive, wrapped_send)
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._c = brotli.Compressor(quality=4)
+            self.process = self._c.process
+            self.finish = self._c.finish
+        else:
+            self._c = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 -> gzip container
+            self.process = self._c.compress
+            self.finish = self._c.flush
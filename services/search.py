@@ -0,0 +1,176 @@
+import bisect
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import config
+
+# Searchable text fields and how much a match in each one counts
+FIELD_WEIGHTS = {"location": 1.0, "title": 0.9, "land_type": 0.8, "description": 0.6}
+# Fields whose words feed prefix autocomplete
+SUGGEST_FIELDS = ("location", "title", "land_type")
+
+_WORD = re.compile(r"\w+")
+
+
+def _words(text: Optional[str]) -> List[str]:
+    return _WORD.findall(text.lower()) if text else []
+
+
+def trigrams(text: Optional[str]) -> Set[str]:
+    # pg_trgm style: each word padded with two spaces in front and one behind
+    grams = set()
+    for word in _words(text):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class LandSearchIndex:
+    # Trigram inverted index over the text fields of *available* lands.
+    # Handles typos ("Chenai" -> "Chennai"), ranked results, prefix
+    # autocomplete and numeric range filters without touching the database.
+
+    def __init__(self):
+        self._rows: Dict[str, dict] = {}
+        self._grams: Dict[str, Dict[str, Set[str]]] = {}  # land id -> field -> trigrams
+        self._postings: Dict[str, Set[str]] = defaultdict(set)  # trigram -> land ids
+        self._terms: List[str] = []  # sorted autocomplete vocabulary
+        self._term_counts: Counter = Counter()
+
+    def __len__(self):
+        return len(self._rows)
+
+    # --- Maintenance ---
+
+    def load(self, rows: Iterable[dict]):
+        self.__init__()
+        self.upsert(rows)
+
+    def upsert(self, rows: Iterable[dict]):
+        for row in rows or []:
+            land_id = row.get("id")
+            if not land_id:
+                continue
+            merged = {**self._rows.get(land_id, {}), **row}
+            self.remove(land_id)
+            if merged.get("status") == "available":
+                self._add(land_id, merged)
+
+    def _add(self, land_id: str, row: dict):
+        fields = {f: trigrams(row.get(f)) for f in FIELD_WEIGHTS}
+        self._rows[land_id] = row
+        self._grams[land_id] = fields
+        for gram in set().union(*fields.values()):
+            self._postings[gram].add(land_id)
+        for term in self._suggest_terms(row):
+            if self._term_counts[term] == 0:
+                bisect.insort(self._terms, term)
+            self._term_counts[term] += 1
+
+    def remove(self, land_id: str):
+        row = self._rows.pop(land_id, None)
+        if row is None:
+            return
+        fields = self._grams.pop(land_id)
+        for gram in set().union(*fields.values()):
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(land_id)
+                if not ids:
+                    del self._postings[gram]
+        for term in self._suggest_terms(row):
+            self._term_counts[term] -= 1
+            if self._term_counts[term] <= 0:
+                del self._term_counts[term]
+                i = bisect.bisect_left(self._terms, term)
+                if i < len(self._terms) and self._terms[i] == term:
+                    self._terms.pop(i)
+
+    @staticmethod
+    def _suggest_terms(row: dict) -> Set[str]:
+        terms = set()
+        for f in SUGGEST_FIELDS:
+            terms.update(_words(row.get(f)))
+        return terms
+
+    # --- Queries ---
+
+    def search(
+        self,
+        text: Optional[str] = None,
+        fields: Tuple[str, ...] = tuple(FIELD_WEIGHTS),
+        ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        land_type: Optional[str] = None,
+        limit: int = 50,
+    ) -> List[dict]:
+        ranges = ranges or {}
+        query_grams = trigrams(text)
+
+        if query_grams:
+            # Count shared trigrams per candidate via the postings lists
+            hits: Counter = Counter()
+            for gram in query_grams:
+                hits.update(self._postings.get(gram, ()))
+            min_hits = config.SEARCH_MIN_SCORE * len(query_grams)
+            scored = []
+            for land_id, n in hits.items():
+                if n < min_hits:
+                    continue
+                score = self._score(land_id, query_grams, fields)
+                if score >= config.SEARCH_MIN_SCORE:
+                    scored.append((score, land_id))
+            scored.sort(key=lambda s: (-s[0], s[1]))
+            candidates = (land_id for _, land_id in scored)
+        elif text:
+            return []
+        else:
+            candidates = iter(sorted(self._rows, key=lambda i: self._rows[i].get("created_at") or "", reverse=True))
+
+        out = []
+        for land_id in candidates:
+            row = self._rows[land_id]
+            if land_type and (row.get("land_type") or "").lower() != land_type.lower():
+                continue
+            if not _in_ranges(row, ranges):
+                continue
+            out.append(row)
+            if len(out) >= limit:
+                break
+        return out
+
+    def _score(self, land_id: str, query_grams: Set[str], fields: Tuple[str, ...]) -> float:
+        # Share of the query's trigrams found in a field, weighted per field; best field wins
+        doc = self._grams[land_id]
+        best = 0.0
+        for f in fields:
+            if doc[f]:
+                best = max(best, FIELD_WEIGHTS[f] * len(query_grams & doc[f]) / len(query_grams))
+        return best
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[str]:
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+        i = bisect.bisect_left(self._terms, prefix)
+        matches = []
+        while i < len(self._terms) and self._terms[i].startswith(prefix):
+            matches.append(self._terms[i])
+            i += 1
+        matches.sort(key=lambda t: (-self._term_counts[t], t))
+        return matches[:limit]
+
+
+def _in_ranges(row: dict, ranges) -> bool:
+    for column, (low, high) in ranges.items():
+        value = row.get(column)
+        if value is None:
+            return False
+        value = float(value)
+        if low is not None and value < low:
+            return False
+        if high is not None and value > high:
+            return False
+    return True
+
+
+search_index = LandSearchIndex()
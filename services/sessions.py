@@ -0,0 +1,166 @@
+import base64
+import hashlib
+import hmac
+import secrets
+import time
+from typing import Dict, NamedTuple, Optional
+import orjson
+from fastapi import Depends, Header, HTTPException
+from starlette.concurrency import run_in_threadpool
+from database import replica
+from services.shared import store
+import config
+
+# Signed session tokens (HMAC-SHA256, compact "payload.signature") with user id and
+# role claims, so authenticated requests are checked without a users query.
+# Short-lived access tokens + longer refresh tokens; logout revokes by token id.
+
+if not config.AUTH_SECRET:
+    print("Warning: AUTH_SECRET not set; using a random per-process secret (tokens won't survive restarts or cross workers).")
+_SECRET = (config.AUTH_SECRET or secrets.token_hex(32)).encode()
+
+PASSWORD_SCHEME = "pbkdf2_sha256"
+
+
+class Principal(NamedTuple):
+    id: str
+    role: Optional[str]  # None for the legacy X-User-ID header (role not known without a lookup)
+    token_id: Optional[str] = None
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def _unb64(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: str) -> str:
+    return _b64(hmac.new(_SECRET, payload.encode(), hashlib.sha256).digest())
+
+
+def issue(user_id: str, role: str, kind: str = "access", auth_time: Optional[int] = None) -> str:
+    # auth_time: when the user last signed in with a password; refreshing keeps it, and no
+    # token outlives auth_time + SESSION_MAX_SECONDS however often it is rotated
+    ttl = config.ACCESS_TOKEN_SECONDS if kind == "access" else config.REFRESH_TOKEN_SECONDS
+    now = int(time.time())
+    auth_time = auth_time or now
+    exp = min(now + ttl, auth_time + config.SESSION_MAX_SECONDS)
+    claims = {"sub": user_id, "role": role, "typ": kind, "iat": now, "exp": exp, "auth_time": auth_time,
+              "jti": secrets.token_urlsafe(12)}
+    payload = _b64(orjson.dumps(claims))
+    return f"{payload}.{_sign(payload)}"
+
+
+def issue_pair(user_id: str, role: str, auth_time: Optional[int] = None) -> dict:
+    auth_time = auth_time or int(time.time())
+    access = issue(user_id, role, "access", auth_time)
+    return {
+        "access_token": access,
+        "refresh_token": issue(user_id, role, "refresh", auth_time),
+        "token_type": "bearer",
+        "expires_in": min(config.ACCESS_TOKEN_SECONDS, max(0, auth_time + config.SESSION_MAX_SECONDS - int(time.time()))),
+    }
+
+
+def verify(token: str, kind: str = "access") -> dict:
+    try:
+        payload, signature = token.split(".")
+        if not hmac.compare_digest(signature, _sign(payload)):
+            raise ValueError("bad signature")
+        claims = orjson.loads(_unb64(payload))
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    if claims.get("typ") != kind:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    if claims["exp"] < time.time():
+        raise HTTPException(status_code=401, detail="Token expired")
+    if revocations.is_revoked(claims["jti"]):
+        raise HTTPException(status_code=401, detail="Token revoked")
+    return claims
+
+
+class RevocationSet:
+    # Token ids revoked before they expire; entries drop out once the token would
+    # have expired anyway, so the set stays small.
+
+    def __init__(self):
+        self._revoked: Dict[str, float] = {}
+
+    def __len__(self):
+        return len(self._revoked)
+
+    def revoke(self, token_id: str, expires: float, publish: bool = True):
+        self._revoked[token_id] = expires
+        if len(self._revoked) > 1024:
+            now = time.time()
+            self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+        if publish:
+            # Other workers on the node apply it through the change feed (services/catalog.py)
+            store.publish("revoke", {"jti": token_id, "exp": expires})
+
+    def is_revoked(self, token_id: str) -> bool:
+        return token_id in self._revoked
+
+
+revocations = RevocationSet()
+
+
+# --- Passwords ---
+
+def _pbkdf2(password: str, salt: bytes, iterations: int) -> bytes:
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+
+
+async def hash_password(password: str) -> str:
+    # CPU-bound: keep it off the event loop
+    salt = secrets.token_bytes(16)
+    iterations = config.PASSWORD_HASH_ITERATIONS
+    digest = await run_in_threadpool(_pbkdf2, password, salt, iterations)
+    return f"{PASSWORD_SCHEME}${iterations}${_b64(salt)}${_b64(digest)}"
+
+
+async def check_password(password: str, stored: Optional[str]) -> bool:
+    if not stored:
+        return False
+    if not stored.startswith(PASSWORD_SCHEME + "$"):
+        # Legacy plaintext row (upgraded by the caller via needs_rehash)
+        return hmac.compare_digest(password.encode(), stored.encode())
+    _, iterations, salt, digest = stored.split("$")
+    candidate = await run_in_threadpool(_pbkdf2, password, _unb64(salt), int(iterations))
+    return hmac.compare_digest(candidate, _unb64(digest))
+
+
+def needs_rehash(stored: str) -> bool:
+    # Plaintext, or hashed with a different cost than configured now
+    return not stored.startswith(f"{PASSWORD_SCHEME}${config.PASSWORD_HASH_ITERATIONS}$")
+
+
+# --- Dependencies ---
+
+async def authenticate(
+    authorization: Optional[str] = Header(None),
+    user_id: Optional[str] = Header(None, alias="X-User-ID"),
+) -> Principal:
+    if authorization and authorization.lower().startswith("bearer "):
+        claims = verify(authorization[7:].strip())
+        return Principal(claims["sub"], claims["role"], claims["jti"])
+    if user_id and config.AUTH_LEGACY_HEADER:
+        return Principal(user_id, None)
+    raise HTTPException(status_code=401, detail="Not authenticated")
+
+
+async def current_user_id(principal: Principal = Depends(authenticate)) -> str:
+    return principal.id
+
+
+async def require_admin(principal: Principal = Depends(authenticate)) -> Principal:
+    role = principal.role
+    if role is None:
+        # Legacy header: the role has to come from the database
+        res = await replica.table("users").select("role").eq("id", principal.id).execute()
+        role = res.data[0]["role"] if res.data else None
+    if role != "admin":
+        raise HTTPException(status_code=403, detail="Admin Access Only")
+    return principal
@@ -0,0 +1,210 @@
+import asyncio
+import fcntl
+import mmap
+import os
+import pickle
+import sqlite3
+import struct
+import tempfile
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Hashable, List, Optional, Tuple
+import config
+
+# State shared by the worker processes of one node (SHARED_STATE=true, see serve.py):
+#  - an L2 cache behind the in-process TTLCaches (SQLite file on /dev/shm)
+#  - per-namespace generation counters in a shared mmap, so a write in one worker
+#    drops the matching L1 entries in every worker without a round trip
+#  - a change feed the catalog hooks publish to, replayed by the other workers
+#  - file locks for "only one worker does this" (startup snapshots, schedulers)
+# With SHARED_STATE off every method is a cheap no-op and each worker stands alone.
+
+SLOTS = 64
+
+
+def default_dir() -> str:
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "solar-backend")
+
+
+class SharedStore:
+    def __init__(self):
+        self.enabled = False
+        self.directory: Optional[str] = None
+        self._db: Optional[sqlite3.Connection] = None
+        self._generations: Optional[mmap.mmap] = None
+        self._leases = {}  # lock name -> open file holding the flock
+        self.last_seq = 0
+        self._polled = False
+
+    def open(self, directory: str = None):
+        if self.enabled:
+            return
+        self.directory = directory or config.SHARED_STATE_DIR or default_dir()
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+
+        path = os.path.join(self.directory, "generations")
+        with self.lock("init"):
+            if not os.path.exists(path) or os.path.getsize(path) < SLOTS * 8:
+                with open(path, "wb") as f:
+                    f.write(b"\0" * SLOTS * 8)
+            fd = os.open(path, os.O_RDWR)
+            try:
+                self._generations = mmap.mmap(fd, SLOTS * 8)
+            finally:
+                os.close(fd)
+
+            self._db = sqlite3.connect(os.path.join(self.directory, "state.db"),
+                                       isolation_level=None, check_same_thread=False, timeout=5)
+            self._db.execute("pragma journal_mode=wal")
+            self._db.execute("pragma synchronous=off")  # tmpfs: nothing to be durable against
+            self._db.execute("""create table if not exists cache (
+                ns text not null, key text not null, expires real not null, value blob not null,
+                primary key (ns, key))""")
+            self._db.execute("""create table if not exists events (
+                seq integer primary key autoincrement, origin integer not null,
+                kind text not null, payload blob not null, created real not null)""")
+        self.last_seq = self._db.execute("select coalesce(max(seq), 0) from events").fetchone()[0]
+        self.enabled = True
+
+    def close(self):
+        for handle in self._leases.values():
+            handle.close()
+        self._leases.clear()
+        if self._db is not None:
+            self._db.close()
+        if self._generations is not None:
+            self._generations.close()
+        self._db = self._generations = None
+        self.enabled = False
+
+    # --- Generations (L1 invalidation across workers) ---
+
+    def _slot(self, namespace: str) -> int:
+        return zlib.crc32(namespace.encode()) % SLOTS * 8
+
+    def generation(self, namespace: str) -> int:
+        if not self.enabled:
+            return 0
+        return struct.unpack_from("Q", self._generations, self._slot(namespace))[0]
+
+    def bump(self, namespace: str):
+        # Not atomic across processes, but any racing bump still moves the value
+        if self.enabled:
+            offset = self._slot(namespace)
+            value = struct.unpack_from("Q", self._generations, offset)[0]
+            struct.pack_into("Q", self._generations, offset, value + 1)
+
+    # --- L2 cache ---
+
+    def get(self, namespace: str, key: Hashable):
+        if not self.enabled:
+            return None
+        row = self._db.execute("select expires, value from cache where ns = ? and key = ?",
+                               (namespace, repr(key))).fetchone()
+        if row is None or row[0] < time.time():
+            return None
+        return pickle.loads(row[1])
+
+    def set(self, namespace: str, key: Hashable, value, ttl: float):
+        if self.enabled:
+            self._db.execute("insert or replace into cache values (?, ?, ?, ?)",
+                             (namespace, repr(key), time.time() + ttl, pickle.dumps(value, pickle.HIGHEST_PROTOCOL)))
+
+    def delete(self, namespace: str, key: Hashable):
+        if self.enabled:
+            self._db.execute("delete from cache where ns = ? and key = ?", (namespace, repr(key)))
+            self.bump(namespace)
+
+    def clear(self, namespace: str):
+        if self.enabled:
+            self._db.execute("delete from cache where ns = ?", (namespace,))
+            self.bump(namespace)
+
+    # --- Change feed ---
+
+    def publish(self, kind: str, payload):
+        if self.enabled:
+            self._db.execute("insert into events (origin, kind, payload, created) values (?, ?, ?, ?)",
+                             (os.getpid(), kind, pickle.dumps(payload, pickle.HIGHEST_PROTOCOL), time.time()))
+
+    def poll(self) -> List[Tuple[str, object]]:
+        # Events from the other workers since the last poll
+        if not self.enabled:
+            return []
+        rows = self._db.execute("select seq, origin, kind, payload from events where seq > ? order by seq",
+                                (self.last_seq,)).fetchall()
+        self._polled = True
+        if rows:
+            self.last_seq = rows[-1][0]
+        pid = os.getpid()
+        return [(kind, pickle.loads(payload)) for _, origin, kind, payload in rows if origin != pid]
+
+    def prune(self, older_than: float):
+        if self.enabled:
+            self._db.execute("delete from events where created < ?", (time.time() - older_than,))
+            self._db.execute("delete from cache where expires < ?", (time.time(),))
+
+    # --- Coordination ---
+
+    @contextmanager
+    def lock(self, name: str):
+        # Blocking cross-process lock; a no-op when only one process runs
+        if self.directory is None:
+            yield
+            return
+        with open(os.path.join(self.directory, f"{name}.lock"), "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def try_lead(self, name: str) -> bool:
+        # The first worker to take the lease keeps it for its lifetime
+        if not self.enabled:
+            return True
+        if name in self._leases:
+            return True
+        handle = open(os.path.join(self.directory, f"{name}.lease"), "a")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        self._leases[name] = handle
+        return True
+
+    async def load_once(self, name: str, loader: Callable[[], Awaitable], ttl: float):
+        # Workers starting together share one load: the first takes the lock and
+        # stores the result (with the feed position it corresponds to); the rest reuse it.
+        if not self.enabled:
+            return await loader()
+        cached = self.get("snapshots", name)
+        if cached is not None:
+            return self._resume(cached)
+        lock_path = os.path.join(self.directory, f"snapshot-{name}.lock")
+        handle = open(lock_path, "a")
+        try:
+            await asyncio.to_thread(fcntl.flock, handle, fcntl.LOCK_EX)
+            cached = self.get("snapshots", name)
+            if cached is not None:
+                return self._resume(cached)
+            seq = self._db.execute("select coalesce(max(seq), 0) from events").fetchone()[0]
+            value = await loader()
+            self.set("snapshots", name, (seq, value), ttl)
+            return value
+        finally:
+            handle.close()  # releases the flock
+
+    def _resume(self, cached):
+        seq, value = cached
+        # At startup, replay what happened after the snapshot was taken. Later on the
+        # feed has already been applied here, and replaying it would repeat notifications.
+        if not self._polled:
+            self.last_seq = min(self.last_seq, seq)
+        return value
+
+
+store = SharedStore()
@@ -0,0 +1,131 @@
+import asyncio
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from database import supabase, fetch_all
+import config
+from services.generation import generation_store
+from services.shared import store
+
+# Investment statuses that count towards platform volume
+VOLUME_STATUSES = ("active", "completed")
+
+
+class StatsEngine:
+    # In-memory counters for /stats/platform and /admin/stats.
+    # Routers report every user/land/investment write here, so reads are O(1);
+    # reconcile() periodically rebuilds everything from the database to fix drift.
+
+    def __init__(self):
+        self.users_by_role: Counter = Counter()
+        self.lands_by_status: Counter = Counter()
+        self.investments_by_status: Counter = Counter()
+        self.volume_by_status: Dict[str, float] = defaultdict(float)
+        self._lands: Dict[str, str] = {}  # land id -> status
+        self._investments: Dict[str, Tuple[str, float]] = {}  # investment id -> (status, amount)
+        self.last_reconciled: Optional[datetime] = None
+
+    # --- Write hooks (called by routers with the rows Supabase returned) ---
+
+    def user_added(self, role: str):
+        self.users_by_role[role] += 1
+
+    def land_changed(self, land_id: str, status: str):
+        old = self._lands.get(land_id)
+        if old == status:
+            return
+        if old is not None:
+            self.lands_by_status[old] -= 1
+        self._lands[land_id] = status
+        self.lands_by_status[status] += 1
+
+    def investment_changed(self, inv_id: str, status: str, amount: Optional[float] = None):
+        old_status, old_amount = self._investments.get(inv_id, (None, 0.0))
+        if amount is None:
+            amount = old_amount
+        if old_status is not None:
+            self.investments_by_status[old_status] -= 1
+            self.volume_by_status[old_status] -= old_amount
+        self._investments[inv_id] = (status, amount)
+        self.investments_by_status[status] += 1
+        self.volume_by_status[status] += amount
+
+    def land_status(self, land_id: str) -> Optional[str]:
+        return self._lands.get(land_id)
+
+    def investment_status(self, inv_id: str) -> Optional[str]:
+        return self._investments.get(inv_id, (None, 0.0))[0]
+
+    def record_lands(self, rows: List[dict]):
+        for row in rows or []:
+            if row.get("id") and row.get("status"):
+                self.land_changed(row["id"], row["status"])
+
+    def record_investments(self, rows: List[dict]):
+        for row in rows or []:
+            if row.get("id") and row.get("status"):
+                amount = row.get("amount")
+                self.investment_changed(row["id"], row["status"], float(amount) if amount is not None else None)
+
+    # --- Reads ---
+
+    def platform(self) -> dict:
+        active_sites = self.lands_by_status["active"]
+        return {
+            "total_investors": self.users_by_role["investor"],
+            "total_land_owners": self.users_by_role["land_owner"],
+            "active_sites": active_sites,
+            # Platform-wide rollup from the generation store
+            "total_energy_generated": round(generation_store.platform_total, 3),
+        }
+
+    def admin(self) -> dict:
+        return {
+            "total_users": sum(self.users_by_role.values()),
+            "active_lands": self.lands_by_status["active"],
+            "pending_lands": self.lands_by_status["pending_approval"],
+            "pending_investments": self.investments_by_status["pending_approval"],
+            "total_volume": sum(self.volume_by_status[s] for s in VOLUME_STATUSES),
+        }
+
+    # --- Reconciliation ---
+
+    async def _snapshot(self) -> Tuple[Dict[str, int], List[dict], List[dict]]:
+        # Role counts use exact-count HEAD requests;
+        # lands/investments are paged with only the columns we need.
+        roles = ("investor", "land_owner", "admin")
+        role_counts, lands, investments = await asyncio.gather(
+            asyncio.gather(*[
+                supabase.table("users").select("id", count="exact", head=True).eq("role", r).execute()
+                for r in roles
+            ]),
+            fetch_all("lands", "id, status"),
+            fetch_all("investments", "id, status, amount"),
+        )
+        return {role: res.count or 0 for role, res in zip(roles, role_counts)}, lands, investments
+
+    async def reconcile(self):
+        # Rebuild from the database (one worker per node reads it, the rest reuse the snapshot)
+        ttl = config.STATS_RECONCILE_SECONDS / 2
+        role_counts, lands, investments = await store.load_once("stats", self._snapshot, ttl=ttl)
+
+        fresh = StatsEngine()
+        fresh.users_by_role.update(role_counts)
+        fresh.record_lands(lands)
+        fresh.record_investments(investments)
+
+        # Swap in one go so readers never see a half-built snapshot
+        self.__dict__.update(fresh.__dict__)
+        self.last_reconciled = datetime.now(timezone.utc)
+
+    async def run_reconciler(self, interval: float = None):
+        interval = interval or config.STATS_RECONCILE_SECONDS
+        while True:
+            try:
+                await self.reconcile()
+            except Exception as e:
+                print(f"Stats reconcile failed: {e}")
+            await asyncio.sleep(interval)
+
+
+stats = StatsEngine()
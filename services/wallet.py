@@ -0,0 +1,31 @@
+from typing import List, Optional
+from fastapi import HTTPException
+from database import supabase
+
+WALLET_ERRORS = {
+    "not_found": (404, "User not found"),
+    "insufficient_funds": (400, "Insufficient funds"),
+    "duplicate": (409, "Transaction already applied"),
+}
+
+
+async def apply(user_id: str, amount: float, kind: str, reference: Optional[str] = None,
+                effects: Optional[List[dict]] = None) -> dict:
+    # Atomic conditional increment/decrement of users.balance plus an append-only
+    # ledger entry, in one round trip (see wallet_apply() in SUPABASE_SETUP.md).
+    # `effects` (services/outbox.py) are recorded in the same transaction.
+    params = {
+        "p_user_id": user_id,
+        "p_amount": amount,
+        "p_kind": kind,
+        "p_reference": reference,
+    }
+    if effects:
+        params["p_effects"] = effects
+    res = await supabase.rpc("wallet_apply", params).execute()
+
+    result = res.data or {}
+    if result.get("error"):
+        code, detail = WALLET_ERRORS.get(result["error"], (400, "Wallet update failed"))
+        raise HTTPException(status_code=code, detail=detail)
+    return result